@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT benchmarks
+
+Benchmarks of `codraft.core.computation` functions and of processing operations
+(see `codraft.core.processing`), written for airspeed velocity (asv):
+image sizes, data types and peak/contour densities are swept through benchmark
+parameters.
+
+Benchmark results history is stored in ".asv/results" (see asv.conf.json), so
+that a dependency upgrade or a code change may be compared to previous runs:
+
+    asv run                          # Benchmark current commit
+    asv continuous master HEAD       # Compare HEAD to master (fails on regression)
+    asv compare <commit1> <commit2>  # Compare stored results
+    asv publish && asv preview       # Browse results history
+
+Benchmarks may also be run on an existing environment (e.g. after upgrading a
+dependency), without building CodraFT:
+
+    asv run --python=same --set-commit-hash=$(git rev-parse HEAD)
+"""
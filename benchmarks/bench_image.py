@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT benchmarks: image computation functions (`codraft.core.computation.image`)
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+# pylint: disable=attribute-defined-outside-init
+
+import numpy as np
+
+from codraft.core.computation.flatfield import FlatFieldCorrector
+from codraft.core.computation.image import (
+    flatfield,
+    get_2d_peaks_coords,
+    get_centroid_fourier,
+    get_centroid_fourier_batch,
+    get_contour_shapes,
+    get_enclosing_circle,
+)
+
+from .common import (
+    DENSITIES,
+    IMAGE_DTYPES,
+    IMAGE_SIZES,
+    create_spots_image,
+    scale_to_dtype,
+    skip_combo,
+)
+
+
+class FlatField:
+    """Flat-field correction"""
+
+    params = [IMAGE_SIZES, IMAGE_DTYPES]
+    param_names = ["size", "dtype"]
+
+    def setup(self, size, dtype):
+        """Create raw and flat-field images"""
+        rng = np.random.default_rng(1)
+        self.raw = scale_to_dtype(rng.random((size, size)), dtype)
+        self.flat = scale_to_dtype(0.5 + 0.5 * rng.random((size, size)), dtype)
+        self.threshold = float(np.median(self.raw[::16, ::16]))
+
+    def time_flatfield(self, size, dtype):
+        """Flat-field correction"""
+        flatfield(self.raw, self.flat, self.threshold)
+
+    def peakmem_flatfield(self, size, dtype):
+        """Flat-field correction (peak memory)"""
+        flatfield(self.raw, self.flat, self.threshold)
+
+
+class FlatFieldStack:
+    """Flat-field correction of image stack frames (reusing the same engine)"""
+
+    params = [[10, 100], IMAGE_DTYPES]
+    param_names = ["frames", "dtype"]
+
+    def setup(self, frames, dtype):
+        """Create raw image stack and flat-field correction engine"""
+        rng = np.random.default_rng(1)
+        size = IMAGE_SIZES[0]
+        self.raw = scale_to_dtype(rng.random((frames, size, size)), dtype)
+        flat = scale_to_dtype(0.5 + 0.5 * rng.random((size, size)), dtype)
+        self.corrector = FlatFieldCorrector(flat)
+        self.threshold = float(np.median(self.raw[0, ::16, ::16]))
+
+    def time_flatfield_stack(self, frames, dtype):
+        """Flat-field correction (in place)"""
+        self.corrector.correct(self.raw, self.threshold, out=self.raw)
+
+
+class Centroid:
+    """Centroid (Fourier method) and enclosing circle of a single spot"""
+
+    params = [IMAGE_SIZES, IMAGE_DTYPES]
+    param_names = ["size", "dtype"]
+
+    def setup(self, size, dtype):
+        """Create image"""
+        self.data = create_spots_image(size, dtype, 1, sigma=size / 20)
+
+    def time_centroid_fourier(self, size, dtype):
+        """Centroid (Fourier method)"""
+        get_centroid_fourier(self.data)
+
+    def time_enclosing_circle(self, size, dtype):
+        """Enclosing circle"""
+        get_enclosing_circle(self.data)
+
+
+class CentroidBatch:
+    """Centroids (Fourier method) of image stack frames"""
+
+    params = [[10, 100], IMAGE_DTYPES]
+    param_names = ["frames", "dtype"]
+
+    def setup(self, frames, dtype):
+        """Create image stack"""
+        data = create_spots_image(IMAGE_SIZES[0], dtype, 1, sigma=IMAGE_SIZES[0] / 20)
+        self.data = np.stack([data] * frames)
+
+    def time_centroid_fourier_batch(self, frames, dtype):
+        """Centroids (Fourier method)"""
+        get_centroid_fourier_batch(self.data)
+
+
+class PeakDetection:
+    """2D peak detection"""
+
+    params = [IMAGE_SIZES, IMAGE_DTYPES, DENSITIES]
+    param_names = ["size", "dtype", "density"]
+
+    def setup(self, size, dtype, density):
+        """Create image"""
+        skip_combo(dtype, density)
+        self.data = create_spots_image(size, dtype, density)
+        # Neighborhood size: half the distance between spots
+        self.size = max(5, int(size / (2 * np.sqrt(density))))
+
+    def time_2d_peaks_coords(self, size, dtype, density):
+        """2D peak detection"""
+        get_2d_peaks_coords(self.data, self.size)
+
+    def track_peak_number(self, size, dtype, density):
+        """Number of detected peaks (checks that benchmark is meaningful)"""
+        return len(get_2d_peaks_coords(self.data, self.size))
+
+
+class ContourShapes:
+    """Contour detection and shape fitting"""
+
+    params = [IMAGE_SIZES, IMAGE_DTYPES, DENSITIES, ["circle", "ellipse"]]
+    param_names = ["size", "dtype", "density", "shape"]
+
+    def setup(self, size, dtype, density, shape):
+        """Create image"""
+        skip_combo(dtype, density)
+        self.data = create_spots_image(size, dtype, density)
+
+    def time_contour_shapes(self, size, dtype, density, shape):
+        """Contour detection and shape fitting"""
+        get_contour_shapes(self.data, shape)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT benchmarks: signal/image processing operations (`codraft.core.processing`),
+i.e. the operations run by signal/image processors (output object creation
+included)
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+# pylint: disable=attribute-defined-outside-init,unused-argument
+
+import numpy as np
+
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.model.signal import SignalParam, create_signal
+from codraft.core.processing import get_operation
+
+from .common import (
+    IMAGE_DTYPES,
+    IMAGE_SIZES,
+    SIGNAL_SIZES,
+    create_spots_image,
+    create_spots_signal,
+)
+
+#: Image filtering operations
+IMAGE_OPERATIONS = [
+    "gaussian_filter",
+    "moving_average",
+    "moving_median",
+    "wiener",
+    "fft",
+    "abs",
+    "log10",
+]
+
+#: Signal filtering operations
+SIGNAL_OPERATIONS = [
+    "gaussian_filter",
+    "moving_average",
+    "moving_median",
+    "wiener",
+    "fft",
+    "derivative",
+    "integral",
+    "normalize",
+    "peak_detection",
+]
+
+
+class ImageOperations:
+    """Image filtering operations"""
+
+    params = [IMAGE_SIZES, IMAGE_DTYPES, IMAGE_OPERATIONS]
+    param_names = ["size", "dtype", "operation"]
+
+    def setup(self, size, dtype, operation):
+        """Create image"""
+        data = create_spots_image(size, dtype, 100)
+        self.image = create_image("Image", data)
+        self.operation = get_operation(ImageParam, operation)
+
+    def time_operation(self, size, dtype, operation):
+        """Image filtering operation (default parameters)"""
+        self.operation(self.image)
+
+    def peakmem_operation(self, size, dtype, operation):
+        """Image filtering operation (default parameters, peak memory)"""
+        self.operation(self.image)
+
+
+class ImageRoiMasks:
+    """Image ROI masks (circular ROIs, masks being rebuilt at each call)"""
+
+    params = [[1024, 4096], [10, 100, 500]]
+    param_names = ["size", "number"]
+
+    def setup(self, size, number):
+        """Create image with circular ROIs"""
+        self.image = create_image("Image", np.zeros((size, size), dtype=np.uint16))
+        rng = np.random.default_rng(1)
+        xc, yc = rng.integers(20, size - 20, (2, number))
+        self.image.roi = np.vstack([xc - 16, yc, xc + 16, yc]).T
+
+    def time_maskdata(self, size, number):
+        """Image ROI mask (union of all ROIs)"""
+        self.image.invalidate_maskdata_cache()
+        self.image.maskdata  # pylint: disable=pointless-statement
+
+    def time_roi_views(self, size, number):
+        """Image ROI masked views"""
+        self.image.invalidate_maskdata_cache()
+        for index in self.image.iterate_roi_indexes():
+            self.image.get_data(index)
+
+
+class ImageRoiOperations:
+    """Image computations on ROIs (one ROI per spot, ROIs evaluated in parallel)"""
+
+    params = [[100, 400], ["centroid", "enclosing_circle", "contour_shape"]]
+    param_names = ["number", "operation"]
+
+    def setup(self, number, operation):
+        """Create image with one ROI per spot"""
+        ncols, pitch = 20, 40
+        tile = create_spots_image(pitch, "float32", 1, sigma=3.0, noise=0.0)
+        data = np.tile(tile, (number // ncols, ncols))
+        self.image = create_image("Image", data)
+        x0, y0 = np.meshgrid(np.arange(ncols), np.arange(number // ncols))
+        x0, y0 = x0.ravel() * pitch, y0.ravel() * pitch
+        self.image.roi = np.vstack([x0, y0, x0 + pitch, y0 + pitch]).T
+        self.image.maskdata  # pylint: disable=pointless-statement
+        self.operation = get_operation(ImageParam, operation)
+
+    def time_operation(self, number, operation):
+        """Image ROI computation (default parameters)"""
+        self.operation(self.image)
+
+
+class ImageStackOperations:
+    """Image filtering operations on image stacks (all frames in a single call)"""
+
+    params = [[10, 100], ["gaussian_filter", "moving_average", "fft"]]
+    param_names = ["frames", "operation"]
+
+    def setup(self, frames, operation):
+        """Create image stack"""
+        data = create_spots_image(512, "float32", 100)
+        self.stack = create_image("Stack", np.repeat(data[np.newaxis], frames, axis=0))
+        self.operation = get_operation(ImageParam, operation)
+
+    def time_operation(self, frames, operation):
+        """Image stack filtering operation (default parameters)"""
+        self.operation(self.stack)
+
+
+class SignalOperations:
+    """Signal filtering operations"""
+
+    params = [SIGNAL_SIZES, SIGNAL_OPERATIONS]
+    param_names = ["size", "operation"]
+
+    def setup(self, size, operation):
+        """Create signal"""
+        x, y = create_spots_signal(size, 100)
+        self.signal = create_signal("Signal", x, y)
+        self.operation = get_operation(SignalParam, operation)
+
+    def time_operation(self, size, operation):
+        """Signal filtering operation (default parameters)"""
+        self.operation(self.signal)
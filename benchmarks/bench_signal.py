@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT benchmarks: signal computation functions (`codraft.core.computation.signal`
+and `codraft.core.computation.fit`)
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+# pylint: disable=attribute-defined-outside-init,unused-argument
+
+import functools
+
+import numpy as np
+
+from codraft.core.computation import fit
+from codraft.core.computation.signal import (
+    moving_average,
+    normalize,
+    peak_indexes,
+    peak_indexes_batch,
+)
+
+from .common import DENSITIES, SIGNAL_SIZES, create_spots_signal
+
+
+class PeakIndexes:
+    """1D peak detection"""
+
+    params = [SIGNAL_SIZES, DENSITIES, [1, 10]]
+    param_names = ["size", "density", "min_dist"]
+
+    def setup(self, size, density, min_dist):
+        """Create signal"""
+        _x, self.y = create_spots_signal(size, density)
+
+    def time_peak_indexes(self, size, density, min_dist):
+        """1D peak detection"""
+        peak_indexes(self.y, thres=0.3, min_dist=min_dist)
+
+
+class BatchPeakIndexes:
+    """1D peak detection on a batch of signals (one signal per row)"""
+
+    params = [[10, 100], [1, 10]]
+    param_names = ["count", "min_dist"]
+
+    def setup(self, count, min_dist):
+        """Create signals"""
+        _x, y = create_spots_signal(SIGNAL_SIZES[1], 10)
+        self.ys = np.tile(y, (count, 1))
+
+    def time_peak_indexes(self, count, min_dist):
+        """Batch 1D peak detection"""
+        peak_indexes_batch(self.ys, thres=0.3, min_dist=min_dist)
+
+
+class MovingAverage:
+    """Moving average"""
+
+    params = [SIGNAL_SIZES, [3, 31, 301]]
+    param_names = ["size", "n"]
+
+    def setup(self, size, n):
+        """Create signal"""
+        _x, self.y = create_spots_signal(size, 10)
+
+    def time_moving_average(self, size, n):
+        """Moving average"""
+        moving_average(self.y, n)
+
+
+class BatchMovingAverage:
+    """Moving average of a batch of signals (one signal per row)"""
+
+    params = [[10, 100], [31, 301]]
+    param_names = ["count", "n"]
+
+    def setup(self, count, n):
+        """Create signals"""
+        _x, y = create_spots_signal(SIGNAL_SIZES[1], 10)
+        self.ys = np.tile(y, (count, 1))
+
+    def time_moving_average(self, count, n):
+        """Batch moving average"""
+        moving_average(self.ys, n)
+
+
+class Normalize:
+    """Normalization"""
+
+    params = [SIGNAL_SIZES, ["maximum", "amplitude", "sum", "energy"]]
+    param_names = ["size", "parameter"]
+
+    def setup(self, size, parameter):
+        """Create signal"""
+        _x, self.y = create_spots_signal(size, 10)
+
+    def time_normalize(self, size, parameter):
+        """Normalization"""
+        normalize(self.y, parameter)
+
+
+class BatchFit:
+    """Curve fitting of a batch of pulses (one pulse per row)"""
+
+    params = [[10, 100, 1000], ["GaussianModel", "LorentzianModel", "VoigtModel"]]
+    param_names = ["count", "model"]
+
+    def setup(self, count, model):
+        """Create pulses and initial parameters"""
+        rng = np.random.default_rng(1)
+        self.model = getattr(fit, model)
+        self.x = np.tile(np.linspace(-10.0, 10.0, 500), (count, 1))
+        sigma, x0 = rng.uniform(1.0, 3.0, (2, count, 1))
+        self.y = self.model.func(self.x, 100.0, sigma, x0, 1.0)
+        self.y += rng.normal(0.0, 0.1, self.y.shape)
+        amp = fit.GaussianModel.get_amp_from_amplitude(np.ptp(self.y, axis=1), 2.0)
+        xpeak = self.x[0, self.y.argmax(axis=1)]
+        self.p0 = np.column_stack([amp, np.full(count, 2.0), xpeak, self.y.min(1)])
+
+    def time_fit_batch(self, count, model):
+        """Batch curve fitting"""
+        fit.fit_batch(self.model, self.x, self.y, self.p0)
+
+
+class FitCurves:
+    """Non-interactive curve fitting of a series of similar signals"""
+
+    params = [[10, 100], [False, True]]
+    param_names = ["count", "warm_start"]
+
+    def setup(self, count, warm_start):
+        """Create signals (pulse width drifting slowly from one to the next)"""
+        rng = np.random.default_rng(1)
+        x = np.linspace(-10.0, 10.0, 500)
+        self.curves = []
+        for sigma in np.linspace(1.0, 3.0, count):
+            y = fit.VoigtModel.func(x, 100.0, sigma, 0.5, 1.0)
+            self.curves.append((x, y + rng.normal(0.0, 0.1, x.shape)))
+        self.fitter = functools.partial(fit.fit_model, fit.VoigtModel)
+
+    def time_fit_curves(self, count, warm_start):
+        """Parallel curve fitting"""
+        fit.fit_curves(self.fitter, self.curves, warm_start)
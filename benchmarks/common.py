@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT benchmarks: common parameters and data generation functions
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+#: Image sizes (square images)
+IMAGE_SIZES = [512, 1024, 2048, 4096, 8192]
+
+#: Image data types
+IMAGE_DTYPES = ["uint8", "uint16", "int32", "float32", "float64"]
+
+#: Number of peaks (or contours) per image
+DENSITIES = [10, 100, 1000]
+
+#: Reference data type and density: the full sweep (sizes x data types x
+#: densities) is restricted to sizes x (data types + densities), see `skip_combo`
+REF_DTYPE = "uint16"
+REF_DENSITY = 100
+
+#: Signal sizes
+SIGNAL_SIZES = [10**3, 10**4, 10**5, 10**6]
+
+
+def skip_combo(dtype: str, density: int) -> None:
+    """Skip benchmark parameters combination (raising `NotImplementedError`, as
+    expected by asv) unless data type or density is the reference one"""
+    if dtype != REF_DTYPE and density != REF_DENSITY:
+        raise NotImplementedError
+
+
+def scale_to_dtype(data: np.ndarray, dtype: str) -> np.ndarray:
+    """Scale float data in [0, 1] to data type `dtype` range (75% of integer
+    types range, to avoid overflows) and convert it"""
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer):
+        data = data * (np.iinfo(dtype).max * 0.75)
+    return data.astype(dtype)
+
+
+def create_spots_image(
+    size: int,
+    dtype: str,
+    number: int,
+    sigma: float = None,
+    noise: float = 0.02,
+    seed: int = 1,
+) -> np.ndarray:
+    """Create image of `number` gaussian spots on a noisy background
+
+    :param int size: image size (square image)
+    :param str dtype: data type
+    :param int number: number of spots
+    :param float sigma: spots standard deviation (pixels, default: spots are
+     separated by approximately 10 sigma)
+    :param float noise: background noise level (relative to spots amplitude)
+    :param int seed: random generator seed
+    """
+    rng = np.random.default_rng(seed)
+    if sigma is None:
+        sigma = max(1.0, size / (10 * np.sqrt(number)))
+    data = rng.random((size, size)) * noise
+    radius = int(4 * sigma) + 1
+    grid = np.arange(-radius, radius + 1)
+    margin = radius + 1
+    # Spots are placed on a jittered grid (not overlapping each other)
+    nbside = int(np.ceil(np.sqrt(number)))
+    pitch = (size - 2 * margin) / nbside
+    for index in range(number):
+        row, col = divmod(index, nbside)
+        yc = int(margin + (row + 0.25 + 0.5 * rng.random()) * pitch)
+        xc = int(margin + (col + 0.25 + 0.5 * rng.random()) * pitch)
+        gauss = np.exp(-(grid**2) / (2 * sigma**2))
+        spot = np.outer(gauss, gauss) * (0.5 + 0.5 * rng.random())
+        data[yc - radius : yc + radius + 1, xc - radius : xc + radius + 1] += spot
+    data /= data.max()
+    return scale_to_dtype(data, dtype)
+
+
+def create_spots_signal(size: int, number: int, seed: int = 1) -> tuple:
+    """Create signal (x, y) of `number` gaussian peaks on a noisy background"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 1.0, size)
+    y = rng.random(size) * 0.02
+    sigma = 0.1 / number
+    for xc in (np.arange(number) + 0.25 + 0.5 * rng.random(number)) / number:
+        i0, i1 = np.searchsorted(x, [xc - 5 * sigma, xc + 5 * sigma])
+        y[i0:i1] += np.exp(-((x[i0:i1] - xc) ** 2) / (2 * sigma**2))
+    return x, y
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT batch processing module
+
+Headless batch runner: a processing recipe (JSON file) is applied to a list of
+input files (signals or images), results being written to a CodraFT native
+HDF5 file. Files are processed in a pool of processes, the number of files in
+flight being bounded (so is memory usage).
+
+Recipe operations are the "1 object in --> 1 object out" operations of the
+processing catalogue (see `codraft.core.processing`), and the flat field
+correction. Recipe example (operation parameters are the items of the
+corresponding processing parameters dataset, default values being used for
+missing items)::
+
+    {
+        "operations": [
+            {"operation": "flat_field", "flat": "flat.sif",
+             "param": {"threshold": 0.0}},
+            {"operation": "gaussian_filter", "param": {"sigma": 2.0}},
+            {"operation": "clip", "param": {"value": 4000.0}}
+        ]
+    }
+
+Usage: ``codraft-batch recipe.json input_dir_or_files -o output.h5``
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import argparse
+import functools
+import glob
+import json
+import multiprocessing
+import os
+import os.path as osp
+import sys
+import traceback
+from collections import deque
+from concurrent import futures
+from typing import Callable, Dict, List, Tuple
+
+from codraft.core.computation.flatfield import FlatFieldCorrector
+from codraft.core.computation.parallel import get_max_workers
+from codraft.core.io.objects import H5ObjectWriter, read_images, read_objects
+from codraft.core.model.image import ImageParam
+from codraft.core.model.signal import SignalParam
+from codraft.core.processing import get_operation, get_operation_names
+from codraft.core.processing.base import Operation11
+from codraft.core.processing.image import FlatFieldParam, compute_flat_field
+
+#: Flat field correction operation name (2 images in --> 1 image out: flat field
+#: image is read from the file specified in the "flat" recipe entry)
+FLAT_FIELD = "flat_field"
+
+
+def get_items(dataset) -> Dict[str, object]:
+    """Return dataset items, by name"""
+    # pylint: disable=protected-access
+    return {item._name: item for item in dataset._items}
+
+
+@functools.lru_cache(maxsize=4)
+def read_flat_field(filename: str) -> ImageParam:
+    """Read flat field image (first image of file)"""
+    return read_images(filename)[0]
+
+
+@functools.lru_cache(maxsize=4)
+def get_flat_field_corrector(filename: str) -> FlatFieldCorrector:
+    """Return flat-field correction engine of flat field image file (the
+    normalized reciprocal flat is thus computed once for all processed files)"""
+    return FlatFieldCorrector(read_flat_field(filename).data)
+
+
+def create_param(name: str, paramclass: type, values: dict):
+    """Create processing parameters dataset of operation `name` from
+    `values` (dictionary of dataset item values)"""
+    if paramclass is None:
+        if values:
+            raise ValueError(f"Operation '{name}' has no parameters")
+        return None
+    param = paramclass()
+    names = list(get_items(param))
+    for key, value in values.items():
+        if key not in names:
+            raise ValueError(
+                f"Invalid parameter '{key}' for operation '{name}' "
+                f"(valid parameters: {', '.join(names)})"
+            )
+        setattr(param, key, value)
+    return param
+
+
+def get_batch_operations(name: str) -> Dict[type, Operation11]:
+    """Return 1 object in --> 1 object out operations named `name` (see
+    `codraft.core.processing`), by object class"""
+    operations = {}
+    for objclass in (SignalParam, ImageParam):
+        if name in get_operation_names(objclass):
+            operation = get_operation(objclass, name)
+            if isinstance(operation, Operation11):
+                operations[objclass] = operation
+    return operations
+
+
+def check_recipe(recipe) -> List[dict]:
+    """Check recipe (list of operations, or dictionary with an "operations"
+    entry) and return the list of operations"""
+    if isinstance(recipe, dict):
+        recipe = recipe.get("operations")
+    if not isinstance(recipe, list) or not recipe:
+        raise ValueError("Recipe must contain a non-empty list of operations")
+    for step in recipe:
+        name = step.get("operation")
+        if name == FLAT_FIELD:
+            paramclasses = [FlatFieldParam]
+        else:
+            paramclasses = [op.paramclass for op in get_batch_operations(name).values()]
+        if not paramclasses:
+            names = [FLAT_FIELD] + [
+                name for name in get_operation_names() if get_batch_operations(name)
+            ]
+            raise ValueError(
+                f"Unknown operation '{name}' "
+                f"(valid operations: {', '.join(sorted(names))})"
+            )
+        # Parameters must be valid for at least one object class
+        errors = []
+        for paramclass in paramclasses:
+            try:
+                create_param(name, paramclass, step.get("param", {}))
+            except ValueError as exc:
+                errors.append(exc)
+        if len(errors) == len(paramclasses):
+            raise errors[0]
+        if name == FLAT_FIELD and "flat" not in step:
+            raise ValueError(f"Operation '{FLAT_FIELD}' requires a 'flat' entry")
+    return recipe
+
+
+def load_recipe(filename: str) -> List[dict]:
+    """Load recipe from JSON file and return the list of operations"""
+    with open(filename, "rb") as fdesc:
+        return check_recipe(json.load(fdesc))
+
+
+def apply_operation(obj, step: dict):
+    """Apply recipe operation to object and return the new object"""
+    name = step["operation"]
+    values = step.get("param", {})
+    if name == FLAT_FIELD:
+        if not isinstance(obj, ImageParam):
+            raise ValueError(f"Operation '{name}' is not supported for {obj.title}")
+        param = create_param(name, FlatFieldParam, values)
+        filename = step["flat"]
+        flat, corrector = read_flat_field(filename), get_flat_field_corrector(filename)
+        return compute_flat_field(obj, flat, param, corrector)
+    operation = get_batch_operations(name).get(type(obj))
+    if operation is None:
+        raise ValueError(f"Operation '{name}' is not supported for {obj.title}")
+    return operation(obj, create_param(name, operation.paramclass, values))
+
+
+def process_file(filename: str, recipe: List[dict]) -> List[Tuple[type, Dict]]:
+    """Read objects from file, apply recipe and return processed objects,
+    as (class, item values) tuples (objects are rebuilt by the caller: see
+    `rebuild_object`)"""
+    results = []
+    for obj in read_objects(filename):
+        for step in recipe:
+            obj = apply_operation(obj, step)
+        values = {name: item.get_value(obj) for name, item in get_items(obj).items()}
+        results.append((type(obj), values))
+    return results
+
+
+def rebuild_object(klass: type, values: dict):
+    """Rebuild object from class and item values"""
+    obj = klass()
+    for name, value in values.items():
+        setattr(obj, name, value)
+    return obj
+
+
+def get_input_files(paths: List[str]) -> List[str]:
+    """Return input file list from paths (file names, directories or
+    glob patterns)"""
+    filenames = []
+    for path in paths:
+        if osp.isdir(path):
+            filenames += sorted(
+                osp.join(path, fname)
+                for fname in os.listdir(path)
+                if osp.isfile(osp.join(path, fname))
+            )
+        elif osp.isfile(path):
+            filenames.append(path)
+        else:
+            filenames += sorted(glob.glob(path))
+    return filenames
+
+
+def run_batch(
+    recipe: List[dict],
+    filenames: List[str],
+    output: str,
+    max_workers: int = None,
+    max_inflight: int = None,
+    callback: Callable = None,
+) -> List[str]:
+    """Apply recipe to input files and write results to HDF5 file `output`
+
+    Args:
+        recipe: list of operations (see `check_recipe`)
+        filenames: input file names
+        output: output HDF5 file name
+        max_workers: number of worker processes (default: one per core,
+         0: process files in current process)
+        max_inflight: maximum number of files in flight, i.e. processed or
+         waiting to be written (default: twice the number of workers)
+        callback: function called after each file with the file name and the
+         error message (None if file was processed successfully)
+
+    Returns:
+        List of files which could not be processed
+    """
+    recipe = check_recipe(recipe)
+    if max_workers is None:
+        max_workers = get_max_workers()
+    failed = []
+
+    def handle_result(filename: str, get_result: Callable) -> None:
+        """Write results to output file"""
+        error = None
+        try:
+            for klass, values in get_result():
+                writer.write(rebuild_object(klass, values))
+        except Exception as exc:  # pylint: disable=broad-except
+            error = f"{type(exc).__name__}: {exc}"
+            failed.append(filename)
+        if callback is not None:
+            callback(filename, error)
+
+    with H5ObjectWriter(output) as writer:
+        if max_workers == 0:
+            for filename in filenames:
+                handle_result(
+                    filename, functools.partial(process_file, filename, recipe)
+                )
+            return failed
+        max_inflight = max_inflight or 2 * max_workers
+        with futures.ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            jobs = deque()
+            for filename in filenames:
+                if len(jobs) >= max_inflight:
+                    handle_result(*jobs.popleft())
+                job = pool.submit(process_file, filename, recipe)
+                jobs.append((filename, job.result))
+            while jobs:
+                handle_result(*jobs.popleft())
+    return failed
+
+
+def run():
+    """Parse arguments and run batch processing
+
+    Note: this function is an entry point in `setup.py` and therefore
+    may not be moved without modifying the package setup script."""
+    parser = argparse.ArgumentParser(
+        description="Apply a processing recipe to signal/image files "
+        "and save results to a CodraFT HDF5 file"
+    )
+    parser.add_argument("recipe", help="processing recipe (JSON file)")
+    parser.add_argument(
+        "inputs", nargs="+", help="input files, directories or glob patterns"
+    )
+    parser.add_argument("-o", "--output", required=True, help="output HDF5 file")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes (default: one per core, "
+        "0: no worker process)",
+    )
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=None,
+        help="maximum number of files in flight (default: twice the number of jobs)",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only print error messages"
+    )
+    args = parser.parse_args()
+    recipe = load_recipe(args.recipe)
+    filenames = get_input_files(args.inputs)
+    if not filenames:
+        parser.error("no input file")
+
+    def print_progress(filename: str, error: str) -> None:
+        """Print progress"""
+        if error is not None:
+            print(f"{filename}: {error}", file=sys.stderr)
+        elif not args.quiet:
+            print(filename)
+
+    try:
+        failed = run_batch(
+            recipe,
+            filenames,
+            args.output,
+            max_workers=args.jobs,
+            max_inflight=args.max_inflight,
+            callback=print_progress,
+        )
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        sys.exit(2)
+    if failed:
+        print(f"{len(failed)}/{len(filenames)} file(s) failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
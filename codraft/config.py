@@ -82,6 +82,12 @@ class ProcSection(conf.Section, metaclass=conf.SectionMeta):
     option names in .INI file based on class attribute names)."""
 
     extract_roi_singleobj = conf.Option()
+    use_worker_threads = conf.Option()
+    use_process_pool = conf.Option()
+    apply_in_place = conf.Option()
+    use_result_cache = conf.Option()
+    result_cache_size = conf.Option()
+    fft_workers = conf.Option()
 
 
 class ViewSection(conf.Section, metaclass=conf.SectionMeta):
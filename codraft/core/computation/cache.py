@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Result cache module
+
+Memoization of computation results: results are stored in a thread-safe LRU
+cache (with a memory cap), keyed by function identity, data fingerprint and
+parameters.
+"""
+
+import functools
+import hashlib
+import marshal
+import threading
+import types
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+from guidata.dataset.datatypes import DataSet
+from guidata.jsonio import JSONWriter
+
+#: Simple types used as is in cache keys
+SIMPLE_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def get_data_key(data: np.ndarray) -> tuple:
+    """Return data fingerprint (content hash)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for array in (np.ma.getdata(data), np.ma.getmask(data)):
+        if array is not np.ma.nomask:
+            array = np.ascontiguousarray(array)
+            hasher.update(array.view(np.uint8).reshape(-1))
+    return ("array", data.dtype.str, data.shape, hasher.digest())
+
+
+def get_param_key(param: DataSet) -> tuple:
+    """Return processing parameters key (serialized parameters)"""
+    writer = JSONWriter(None)
+    param.serialize(writer)
+    return ("param", type(param).__qualname__, writer.get_json())
+
+
+def get_func_key(func: Callable) -> Optional[tuple]:
+    """Return function key, or None if function results can't be cached
+    (e.g. function depending on an object state)"""
+    if isinstance(func, functools.partial):
+        keys = [get_object_key(obj) for obj in (func.func,) + func.args]
+        keys += [get_object_key(obj) for obj in func.keywords.items()]
+        return None if None in keys else ("partial",) + tuple(keys)
+    module = getattr(func, "__module__", None)
+    name = getattr(func, "__qualname__", getattr(func, "__name__", None))
+    code = getattr(func, "__code__", None)
+    instance = getattr(func, "__self__", None)
+    if instance is not None and not isinstance(instance, types.ModuleType):
+        # Bound method: results may depend on instance state
+        return None
+    if code is None:
+        # Built-in function, NumPy universal function, ...
+        return None if name is None else ("function", module, name)
+    keys = [get_object_key(obj) for obj in func.__defaults__ or ()]
+    keys += [get_object_key(cell.cell_contents) for cell in func.__closure__ or ()]
+    if None in keys:
+        return None
+    return ("function", module, name, marshal.dumps(code)) + tuple(keys)
+
+
+def get_object_key(obj) -> Optional[tuple]:
+    """Return cache key for object, or None if object can't be part of a key"""
+    key = None
+    if isinstance(obj, SIMPLE_TYPES):
+        key = (type(obj).__name__, obj)
+    elif isinstance(obj, np.ndarray):
+        key = get_data_key(obj)
+    elif isinstance(obj, DataSet):
+        try:
+            key = get_param_key(obj)
+        except Exception:  # pylint: disable=broad-except
+            pass  # Parameters which can't be serialized
+    elif isinstance(obj, (tuple, list)):
+        keys = tuple(get_object_key(item) for item in obj)
+        key = None if None in keys else keys
+    elif callable(obj):
+        key = get_func_key(obj)
+    return key
+
+
+def copy_result(result):
+    """Return a copy of result (array or tuple of arrays)"""
+    if isinstance(result, tuple):
+        return tuple(copy_result(item) for item in result)
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    return result
+
+
+def get_result_nbytes(result) -> int:
+    """Return result size (in bytes)"""
+    if isinstance(result, tuple):
+        return sum(get_result_nbytes(item) for item in result)
+    return getattr(result, "nbytes", 0)
+
+
+class ResultCache:
+    """Thread-safe LRU cache of computation results
+
+    :param int max_nbytes: maximum memory used by cached results (bytes)
+    """
+
+    def __init__(self, max_nbytes: int = 0):
+        self.__lock = threading.Lock()
+        self.__results = OrderedDict()
+        self.__max_nbytes = max_nbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.__results)
+
+    @property
+    def max_nbytes(self) -> int:
+        """Return maximum memory used by cached results (bytes)"""
+        return self.__max_nbytes
+
+    @max_nbytes.setter
+    def max_nbytes(self, value: int) -> None:
+        """Set maximum memory used by cached results (bytes)"""
+        with self.__lock:
+            self.__max_nbytes = value
+            self.__evict()
+
+    def __evict(self) -> None:
+        """Evict least recently used results until memory cap is respected"""
+        while self.__results and self.nbytes > self.__max_nbytes:
+            _key, result = self.__results.popitem(last=False)
+            self.nbytes -= get_result_nbytes(result)
+
+    def get(self, key: tuple):
+        """Return a copy of cached result, or None if not in cache"""
+        with self.__lock:
+            result = self.__results.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__results.move_to_end(key)
+        return copy_result(result)
+
+    def put(self, key: tuple, result) -> None:
+        """Store a copy of result in cache"""
+        nbytes = get_result_nbytes(result)
+        if result is None or nbytes > self.__max_nbytes:
+            return
+        result = copy_result(result)
+        with self.__lock:
+            if key in self.__results:
+                self.nbytes -= get_result_nbytes(self.__results.pop(key))
+            self.__results[key] = result
+            self.nbytes += nbytes
+            self.__evict()
+
+    def clear(self) -> None:
+        """Clear cache (and reset counters)"""
+        with self.__lock:
+            self.__results.clear()
+            self.nbytes = self.hits = self.misses = 0
+
+    def wrap(self, func: Callable, runfunc: Callable = None) -> Callable:
+        """Return function computing `func(*args)` (using `runfunc` instead of
+        `func` if specified, e.g. to run computation in another process) unless
+        the result is already in cache.
+
+        Return `runfunc` (or `func`) if caching is disabled or if results can't
+        be cached (e.g. bound method, or closure over an object instance)."""
+        if runfunc is None:
+            runfunc = func
+        funckey = get_func_key(func)
+        if funckey is None or self.__max_nbytes <= 0:
+            return runfunc
+
+        @functools.wraps(func)
+        def cached_func(*args):
+            """Cached function"""
+            key = get_object_key(args)
+            if key is None:
+                return runfunc(*args)
+            key = (funckey, key)
+            result = self.get(key)
+            if result is None:
+                result = runfunc(*args)
+                self.put(key, result)
+            return result
+
+        return cached_func
+
+
+_RESULT_CACHE = ResultCache()
+
+
+def get_result_cache() -> ResultCache:
+    """Return application-wide result cache"""
+    return _RESULT_CACHE
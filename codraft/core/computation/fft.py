@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / FFT module
+
+FFT functions based on `scipy.fft` (instead of `numpy.fft`):
+  - transforms are multithreaded (see `set_workers`),
+  - single precision data is transformed in single precision (float32 data
+    results in complex64 data, instead of complex128),
+  - real-input transforms return the half spectrum only (non-negative
+    frequencies along last axis), halving output memory usage,
+  - data may be zero-padded to the next fast length (see `get_fast_length`),
+  - transform plans are cached by `scipy.fft` and reused by subsequent
+    transforms of the same shape.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+from typing import Sequence
+
+import numpy as np
+import scipy.fft as spfft
+
+from codraft.core.computation import parallel
+
+_WORKERS = None
+
+
+def get_workers() -> int:
+    """Return number of workers used by FFT functions"""
+    return parallel.get_max_workers() if _WORKERS is None else _WORKERS
+
+
+def set_workers(workers: int = None) -> None:
+    """Set number of workers used by FFT functions (None: one per logical core)"""
+    global _WORKERS  # pylint: disable=global-statement
+    _WORKERS = workers
+
+
+def get_fast_length(size: int, real: bool = False) -> int:
+    """Return the next fast FFT length, greater than or equal to `size`"""
+    return spfft.next_fast_len(size, real=real)
+
+
+def is_real_transform(data: np.ndarray, real: bool) -> bool:
+    """Return True if a real-input FFT applies to `data` (real data only)"""
+    return real and not np.iscomplexobj(data)
+
+
+def fftn(
+    data: np.ndarray,
+    axes: Sequence[int] = (-1,),
+    real: bool = False,
+    fast_length: bool = False,
+) -> np.ndarray:
+    """Compute FFT of `data` along `axes`
+
+    Args:
+        data: input data
+        axes: axes over which to compute the FFT (other axes are batched: e.g.
+         frames of an image stack)
+        real: if True, compute a real-input FFT (ignored for complex data):
+         output is the half spectrum along last axis
+        fast_length: if True, data is zero-padded to the next fast length along
+         each axis of `axes`
+
+    Returns:
+        Spectrum (complex64 for single precision data, complex128 otherwise)
+    """
+    real = is_real_transform(data, real)
+    shape = None
+    if fast_length:
+        shape = [get_fast_length(data.shape[axis], real) for axis in axes]
+    func = spfft.rfftn if real else spfft.fftn
+    return func(data, s=shape, axes=axes, workers=get_workers())
+
+
+def ifftn(
+    data: np.ndarray, axes: Sequence[int] = (-1,), real: bool = False, size: int = 0
+) -> np.ndarray:
+    """Compute inverse FFT of `data` along `axes`
+
+    Args:
+        data: input data (spectrum)
+        axes: axes over which to compute the inverse FFT
+        real: if True, data is a half spectrum (i.e. the result of a real-input
+         FFT) and output is real
+        size: output size along last axis, if `real` is True (default: even size
+         deduced from half spectrum size, i.e. 2 * (n - 1))
+
+    Returns:
+        Data (single precision for single precision spectrum)
+    """
+    if real:
+        shape = None
+        if size:
+            shape = [data.shape[axis] for axis in axes[:-1]] + [size]
+        return spfft.irfftn(data, s=shape, axes=axes, workers=get_workers())
+    return spfft.ifftn(data, axes=axes, workers=get_workers())
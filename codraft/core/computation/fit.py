@@ -5,15 +5,40 @@
 
 """
 CodraFT Computation / Curve fitting module
+
+Fitting models (function, analytic Jacobian, amplitude and FWHM), and batch
+fitting engine (see `fit_batch`): many independent curves are fitted at once
+with a vectorized Levenberg-Marquardt algorithm, each iteration handling all
+curves which have not converged yet with a few array operations.
+
+Non-interactive fitting functions (see `fit_model`, `fit_multigaussian` and
+`fit_polynomial`) are the computing part of curve fitting dialogs (see
+`codraft.widgets.fitdialog`): they return fitted parameters and a convergence
+flag, and may be applied to many curves at once (see `fit_curves`).
 """
 
 # pylint: disable=invalid-name  # Allows short reference names like x, y, ...
 
 import abc
+from concurrent import futures
+from typing import Callable, List, Tuple
 
 import numpy as np
+import scipy.optimize as spo
 import scipy.special as sps
 
+from codraft.core.computation import parallel
+from codraft.core.computation.signal import xpeak
+
+#: Levenberg-Marquardt damping factor: initial value (relative to the diagonal
+#: of the approximated Hessian), multiplied (resp. divided) by
+#: `LM_DAMPING_FACTOR` when a step is rejected (resp. accepted)
+LM_DAMPING0 = 1.0
+LM_DAMPING_FACTOR = 10.0
+
+#: Default tolerances (same as `scipy.optimize.leastsq`)
+FTOL = XTOL = 1.49012e-08
+
 
 # ----- Fitting models ---------------------------------------------------------
 class FitModel(abc.ABC):
@@ -24,6 +49,12 @@ class FitModel(abc.ABC):
     def func(cls, x, amp, sigma, x0, y0):
         """Return fitting function"""
 
+    @classmethod
+    @abc.abstractmethod
+    def jac(cls, x, amp, sigma, x0, y0):
+        """Return fitting function Jacobian: partial derivatives with respect to
+        (amp, sigma, x0, y0), along a new first axis"""
+
     @classmethod
     def get_amp_from_amplitude(
         cls, amplitude, sigma
@@ -60,6 +91,15 @@ class GaussianModel(FitModel):
             + y0
         )
 
+    @classmethod
+    def jac(cls, x, amp, sigma, x0, y0):
+        """Return fitting function Jacobian: partial derivatives with respect to
+        (amp, sigma, x0, y0), along a new first axis"""
+        u = (x - x0) / sigma
+        g = np.exp(-0.5 * u**2) / (sigma * np.sqrt(2 * np.pi))
+        ag = amp * g / sigma
+        return np.stack(np.broadcast_arrays(g, ag * (u**2 - 1), ag * u, 1.0))
+
     @classmethod
     def get_amp_from_amplitude(cls, amplitude, sigma):
         """Return amp from function amplitude and sigma"""
@@ -84,6 +124,16 @@ class LorentzianModel(FitModel):
         """Return fitting function"""
         return (amp / (sigma * np.pi)) / (1 + ((x - x0) / sigma) ** 2) + y0
 
+    @classmethod
+    def jac(cls, x, amp, sigma, x0, y0):
+        """Return fitting function Jacobian: partial derivatives with respect to
+        (amp, sigma, x0, y0), along a new first axis"""
+        u = (x - x0) / sigma
+        v = 1 + u**2
+        lor = 1 / (sigma * np.pi * v)
+        al = amp * lor / (sigma * v)
+        return np.stack(np.broadcast_arrays(lor, al * (u**2 - 1), al * 2 * u, 1.0))
+
     @classmethod
     def get_amp_from_amplitude(cls, amplitude, sigma):
         """Return amp from function amplitude and sigma"""
@@ -110,9 +160,378 @@ class VoigtModel(FitModel):
         z = (x - x0 + 1j * sigma) / (sigma * np.sqrt(2.0))
         return y0 + amp * sps.wofz(z).real / (sigma * np.sqrt(2 * np.pi))
 
+    @classmethod
+    def jac(cls, x, amp, sigma, x0, y0):
+        """Return fitting function Jacobian: partial derivatives with respect to
+        (amp, sigma, x0, y0), along a new first axis"""
+        # pylint: disable=no-member
+        u = (x - x0) / sigma
+        z = (u + 1j) / np.sqrt(2.0)
+        w = sps.wofz(z)
+        dw = (-2 * z * w + 2j / np.sqrt(np.pi)).real  # Faddeeva function derivative
+        k = 1 / (sigma * np.sqrt(2 * np.pi))
+        v = k * w.real
+        adw = amp * k * dw / (sigma * np.sqrt(2.0))
+        dsigma = -amp * v / sigma - adw * u
+        return np.stack(np.broadcast_arrays(v, dsigma, -adw, 1.0))
+
     @classmethod
     def fwhm(cls, amp, sigma):
         """Return function FWHM"""
         wg = GaussianModel.fwhm(amp, sigma)
         wl = LorentzianModel.fwhm(amp, sigma)
         return 0.5346 * wl + np.sqrt(0.2166 * wl**2 + wg**2)
+
+
+# ----- Batch fitting engine ---------------------------------------------------
+def stack_curves(curves: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray]:
+    """Stack curves of different sizes into 2-D arrays (one curve per row), for
+    batch fitting (see `fit_batch`)
+
+    Args:
+        curves: list of (x, y) tuples
+
+    Returns:
+        Tuple (x, y, weights): shorter curves are padded with their last X value
+        and with zero Y values, padding values having a zero weight
+    """
+    size = max(len(x) for x, _y in curves)
+    xs = np.zeros((len(curves), size))
+    ys = np.zeros((len(curves), size))
+    weights = np.zeros((len(curves), size))
+    for index, (x, y) in enumerate(curves):
+        xs[index, : len(x)], xs[index, len(x) :] = x, x[-1]
+        ys[index, : len(y)] = y
+        weights[index, : len(y)] = 1.0
+    return xs, ys, weights
+
+
+def _batch_cost(
+    model: FitModel,
+    x: np.ndarray,
+    y: np.ndarray,
+    w: np.ndarray,
+    params: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return weighted sum of squared residuals of curves (one per row, `w`:
+    weights, or None), and residuals (see `fit_batch`)"""
+    res = y - model.func(x, *params.T[..., np.newaxis])
+    if w is None:
+        return np.einsum("km,km->k", res, res), res
+    return np.einsum("km,km,km->k", w, res, res), res
+
+
+def _normal_equations(
+    jac: np.ndarray, wjac: np.ndarray, res: np.ndarray, out: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return normal equations terms (J^T.W.J, J^T.W.res) of curves, from
+    Jacobian `jac` (derivatives along first axis, curves along second axis),
+    weighted Jacobian `wjac` and residuals `res` (`out`: J^T.W.J output array)"""
+    for i in range(4):
+        for j in range(i, 4):
+            out[:, i, j] = out[:, j, i] = np.einsum("km,km->k", wjac[i], jac[j])
+    return out, np.einsum("ikm,km->ki", wjac, res)
+
+
+def _solve_damped(jtj: np.ndarray, jtr: np.ndarray, lam: np.ndarray) -> np.ndarray:
+    """Return steps solving damped normal equations (J^T.W.J + diag(lam)) step =
+    J^T.W.res of curves (`jtj` is modified in place)"""
+    jtj[:, range(4), range(4)] += lam
+    try:
+        return np.linalg.solve(jtj, jtr[..., np.newaxis])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum("kij,kj->ki", np.linalg.pinv(jtj), jtr)
+
+
+def _check_step(
+    cost: np.ndarray,
+    newcost: np.ndarray,
+    pars: np.ndarray,
+    step: np.ndarray,
+    *,
+    ftol: float,
+    xtol: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (accepted, done, finite) flags of curves Levenberg-Marquardt steps
+    (see `fit_batch`): step decreases the sum of squares, fit has converged,
+    step is finite"""
+    accepted = np.isfinite(newcost) & (newcost <= cost)
+    finite = np.all(np.isfinite(step), axis=1)
+    done = accepted & (cost - newcost <= ftol * cost)
+    done |= np.all(np.abs(step) <= xtol * (np.abs(pars) + xtol), axis=1)
+    return accepted, done & finite, finite
+
+
+def _lm_step(
+    model: FitModel,
+    x: np.ndarray,
+    w: np.ndarray,
+    pars: np.ndarray,
+    res: np.ndarray,
+    damping: np.ndarray,
+    scale: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return Levenberg-Marquardt steps of curves (one per row, `w`: weights, or
+    None, `res`: residuals, `scale`: Marquardt scaling, i.e. largest Hessian
+    diagonal so far), and updated Marquardt scaling"""
+    jac = model.jac(x, *pars.T[..., np.newaxis])
+    # Normal equations: (J^T.W.J + damping.D) step = J^T.W.res
+    jtj, jtr = _normal_equations(
+        jac, jac if w is None else jac * w, res, np.empty((len(x), 4, 4))
+    )
+    scale = np.maximum(scale, jtj[:, range(4), range(4)])
+    lam = damping[:, np.newaxis] * np.where(scale > 0, scale, 1.0)
+    return _solve_damped(jtj, jtr, lam), scale
+
+
+class _BatchFitState:
+    """Levenberg-Marquardt state of curves fitted at once (see `fit_batch`)
+
+    :param numpy.ndarray params: initial parameters (one row per curve)
+    :param numpy.ndarray cost: initial sums of squares
+    :param numpy.ndarray residuals: initial residuals
+    """
+
+    def __init__(self, params: np.ndarray, cost: np.ndarray, residuals: np.ndarray):
+        self.params = params
+        self.cost = cost
+        self.residuals = residuals
+        self.damping = np.full(len(params), LM_DAMPING0)
+        self.scale = np.zeros_like(params)  # Marquardt scaling
+        self.converged = np.zeros(len(params), dtype=bool)
+        #: Indexes of curves which have not converged yet
+        self.active = np.flatnonzero(np.isfinite(cost))
+
+    def update(
+        self,
+        step: np.ndarray,
+        newcost: np.ndarray,
+        newres: np.ndarray,
+        ftol: float,
+        xtol: float,
+    ) -> None:
+        """Update state of active curves after a Levenberg-Marquardt step
+        (`newcost`, `newres`: sums of squares and residuals after step)"""
+        act = self.active
+        pars = self.params[act]
+        accepted, done, finite = _check_step(
+            self.cost[act], newcost, pars, step, ftol=ftol, xtol=xtol
+        )
+        self.params[act[accepted]] = pars[accepted] + step[accepted]
+        self.cost[act[accepted]] = newcost[accepted]
+        self.residuals[act[accepted]] = newres[accepted]
+        self.damping[act] *= np.where(
+            accepted, 1 / LM_DAMPING_FACTOR, LM_DAMPING_FACTOR
+        )
+        self.converged[act[done]] = True
+        self.active = act[~done & finite]
+
+
+def fit_batch(
+    model: FitModel,
+    x: np.ndarray,
+    y: np.ndarray,
+    p0: np.ndarray,
+    weights: np.ndarray = None,
+    maxiter: int = 200,
+    ftol: float = FTOL,
+    xtol: float = XTOL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit `model` to many independent curves at once, minimizing the weighted
+    sum of squared residuals of each curve with a vectorized Levenberg-Marquardt
+    algorithm (using model analytic Jacobian, see `FitModel.jac`)
+
+    Args:
+        model: fitting model class (e.g. `GaussianModel`)
+        x: X data (2-D array: one curve per row, see `stack_curves`)
+        y: Y data (same shape as `x`)
+        p0: initial parameters (amp, sigma, x0, y0): one row per curve
+        weights: residuals weights (same shape as `x`, default: 1)
+        maxiter: maximum number of iterations
+        ftol: relative tolerance on the sum of squares
+        xtol: relative tolerance on parameters
+
+    Returns:
+        Tuple (params, converged): fitted parameters (one row per curve), and
+        convergence flags (False if `maxiter` was reached or if the sum of
+        squares could not be evaluated)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+    params = np.array(p0, dtype=float).reshape(len(y), 4)
+    state = _BatchFitState(params, *_batch_cost(model, x, y, weights, params))
+    with np.errstate(all="ignore"):
+        for _iteration in range(maxiter):
+            act = state.active
+            if act.size == 0:
+                break
+            xact, wact = x[act], None if weights is None else weights[act]
+            pars = state.params[act]
+            step, state.scale[act] = _lm_step(
+                model,
+                xact,
+                wact,
+                pars,
+                state.residuals[act],
+                state.damping[act],
+                state.scale[act],
+            )
+            newcost, newres = _batch_cost(model, xact, y[act], wact, pars + step)
+            state.update(step, newcost, newres, ftol, xtol)
+    return state.params, state.converged
+
+
+# ----- Non-interactive fitting functions --------------------------------------
+def get_initial_params(model: FitModel, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Return initial parameters (amp, sigma, x0, y0) for fitting `model` to
+    curve (`x`, `y`): peak position and amplitude, width being 1/10 of X range"""
+    dy = np.max(y) - np.min(y)
+    sigma = (np.max(x) - np.min(x)) * 0.1
+    amp = model.get_amp_from_amplitude(dy, sigma)
+    return np.array([amp, sigma, xpeak(x, y), np.min(y)])
+
+
+def multigaussian(x, *values, a_x0):
+    """Return a 1-dimensional multi-Gaussian function: `values` are the
+    amplitude and standard deviation of each Gaussian, followed by baseline
+    (`a_x0`: Gaussian centers)"""
+    a_amp = values[0::2]
+    a_sigma = values[1::2]
+    y0 = values[-1]
+    y = np.zeros_like(x) + y0
+    for amp, sigma, x0 in zip(a_amp, a_sigma, a_x0):
+        y += amp * np.exp(-0.5 * ((x - x0) / sigma) ** 2)
+    return y
+
+
+def multigaussian_jac(x, *values, a_x0):
+    """Return multi-Gaussian function Jacobian (see `multigaussian`): partial
+    derivatives with respect to `values`, along a new first axis"""
+    jac = np.empty((len(values),) + np.shape(x))
+    for index, (amp, sigma, x0) in enumerate(zip(values[0::2], values[1::2], a_x0)):
+        u = (x - x0) / sigma
+        jac[2 * index] = np.exp(-0.5 * u**2)
+        jac[2 * index + 1] = amp * jac[2 * index] * u**2 / sigma
+    jac[-1] = 1.0
+    return jac
+
+
+def get_multigaussian_initial_params(
+    x: np.ndarray, y: np.ndarray, peak_indexes: np.ndarray
+) -> np.ndarray:
+    """Return initial parameters for fitting multi-Gaussian function to curve
+    (`x`, `y`), peaks being located at `peak_indexes` (see `multigaussian`)"""
+    values = []
+    for i0 in peak_indexes:
+        iprev, inext = max(i0 - 1, 0), min(i0 + 1, len(x) - 1)
+        values += [y[i0], (x[inext] - x[iprev]) * 0.8]
+    return np.array(values + [np.min(y)])
+
+
+def fit_curve(
+    func: Callable, jac: Callable, x: np.ndarray, y: np.ndarray, p0: np.ndarray
+) -> Tuple[np.ndarray, bool]:
+    """Fit function `func(x, *values)` to curve (`x`, `y`) with
+    `scipy.optimize.leastsq`, using analytic Jacobian `jac(x, *values)` (partial
+    derivatives along first axis), starting from `p0`.
+    Return tuple (values, converged)"""
+
+    def residuals(values):
+        """Return fit residuals"""
+        return y - func(x, *values)
+
+    def residuals_jac(values):
+        """Return fit residuals Jacobian"""
+        return -jac(x, *values)
+
+    values, ier = spo.leastsq(residuals, p0, Dfun=residuals_jac, col_deriv=True)
+    return values, ier in (1, 2, 3, 4)
+
+
+def fit_model(
+    model: FitModel, x: np.ndarray, y: np.ndarray, p0: np.ndarray = None
+) -> Tuple[np.ndarray, bool]:
+    """Fit `model` to curve (`x`, `y`), starting from parameters `p0` (default:
+    see `get_initial_params`). Return tuple (values, converged)"""
+    if p0 is None:
+        p0 = get_initial_params(model, x, y)
+    return fit_curve(model.func, model.jac, x, y, p0)
+
+
+def fit_multigaussian(
+    x: np.ndarray, y: np.ndarray, peak_indexes: np.ndarray, p0: np.ndarray = None
+) -> Tuple[np.ndarray, bool]:
+    """Fit multi-Gaussian function to curve (`x`, `y`), peaks being located at
+    `peak_indexes`, starting from parameters `p0` (default: see
+    `get_multigaussian_initial_params`). Return tuple (values, converged)"""
+    if p0 is None:
+        p0 = get_multigaussian_initial_params(x, y, peak_indexes)
+    a_x0 = x[peak_indexes]
+    return fit_curve(
+        lambda xi, *values: multigaussian(xi, *values, a_x0=a_x0),
+        lambda xi, *values: multigaussian_jac(xi, *values, a_x0=a_x0),
+        x,
+        y,
+        p0,
+    )
+
+
+def fit_polynomial(
+    x: np.ndarray, y: np.ndarray, degree: int, p0: np.ndarray = None
+) -> Tuple[np.ndarray, bool]:
+    """Fit polynomial of degree `degree` to curve (`x`, `y`) (linear least
+    squares: `p0` is ignored). Return tuple (values, converged)"""
+    # pylint: disable=unused-argument
+    return np.polyfit(x, y, degree), True
+
+
+def fit_curves_chunk(
+    fitter: Callable, curves: List[tuple], warm_start: bool
+) -> List[Tuple[np.ndarray, bool]]:
+    """Fit curves sequentially (see `fit_curves`)"""
+    results = []
+    for curve in curves:
+        result = None
+        if warm_start and results and results[-1][1]:
+            result = fitter(*curve, p0=results[-1][0])
+        if result is None or not result[1]:
+            result = fitter(*curve)
+        results.append(result)
+    return results
+
+
+def fit_curves(
+    fitter: Callable,
+    curves: List[tuple],
+    warm_start: bool = True,
+    pool: futures.Executor = None,
+) -> List[Tuple[np.ndarray, bool]]:
+    """Fit many curves with `fitter` (e.g. `fit_model`, with model bound using
+    `functools.partial`), in parallel
+
+    Args:
+        fitter: fitting function `fitter(*curve, p0=None)` returning tuple
+         (values, converged)
+        curves: fitter arguments for each curve, e.g. (x, y)
+        warm_start: if True, each fit starts from the solution of the previous
+         curve (if it converged, a new fit starting from default parameters
+         being run otherwise): e.g. for a series of similar signals
+        pool: thread pool or process pool engine (see `parallel`) on which
+         contiguous chunks of curves are fitted, one chunk per worker (default:
+         application-wide "fits" thread pool)
+
+    Returns:
+        List of (values, converged) tuples, in `curves` order
+    """
+    if pool is None:
+        pool = parallel.get_thread_pool("fits")
+    nchunks = min(len(curves), parallel.get_max_workers())
+    bounds = np.linspace(0, len(curves), nchunks + 1).astype(int)
+    argslist = [
+        (fitter, curves[start:stop], warm_start)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    chunks = parallel.map_jobs(fit_curves_chunk, argslist, pool)
+    return [result for chunk in chunks for result in chunk]
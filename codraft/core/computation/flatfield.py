@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Flat-field module
+
+Flat-field correction engine: the normalized reciprocal flat (gain) is computed
+once per flat image, then any number of raw images (or image stack frames) are
+corrected with a single multiplication per pixel, into a preallocated output
+array (or in place). Data is processed tile by tile (see `tiling.TILE_NBYTES`),
+which bounds temporary arrays, tiles being processed in parallel.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+from codraft.core.computation import parallel, tiling
+
+
+class FlatFieldCorrector:
+    """Flat-field correction engine
+
+    :param numpy.ndarray flatdata: flat-field image
+    """
+
+    def __init__(self, flatdata: np.ndarray):
+        gain = np.array(flatdata, dtype=np.float64)
+        gain[gain == 0] = 1.0
+        np.divide(np.mean(flatdata), gain, out=gain)
+        gain.flags.writeable = False
+        self.gain = gain
+
+    @property
+    def shape(self):
+        """Return flat-field image shape"""
+        return self.gain.shape
+
+    @staticmethod
+    def correct_tile(
+        raw: np.ndarray, out: np.ndarray, gain: np.ndarray, threshold: float
+    ) -> None:
+        """Correct raw data tile `raw` into output tile `out` (see `correct`)"""
+        mask = raw > threshold
+        if not np.may_share_memory(raw, out):
+            out[...] = raw
+        np.copyto(out, raw * gain, casting="unsafe", where=mask)
+
+    def correct(
+        self, rawdata: np.ndarray, threshold: float, out: np.ndarray = None
+    ) -> np.ndarray:
+        """Return flat-field corrected data
+
+        Args:
+            rawdata: raw data (image, or image stack whose frames are corrected
+             with the same flat-field image)
+            threshold: only raw data values above threshold are corrected, other
+             values are left unchanged
+            out: output array (same shape and data type as `rawdata`), which may
+             be `rawdata` itself to correct data in place (default: new array)
+
+        Returns:
+            Corrected data (cast to raw data type)
+        """
+        if rawdata.shape[-2:] != self.shape:
+            raise ValueError(
+                f"Raw data shape {rawdata.shape} does not match "
+                f"flat-field image shape {self.shape}"
+            )
+        if out is None:
+            out = np.empty(rawdata.shape, dtype=rawdata.dtype)
+        rows, cols = self.shape
+        tile = max(tiling.TILE_NBYTES // (cols * self.gain.itemsize), 1)
+        argslist = [
+            (rawdata[index][dest], out[index][dest], self.gain[dest], threshold)
+            for index in np.ndindex(rawdata.shape[:-2])
+            for _block, _inner, dest in tiling.get_tiles(rows, tile, 0)
+        ]
+        pool = parallel.get_thread_pool("tiles")
+        jobs = parallel.submit_jobs(self.correct_tile, argslist, pool)
+        try:
+            for job in jobs:
+                job.result()
+        finally:
+            parallel.cancel_jobs(jobs)
+        return out
@@ -9,6 +9,9 @@ CodraFT Computation / Image module
 
 # pylint: disable=invalid-name  # Allows short reference names like x, y, ...
 
+import functools
+from typing import Tuple
+
 import numpy as np
 import scipy.ndimage as spi
 import scipy.ndimage.filters as spf
@@ -16,6 +19,8 @@ import scipy.spatial as spt
 from numpy import ma
 from skimage import measure
 
+from codraft.core.computation.flatfield import FlatFieldCorrector
+
 
 def scale_data_to_min_max(data: np.ndarray, zmin, zmax):
     """Scale array `data` to fit [zmin, zmax] dynamic range"""
@@ -29,14 +34,43 @@ def scale_data_to_min_max(data: np.ndarray, zmin, zmax):
 
 
 def flatfield(rawdata: np.ndarray, flatdata: np.ndarray, threshold: float = None):
-    """Compute flat-field correction"""
-    dtemp = np.array(rawdata, dtype=np.float64, copy=True) * flatdata.mean()
-    dunif = np.array(flatdata, dtype=np.float64, copy=True)
-    dunif[dunif == 0] = 1.0
-    dcorr_all = np.array(dtemp / dunif, dtype=rawdata.dtype)
-    dcorr = np.array(rawdata, copy=True)
-    dcorr[rawdata > threshold] = dcorr_all[rawdata > threshold]
-    return dcorr
+    """Compute flat-field correction (see `flatfield.FlatFieldCorrector`, which
+    should be used to correct several raw images with the same flat-field)"""
+    return FlatFieldCorrector(flatdata).correct(rawdata, threshold)
+
+
+@functools.lru_cache(maxsize=32)
+def get_fourier_vectors(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return cosine and sine vectors of Fourier centroid algorithm along an
+    axis of `size` pixels (cached: read-only arrays)"""
+    angles = (np.arange(size) - 1) * 2 * np.pi / (size - 1)
+    cos, sin = np.cos(angles), np.sin(angles)
+    cos.flags.writeable = sin.flags.writeable = False
+    return cos, sin
+
+
+def get_fourier_sums(data: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Return sums of `data` weighted by cosine and sine vectors along rows and
+    columns (see `get_centroid_fourier`), for each 2D frame of `data`: the
+    sums separate into row and column projections of data"""
+    rows, cols = data.shape[-2:]
+    cos_a, sin_a = get_fourier_vectors(rows)
+    cos_b, sin_b = get_fourier_vectors(cols)
+    row_proj = data.sum(axis=-1, dtype=np.float64)
+    col_proj = data.sum(axis=-2, dtype=np.float64)
+    return (
+        (row_proj * cos_a).sum(axis=-1),
+        (row_proj * sin_a).sum(axis=-1),
+        (col_proj * cos_b).sum(axis=-1),
+        (col_proj * sin_b).sum(axis=-1),
+    )
+
+
+def get_fourier_position(cos_sum, sin_sum, size: int):
+    """Return position from cosine and sine weighted sums along an axis of
+    `size` pixels (see `get_centroid_fourier`)"""
+    phi = np.where(cos_sum > 0, np.where(sin_sum > 0, 0, 2 * np.pi), np.pi)
+    return (np.arctan(sin_sum / cos_sum) + phi) * (size - 1) / (2 * np.pi) + 1
 
 
 def get_centroid_fourier(data: np.ndarray):
@@ -47,27 +81,13 @@ def get_centroid_fourier(data: np.ndarray):
     if rows == 1 or cols == 1:
         return 0, 0
 
-    i = np.arange(0, rows).reshape(1, rows)
-    sin_a = np.sin((i - 1) * 2 * np.pi / (rows - 1)).T
-    cos_a = np.cos((i - 1) * 2 * np.pi / (rows - 1)).T
-
-    j = np.arange(0, cols).reshape(cols, 1)
-    sin_b = np.sin((j - 1) * 2 * np.pi / (cols - 1)).T
-    cos_b = np.cos((j - 1) * 2 * np.pi / (cols - 1)).T
-
-    a = (cos_a * data).sum()
-    b = (sin_a * data).sum()
-    c = (data * cos_b).sum()
-    d = (data * sin_b).sum()
-
-    rphi = (0 if b > 0 else 2 * np.pi) if a > 0 else np.pi
-    cphi = (0 if d > 0 else 2 * np.pi) if c > 0 else np.pi
+    a, b, c, d = get_fourier_sums(data)
 
     if a * c == 0.0:
         return 0, 0
 
-    row = (np.arctan(b / a) + rphi) * (rows - 1) / (2 * np.pi) + 1
-    col = (np.arctan(d / c) + cphi) * (cols - 1) / (2 * np.pi) + 1
+    row = get_fourier_position(a, b, rows)
+    col = get_fourier_position(c, d, cols)
     try:
         row = int(row)
     except ma.MaskError:
@@ -79,6 +99,30 @@ def get_centroid_fourier(data: np.ndarray):
     return row, col
 
 
+def get_centroid_fourier_batch(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return centroids of each 2D frame of `data` (e.g. image stack) using
+    Fourier algorithm (see `get_centroid_fourier`): arrays of rows and columns
+    (0 for frames whose centroid is undefined)"""
+    rows, cols = data.shape[-2:]
+    if rows == 1 or cols == 1:
+        return (np.zeros(data.shape[:-2], dtype=int),) * 2
+    a, b, c, d = get_fourier_sums(data)
+    defined = a * c != 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        row = get_fourier_position(a, b, rows)
+        col = get_fourier_position(c, d, cols)
+    return (
+        np.where(defined, row, 0).astype(int),
+        np.where(defined, col, 0).astype(int),
+    )
+
+
+def get_centroid_coords(data: np.ndarray) -> np.ndarray:
+    """Return centroid coordinates (as an array [[x, y]])"""
+    y, x = get_centroid_fourier(data)
+    return np.array([(x, y)])
+
+
 def get_enclosing_circle(data: np.ndarray, level: float = 0.5):
     """Return (x, y, radius) for the circle contour enclosing image
     values above threshold relative level (.5 means FWHM)
@@ -103,9 +147,19 @@ def get_enclosing_circle(data: np.ndarray, level: float = 0.5):
     return result
 
 
-def distance_matrix(coords: list) -> np.ndarray:
-    """Return distance matrix from coords"""
-    return np.triu(spt.distance.cdist(coords, coords, "euclidean"))
+def get_enclosing_circle_coords(data: np.ndarray) -> np.ndarray:
+    """Return diameter coords for the circle contour enclosing image
+    values above threshold (FWHM)"""
+    x, y, r = get_enclosing_circle(data)
+    return np.array([[x - r, y, x + r, y]])
+
+
+def get_nearest_neighbor_distances(coords: np.ndarray) -> np.ndarray:
+    """Return distance from each point of `coords` to its nearest (distinct)
+    neighbor (infinite if there is none)"""
+    tree = spt.cKDTree(coords)
+    dist, _indexes = tree.query(coords, k=2)
+    return dist[:, 1]
 
 
 def get_2d_peaks_coords(
@@ -134,12 +188,15 @@ def get_2d_peaks_coords(
         x_center = int(0.5 * (dx.start + dx.stop - 1))
         y_center = int(0.5 * (dy.start + dy.stop - 1))
         coords.append((x_center, y_center))
+    coords = np.array(coords)
     if len(coords) > 1:
-        # Eventually removing duplicates
-        dist = distance_matrix(coords)
-        for index in reversed(np.unique(np.where((dist < size) & (dist > 0))[1])):
-            coords.pop(index)
-    return np.array(coords)
+        # Eventually removing duplicates: of two peaks closer than `size`, the
+        # last one is removed (pairs are found with a spatial index)
+        pairs = spt.cKDTree(coords).query_pairs(size, output_type="ndarray")
+        dist = np.linalg.norm(coords[pairs[:, 0]] - coords[pairs[:, 1]], axis=1)
+        duplicates = np.maximum(pairs[:, 0], pairs[:, 1])[(dist < size) & (dist > 0)]
+        coords = np.delete(coords, np.unique(duplicates), axis=0)
+    return coords
 
 
 def get_contour_shapes(data: np.ndarray, shape: str = "ellipse") -> np.ndarray:
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Median module
+
+Moving median engine: same results as `scipy.signal.medfilt` (data being
+zero-padded), the algorithm being chosen from data type and kernel size:
+  - 8/16-bit unsigned integer images: histogram-based median (sliding
+    histogram, see `skimage.filters.rank.median`), whose cost per pixel is
+    proportional to kernel size and to the number of distinct values (values
+    are first replaced by their rank among distinct values), instead of kernel
+    area: this is used when the number of distinct values is small enough
+    compared to kernel area (see `HISTOGRAM_BINS_PER_ELEMENT`),
+  - signals: `scipy.ndimage.median_filter` (sliding window median),
+  - other images: tiled `scipy.signal.medfilt` (see `tiling.medfilt`).
+
+Images are processed in parallel on tiles (see `tiling.apply_tiled`), and image
+stacks frame by frame.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import warnings
+from typing import Optional
+
+import numpy as np
+import scipy.ndimage as spi
+from skimage.filters import rank
+
+from codraft.core.computation import tiling
+
+#: Data types supported by histogram-based median
+HISTOGRAM_DTYPES = (np.uint8, np.uint16)
+
+#: Histogram-based median is used if the number of distinct values is lower
+#: than kernel area multiplied by this factor (measured crossover point)
+HISTOGRAM_BINS_PER_ELEMENT = 16
+
+# Histogram size is bounded by `HISTOGRAM_BINS_PER_ELEMENT` (see above).
+# This filter only applies to skimage rank filters: it is installed once instead
+# of around each call, `warnings.catch_warnings` not being thread-safe (tiles are
+# processed in parallel)
+warnings.filterwarnings(
+    "ignore",
+    message="Bad rank filter performance",
+    category=UserWarning,
+    module=r"skimage\.filters\.rank",
+)
+
+
+def get_distinct_values(data: np.ndarray) -> np.ndarray:
+    """Return sorted distinct values of 8/16-bit unsigned integer `data`,
+    including 0 (padding value)"""
+    present = np.bincount(data.ravel(), minlength=1) > 0
+    present[0] = True
+    return np.flatnonzero(present)
+
+
+def histogram_median(data: np.ndarray, size: int, values: np.ndarray = None):
+    """Histogram-based moving median of 2D 8/16-bit unsigned integer `data`
+    (`size` x `size` kernel, `values`: distinct values, see
+    `get_distinct_values`)"""
+    if values is None:
+        values = get_distinct_values(data)
+    lut = np.zeros(values[-1] + 1, dtype=np.uint16)
+    lut[values] = np.arange(values.size)
+    halo = size // 2
+    ranks = np.pad(lut[data], halo)
+    footprint = np.ones((size, size), dtype=bool)
+    result = tiling.apply_tiled(
+        lambda block: rank.median(block, footprint=footprint), ranks, halo=halo
+    )
+    rows, cols = data.shape
+    result = result[halo : halo + rows, halo : halo + cols]
+    return values[result].astype(data.dtype)
+
+
+def get_histogram_values(data: np.ndarray, size: int) -> Optional[np.ndarray]:
+    """Return distinct values of 2D `data` if histogram-based median is the
+    fastest algorithm for `data` and kernel `size`, None otherwise"""
+    if data.dtype not in HISTOGRAM_DTYPES or size < 3:
+        return None
+    values = get_distinct_values(data)
+    if values.size > HISTOGRAM_BINS_PER_ELEMENT * size**2:
+        return None
+    return values
+
+
+def median_filter(data: np.ndarray, size: int) -> np.ndarray:
+    """Compute moving median of signal or image (or image stack) `data`,
+    with a kernel of `size` elements along each axis (frames of image stacks
+    being filtered independently)"""
+    if data.ndim == 1:
+        return spi.median_filter(data, size, mode="constant")
+    if data.ndim > 2 and data.dtype in HISTOGRAM_DTYPES:
+        out = np.empty(data.shape, dtype=data.dtype)
+        for index in np.ndindex(data.shape[:-2]):
+            out[index] = median_filter(data[index], size)
+        return out
+    if data.ndim == 2:
+        values = get_histogram_values(data, size)
+        if values is not None:
+            return histogram_median(data, size, values)
+    kernel_size = (1,) * (data.ndim - 2) + (size, size)
+    return tiling.medfilt(data, kernel_size=kernel_size)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Parallel execution module
+
+This module provides the worker pools used to run computations outside of the
+GUI thread. It has no dependency on Qt: the GUI layer is responsible for
+polling the returned futures and for handing results back to the panels.
+
+Two engines are available:
+  - an application-wide thread pool (see `get_thread_pool`), well suited for
+    functions releasing the GIL (most NumPy/SciPy functions),
+  - a process pool (see `ProcessPoolEngine`) for CPU-bound functions holding
+    the GIL (Python loops, scikit-image model fitting, ...): NumPy arrays are
+    handed to worker processes through shared memory instead of being pickled.
+"""
+
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent import futures
+from typing import Callable, Iterable, List
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python 3.7
+    shared_memory = None
+
+_THREAD_POOLS = {}
+_THREAD_POOL_LOCK = threading.Lock()
+_PROCESS_ENGINE = None
+_PROCESS_ENGINE_LOCK = threading.Lock()
+
+
+def get_max_workers() -> int:
+    """Return the default number of workers (one per logical core)"""
+    return max(1, os.cpu_count() or 1)
+
+
+def get_thread_pool(name: str = "jobs") -> futures.ThreadPoolExecutor:
+    """Return the application-wide thread pool `name` (created on first call)
+
+    Jobs waiting for other jobs must not share the same pool (this could lead
+    to a deadlock when all workers are waiting): e.g. processing jobs run in
+    the "jobs" pool, while the tiles they are split into run in the "tiles"
+    pool."""
+    with _THREAD_POOL_LOCK:
+        pool = _THREAD_POOLS.get(name)
+        if pool is None:
+            pool = _THREAD_POOLS[name] = futures.ThreadPoolExecutor(
+                max_workers=get_max_workers(), thread_name_prefix=f"codraft_{name}"
+            )
+        return pool
+
+
+def shutdown_thread_pools() -> None:
+    """Shut down all application-wide thread pools (if they were created)"""
+    with _THREAD_POOL_LOCK:
+        while _THREAD_POOLS:
+            _THREAD_POOLS.popitem()[1].shutdown(wait=True)
+
+
+def submit_jobs(
+    func: Callable, argslist: Iterable[tuple], pool: futures.Executor = None
+) -> List[futures.Future]:
+    """Submit `func(*args)` for each `args` of `argslist` to `pool`
+    (default: application-wide thread pool) and return the futures list,
+    in submission order"""
+    if pool is None:
+        pool = get_thread_pool()
+    return [pool.submit(func, *args) for args in argslist]
+
+
+def cancel_jobs(jobs: Iterable[futures.Future]) -> int:
+    """Cancel pending jobs (running jobs can't be interrupted and will complete
+    in background). Return the number of cancelled jobs"""
+    return sum(1 for job in jobs if job.cancel())
+
+
+def map_jobs(
+    func: Callable, argslist: Iterable[tuple], pool: futures.Executor = None
+) -> list:
+    """Run `func(*args)` for each `args` of `argslist` on `pool` (default:
+    application-wide thread pool, see `submit_jobs`) and return results list,
+    in submission order (pending jobs are cancelled if one of them fails)"""
+    jobs = submit_jobs(func, argslist, pool)
+    try:
+        return [job.result() for job in jobs]
+    finally:
+        cancel_jobs(jobs)
+
+
+class SharedArray:
+    """NumPy array stored in a shared memory block
+
+    Pickling a `SharedArray` object only transmits the block name, the array
+    shape and data type: the data itself is not copied. Masked arrays are
+    supported (data and mask are stored in two separate blocks)."""
+
+    def __init__(
+        self,
+        name: str,
+        shape: tuple,
+        dtype: str,
+        mask=None,
+        shm: shared_memory.SharedMemory = None,
+    ):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.mask = mask
+        #: Shared memory block, once attached (see `asarray`), or as created (see
+        #: `create`): keeping a reference keeps the block mapped in this process
+        self._shm = shm
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> "SharedArray":
+        """Create a shared memory block and copy `array` into it"""
+        array = np.asanyarray(array)
+        mask = None
+        if isinstance(array, np.ma.MaskedArray):
+            if array.mask is not np.ma.nomask:
+                mask = cls.create(np.ma.getmaskarray(array))
+            array = array.data
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        sarr = cls(shm.name, array.shape, array.dtype.str, mask, shm)
+        np.copyto(np.ndarray(array.shape, array.dtype, buffer=shm.buf), array)
+        return sarr
+
+    def __getstate__(self):
+        return self.name, self.shape, self.dtype, self.mask
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype, self.mask = state
+        self._shm = None
+
+    def asarray(self) -> np.ndarray:
+        """Return array (view on shared data), attaching to shared memory block
+        if necessary"""
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+        data = np.ndarray(self.shape, self.dtype, buffer=self._shm.buf)
+        if self.mask is not None:
+            return np.ma.MaskedArray(data, mask=self.mask.asarray(), copy=False)
+        return data
+
+    def close(self) -> None:
+        """Close access to shared memory block (the block itself is released
+        only when calling `unlink`, from the process which created it)"""
+        if self.mask is not None:
+            self.mask.close()
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                # Views on shared data are still alive: the memory map will be
+                # closed when they are garbage collected
+                pass
+            self._shm = None
+
+    def unlink(self) -> None:
+        """Release shared memory block"""
+        if self.mask is not None:
+            self.mask.unlink()
+        if self._shm is not None:
+            shm = self._shm
+            self.close()
+            shm.unlink()
+
+
+def _call_with_shared_arrays(func: Callable, args: list, kwargs: dict):
+    """Call `func` in worker process, replacing `SharedArray` arguments by
+    their NumPy array counterparts"""
+    shared = [arg for arg in args if isinstance(arg, SharedArray)]
+    args = [arg.asarray() if isinstance(arg, SharedArray) else arg for arg in args]
+    try:
+        result = func(*args, **kwargs)
+        if isinstance(result, np.ndarray) and not result.flags.owndata:
+            # Result may be a view on shared data, which is about to be closed
+            result = result.copy()
+        return result
+    finally:
+        del args
+        for sarr in shared:
+            sarr.close()
+
+
+class ProcessPoolEngine:
+    """Process pool running CPU-bound functions on NumPy arrays
+
+    NumPy array arguments are handed to worker processes through shared memory
+    (see `SharedArray`), other arguments and results are pickled. Worker
+    processes are started on first use with the "spawn" method, which is safe
+    for a multithreaded (e.g. Qt) parent process."""
+
+    #: Arrays smaller than this (in bytes) are simply pickled
+    SHARED_MIN_NBYTES = 64 * 1024
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or get_max_workers()
+        self.__pool = None
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Return True if shared memory is supported (Python >= 3.8)"""
+        return shared_memory is not None
+
+    @staticmethod
+    def is_picklable(*objs) -> bool:
+        """Return True if all objects (except NumPy arrays, which are not
+        checked) may be sent to a worker process"""
+        try:
+            for obj in objs:
+                if not isinstance(obj, np.ndarray):
+                    pickle.dumps(obj)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    @property
+    def pool(self) -> futures.ProcessPoolExecutor:
+        """Return process pool (created on first call)"""
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self.__pool
+
+    def submit(self, func: Callable, *args, **kwargs) -> futures.Future:
+        """Submit `func(*args, **kwargs)` to process pool and return future.
+        Shared memory blocks are released as soon as the job is done."""
+        shared = []
+
+        def release_shared_arrays(_future):
+            """Release shared memory blocks"""
+            for sarr in shared:
+                sarr.unlink()
+
+        try:
+            wargs = []
+            for arg in args:
+                if isinstance(arg, np.ndarray) and arg.nbytes >= self.SHARED_MIN_NBYTES:
+                    arg = SharedArray.create(arg)
+                    shared.append(arg)
+                wargs.append(arg)
+            try:
+                future = self.pool.submit(_call_with_shared_arrays, func, wargs, kwargs)
+            except futures.process.BrokenProcessPool:
+                # A worker process died (e.g. killed by the OS): restarting pool
+                self.shutdown(wait=False)
+                future = self.pool.submit(_call_with_shared_arrays, func, wargs, kwargs)
+        except BaseException:
+            release_shared_arrays(None)
+            raise
+        future.add_done_callback(release_shared_arrays)
+        return future
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Run `func(*args, **kwargs)` in a worker process and return result"""
+        return self.submit(func, *args, **kwargs).result()
+
+    def map(self, func: Callable, argslist: Iterable[tuple]) -> list:
+        """Run `func(*args)` for each `args` of `argslist` and return results
+        list (jobs are distributed over all worker processes)"""
+        return map_jobs(func, argslist, self)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down process pool"""
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=wait)
+                self.__pool = None
+
+
+def get_process_engine() -> ProcessPoolEngine:
+    """Return the application-wide process pool engine (created on first call),
+    or None if shared memory is not supported"""
+    global _PROCESS_ENGINE  # pylint: disable=global-statement
+    with _PROCESS_ENGINE_LOCK:
+        if _PROCESS_ENGINE is None and ProcessPoolEngine.is_available():
+            _PROCESS_ENGINE = ProcessPoolEngine()
+        return _PROCESS_ENGINE
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Reduction module
+
+Streaming element-wise reductions of N arrays having the same shape (sum,
+mean, product, minimum, maximum, standard deviation and median): arrays are
+read one at a time, by chunks of rows, and accumulated in place, without any
+converted copy of the whole array. Memory usage does not depend on the number
+of arrays.
+
+Arrays may be any array-like object supporting shape, dtype and slicing along
+the first axis (NumPy arrays, memory-mapped arrays, h5py datasets, ...): data
+which is not loaded in memory (e.g. HDF5 datasets, SIF file frames) is read
+chunk by chunk.
+
+Sums are computed with Kahan compensated summation and standard deviations with
+Welford's algorithm, so that precision does not drift with the number of arrays.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+
+#: Default chunk size (in bytes, accumulator data)
+CHUNK_NBYTES = 16 * 1024**2
+
+#: Streaming reduction methods (see `StreamingReducer`)
+STREAMING_METHODS = ("sum", "mean", "prod", "min", "max", "std")
+
+#: Reduction methods (see `reduce_arrays`)
+METHODS = STREAMING_METHODS + ("median",)
+
+
+def get_accumulator_dtype(dtype) -> np.dtype:
+    """Return accumulator data type for arrays of data type `dtype`"""
+    if np.issubdtype(dtype, np.complexfloating):
+        return np.dtype(np.complex128)
+    return np.dtype(np.float64)
+
+
+def get_chunk_slices(shape: tuple, row_nbytes: int, max_nbytes: int) -> Iterator:
+    """Iterate over slices splitting arrays of shape `shape` in chunks of rows
+    (first axis), each chunk being smaller than `max_nbytes` bytes (but at least
+    one row), `row_nbytes` being the size of one row"""
+    if not shape:
+        yield Ellipsis
+        return
+    nrows = max(1, max_nbytes // max(row_nbytes, 1))
+    for start in range(0, shape[0], nrows):
+        yield slice(start, min(start + nrows, shape[0]))
+
+
+def cast_result(data: np.ndarray, dtype) -> np.ndarray:
+    """Cast reduction result to data type `dtype` (integer results are
+    saturated instead of wrapping around)"""
+    dtype = np.dtype(dtype)
+    if data.dtype == dtype:
+        return data
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        data = np.clip(data.real, info.min, info.max)
+    return data.astype(dtype)
+
+
+class StreamingReducer:
+    """Streaming element-wise reduction of arrays having the same shape
+
+    :param str method: reduction method (see `STREAMING_METHODS`)
+    :param tuple shape: arrays shape
+    :param dtype: arrays data type (minimum and maximum are computed with this
+     data type, other methods with the accumulator data type: see
+     `get_accumulator_dtype`)
+    :param int chunk_nbytes: maximum size of chunks (bytes)
+    """
+
+    def __init__(
+        self, method: str, shape: tuple, dtype, chunk_nbytes: int = CHUNK_NBYTES
+    ):
+        if method not in STREAMING_METHODS:
+            raise ValueError(f"Unsupported streaming reduction method '{method}'")
+        self.method = method
+        self.shape = tuple(shape)
+        if method in ("min", "max"):
+            self.dtype = np.dtype(dtype)
+        else:
+            self.dtype = get_accumulator_dtype(dtype)
+        self.chunk_nbytes = chunk_nbytes
+        self.count = 0
+        self.__acc = None  # Sum, mean, product, minimum or maximum
+        self.__aux = None  # Kahan compensation (sum) or sum of squares (std)
+
+    def __allocate(self) -> None:
+        """Allocate accumulators"""
+        if self.method == "prod":
+            self.__acc = np.ones(self.shape, dtype=self.dtype)
+        else:
+            self.__acc = np.zeros(self.shape, dtype=self.dtype)
+        if self.method in ("sum", "mean"):
+            self.__aux = np.zeros(self.shape, dtype=self.dtype)
+        elif self.method == "std":
+            self.__aux = np.zeros(self.shape, dtype=np.float64)
+
+    def add(self, array) -> None:
+        """Accumulate array (array-like object: see module docstring)"""
+        if tuple(array.shape) != self.shape:
+            raise ValueError(
+                f"Array shape {tuple(array.shape)} does not match {self.shape}"
+            )
+        if self.__acc is None:
+            self.__allocate()
+        self.count += 1
+        row_nbytes = self.__acc[:1].nbytes if self.shape else 0
+        for sl in get_chunk_slices(self.shape, row_nbytes, self.chunk_nbytes):
+            chunk = np.asarray(array[sl])
+            acc = self.__acc[sl]
+            if self.method in ("min", "max"):
+                if self.count == 1:
+                    acc[...] = chunk
+                elif self.method == "min":
+                    np.minimum(acc, chunk, out=acc)
+                else:
+                    np.maximum(acc, chunk, out=acc)
+            elif self.method == "prod":
+                np.multiply(acc, chunk, out=acc)
+            elif self.method == "std":
+                self.__add_welford(acc, self.__aux[sl], chunk)
+            else:
+                self.__add_kahan(acc, self.__aux[sl], chunk)
+
+    @staticmethod
+    def __add_kahan(acc: np.ndarray, comp: np.ndarray, chunk: np.ndarray) -> None:
+        """Add chunk to sum `acc` (Kahan compensated summation, `comp` being
+        the running compensation)"""
+        y = np.subtract(chunk, comp, dtype=acc.dtype)
+        t = acc + y
+        np.subtract(t, acc, out=comp)
+        comp -= y
+        acc[...] = t
+
+    def __add_welford(self, mean: np.ndarray, m2: np.ndarray, chunk: np.ndarray):
+        """Add chunk to running mean `mean` and sum of squared deviations `m2`
+        (Welford's algorithm)"""
+        delta = np.subtract(chunk, mean, dtype=mean.dtype)
+        mean += delta / self.count
+        delta2 = np.subtract(chunk, mean, dtype=mean.dtype)
+        if np.iscomplexobj(delta):
+            m2 += (np.conj(delta) * delta2).real
+        else:
+            delta *= delta2
+            m2 += delta
+
+    def result(self) -> np.ndarray:
+        """Return reduction result (the reducer must not be used afterwards)"""
+        if self.count == 0:
+            raise ValueError("No array to reduce")
+        if self.method in ("sum", "mean"):
+            self.__acc -= self.__aux
+            if self.method == "mean":
+                self.__acc /= self.count
+        elif self.method == "std":
+            self.__aux /= self.count
+            return np.sqrt(self.__aux, out=self.__aux)
+        return self.__acc
+
+
+def median_arrays(arrays: Sequence, chunk_nbytes: int = CHUNK_NBYTES) -> np.ndarray:
+    """Return element-wise median of arrays having the same shape (array-like
+    objects: see module docstring). Arrays are read by bands of rows, the data
+    of one band (for all arrays) being smaller than `chunk_nbytes` bytes (but
+    at least one row per array)."""
+    if not arrays:
+        raise ValueError("No array to reduce")
+    shape = tuple(arrays[0].shape)
+    dtype = np.result_type(*[array.dtype for array in arrays])
+    if np.issubdtype(dtype, np.complexfloating):
+        raise ValueError("Median is not defined for complex data")
+    for array in arrays:
+        if tuple(array.shape) != shape:
+            raise ValueError(f"Array shape {tuple(array.shape)} does not match {shape}")
+    result = np.empty(shape, dtype=np.float64)
+    row_nbytes = len(arrays) * dtype.itemsize * int(np.prod(shape[1:]))
+    for sl in get_chunk_slices(shape, row_nbytes, chunk_nbytes):
+        band = np.empty((len(arrays),) + result[sl].shape, dtype=dtype)
+        for index, array in enumerate(arrays):
+            band[index] = array[sl]
+        np.median(band, axis=0, out=result[sl], overwrite_input=True)
+    return result
+
+
+def reduce_arrays(
+    arrays: Iterable, method: str, dtype=None, chunk_nbytes: int = CHUNK_NBYTES
+) -> np.ndarray:
+    """Return element-wise reduction of arrays having the same shape (array-like
+    objects: see module docstring), computed with method `method` (see
+    `METHODS`). Except for the median (which requires a sequence of arrays),
+    `arrays` may be an iterator (e.g. a generator reading arrays one at a time).
+
+    `dtype` is the arrays data type (default: data type of the first array),
+    see `StreamingReducer`."""
+    if method == "median":
+        return median_arrays(list(arrays), chunk_nbytes)
+    reducer = None
+    for array in arrays:
+        if reducer is None:
+            if dtype is None:
+                dtype = array.dtype
+            reducer = StreamingReducer(method, array.shape, dtype, chunk_nbytes)
+        reducer.add(array)
+    if reducer is None:
+        raise ValueError("No array to reduce")
+    return reducer.result()
@@ -11,12 +11,57 @@ CodraFT Computation / Signal module
 
 import numpy as np
 
+from codraft.core.computation import fft
 
 # ----- Filtering functions ----------------------------------------------------
-def moving_average(y, n):
-    """Compute moving average"""
-    y_padded = np.pad(y, (n // 2, n - 1 - n // 2), mode="edge")
-    return np.convolve(y_padded, np.ones((n,)) / n, mode="valid")
+#: Moving average edge modes (see `numpy.pad`)
+MOVING_AVERAGE_MODES = ("edge", "constant", "reflect", "symmetric", "wrap")
+
+#: Moving average running sums are restarted from an exactly computed window sum
+#: every `MOVING_AVERAGE_BLOCK` samples (or every window size, if larger)
+MOVING_AVERAGE_BLOCK = 4096
+
+#: Signal moving averages on windows smaller than this size are computed by
+#: direct convolution (faster than running sums for small windows)
+MOVING_AVERAGE_CONVOLVE_SIZE = 16
+
+
+def moving_average(y, n, mode="edge"):
+    """Compute moving average of signal `y` (or of each row of 2D array `y`,
+    i.e. a batch of signals of equal length) on a window of `n` samples,
+    signal being extended beyond its edges according to `mode` (see
+    `MOVING_AVERAGE_MODES` and `numpy.pad`)
+
+    Running sum algorithm (cost does not depend on window size): each window
+    sum is obtained from the previous one by adding the entering sample and
+    subtracting the leaving sample. Rounding errors accumulated by running sums
+    are bounded by restarting them every `MOVING_AVERAGE_BLOCK` samples from an
+    exactly computed (pairwise) window sum. Small windows on a single signal
+    are computed by direct convolution (see `MOVING_AVERAGE_CONVOLVE_SIZE`)."""
+    if mode not in MOVING_AVERAGE_MODES:
+        raise ValueError(f"Unsupported moving average mode {mode!r}")
+    y = np.asarray(y)
+    pad_width = [(0, 0)] * (y.ndim - 1) + [(n // 2, n - 1 - n // 2)]
+    if y.ndim == 1 and n < MOVING_AVERAGE_CONVOLVE_SIZE:
+        y_padded = np.pad(y, pad_width, mode=mode)
+        return np.convolve(y_padded, np.ones((n,)) / n, mode="valid")
+    dtype = np.result_type(y.dtype, np.float64)
+    size = y.shape[-1]
+    block = max(n, MOVING_AVERAGE_BLOCK)
+    nblocks = -(-size // block)
+    y_padded = np.zeros(y.shape[:-1] + (nblocks * block + n,), dtype=dtype)
+    y_padded[..., : size + n - 1] = np.pad(y, pad_width, mode=mode)
+    blocks_shape = y.shape[:-1] + (nblocks, block)
+    sums = np.empty(blocks_shape, dtype=dtype)
+    # Exact window sums at the start of each block (n <= block)
+    sums[..., 0] = y_padded[..., :-n].reshape(blocks_shape)[..., :n].sum(axis=-1)
+    # Running sums within each block
+    steps = (y_padded[..., n:] - y_padded[..., :-n]).reshape(blocks_shape)
+    np.cumsum(steps[..., :-1], axis=-1, out=sums[..., 1:])
+    sums[..., 1:] += sums[..., :1]
+    sums = sums.reshape(y.shape[:-1] + (nblocks * block,))[..., :size]
+    sums /= n
+    return sums
 
 
 # ----- Misc. functions --------------------------------------------------------
@@ -56,24 +101,155 @@ def normalize(yin, parameter="maximum"):
     raise RuntimeError(f"Unsupported parameter {parameter}")
 
 
-def xy_fft(x, y):
-    """Compute FFT on X,Y data"""
-    y1 = np.fft.fft(y)
-    x1 = np.fft.fftshift(np.fft.fftfreq(x.shape[-1], d=x[1] - x[0]))
+def xy_fft(x, y, real=False, fast_length=False):
+    """Compute FFT on X,Y data (see `codraft.core.computation.fft.fftn` for
+    `real` and `fast_length`)"""
+    real = fft.is_real_transform(y, real)
+    size = x.shape[-1]
+    if fast_length:
+        size = fft.get_fast_length(size, real)
+    y1 = fft.fftn(y, real=real, fast_length=fast_length)
+    if real:
+        x1 = np.fft.rfftfreq(size, d=x[1] - x[0])
+    else:
+        x1 = np.fft.fftshift(np.fft.fftfreq(size, d=x[1] - x[0]))
     return x1, y1
 
 
-def xy_ifft(x, y):
-    """Compute iFFT on X,Y data"""
-    y1 = np.fft.ifft(y)
-    x1 = np.fft.fftshift(np.fft.fftfreq(x.shape[-1], d=x[1] - x[0]))
+def xy_ifft(x, y, real=False, size=0):
+    """Compute iFFT on X,Y data (see `codraft.core.computation.fft.ifftn` for
+    `real` and `size`)"""
+    y1 = fft.ifftn(y, real=real, size=size)
+    x1 = np.fft.fftshift(np.fft.fftfreq(y1.shape[-1], d=x[1] - x[0]))
     return x1, y1
 
 
 # ----- Peak detection functions -----------------------------------------------
+#: Maximum number of vectorized passes of minimum distance peak suppression
+#: (remaining peaks are then handled one by one, see `suppress_close_peaks`)
+PEAK_SUPPRESSION_PASSES = 16
+
+
+def resolve_plateaus(dy):
+    """Replace null values of first order differences `dy` (plateaus, along
+    last axis) by the nearest non-null values: left half of each plateau takes
+    the value preceding the plateau, right half (and middle) takes the value
+    following the plateau (plateaus touching an edge take the only value
+    available). `dy` is modified in place."""
+    size = dy.shape[-1]
+    nonnull = dy != 0
+    indexes = np.arange(size)
+    # Index of previous and next non-null values (-1 or size if there is none)
+    previous = np.maximum.accumulate(np.where(nonnull, indexes, -1), axis=-1)
+    following = np.where(nonnull, indexes, size)
+    following = np.minimum.accumulate(following[..., ::-1], axis=-1)[..., ::-1]
+    nulls = np.nonzero(~nonnull)
+    i0, i1 = previous[nulls], following[nulls]
+    # Plateau [i0 + 1, i1 - 1] is split at its median (i0 + i1) / 2
+    left = (i0 >= 0) & ((i1 == size) | (2 * nulls[-1] < i0 + i1))
+    rows = nulls[:-1]
+    dy[nulls] = np.where(
+        left, dy[rows + (np.maximum(i0, 0),)], dy[rows + (np.minimum(i1, size - 1),)]
+    )
+
+
+def window_max(values, start, stop):
+    """Return maximum of `values[start[i]:stop[i]]` for each index i (windows
+    must not be empty), using a sparse table of maxima of power-of-two sized
+    windows"""
+    widths = stop - start
+    table = [values]
+    for level in range(1, int(widths.max()).bit_length()):
+        step = 1 << (level - 1)
+        maxima = table[-1].copy()
+        maxima[:-step] = np.maximum(maxima[:-step], maxima[step:])
+        table.append(maxima)
+    table = np.stack(table)
+    levels = np.frexp(widths)[1] - 1
+    return np.maximum(table[levels, start], table[levels, stop - (1 << levels)])
+
+
+def suppress_close_peaks(peaks, heights, min_dist):
+    """Remove peaks closer than `min_dist` to a higher peak, highest peaks
+    being kept first (greedy suppression, equal heights: rightmost peak first)
+
+    Args:
+        peaks: peak boolean mask (2D array, one row per signal), modified in
+         place
+        heights: peak heights (same shape as `peaks`)
+        min_dist: minimum distance between peaks
+    """
+    rows, cols = np.nonzero(peaks)
+    # Peak positions, rows being separated by more than `min_dist`
+    positions = rows * (peaks.shape[1] + min_dist) + cols
+    ranks = np.empty(positions.size, dtype=np.int64)
+    ranks[np.argsort(heights[rows, cols], kind="stable")] = np.arange(ranks.size)
+    kept = np.zeros(positions.size, dtype=bool)
+    # Vectorized passes on active peaks (i.e. neither kept nor removed): peaks
+    # which are the highest within their window are kept, then peaks within
+    # their window are removed
+    active = np.arange(positions.size)
+    for _index in range(PEAK_SUPPRESSION_PASSES):
+        if active.size == 0:
+            break
+        pos = positions[active]
+        start = np.searchsorted(pos, pos - min_dist, side="left")
+        stop = np.searchsorted(pos, pos + min_dist, side="right")
+        keep = window_max(ranks[active], start, stop) == ranks[active]
+        kept[active[keep]] = True
+        counts = np.concatenate(([0], np.cumsum(keep)))
+        active = active[counts[stop] == counts[start]]
+    # Remaining peaks (e.g. long staircases of peaks): one by one
+    for index in active[np.argsort(ranks[active])[::-1]]:
+        start = np.searchsorted(positions, positions[index] - min_dist)
+        stop = np.searchsorted(positions, positions[index] + min_dist, "right")
+        kept[index] = not kept[start:stop].any()
+    peaks[rows, cols] = kept
+
+
+def peak_indexes_batch(ys, thres=0.3, min_dist=1, thres_abs=False):
+    """Peak detection routine applied to each row of 2D array `ys` (signals of
+    equal length): see `peak_indexes` for parameters
+
+    Returns
+    -------
+    list of ndarray
+        Arrays containing the numeric indexes of the peaks detected in each row
+    """
+    ys = np.asarray(ys)
+    if np.issubdtype(ys.dtype, np.unsignedinteger):
+        raise ValueError("y must be signed")
+
+    if not thres_abs:
+        ymin, ymax = np.min(ys, axis=-1), np.max(ys, axis=-1)
+        thres = thres * (ymax - ymin) + ymin
+    thres = np.reshape(thres, (-1, 1))
+
+    min_dist = int(min_dist)
+
+    # compute first order difference
+    dy = np.diff(ys, axis=-1)
+
+    # propagate left and right values successively to fill all plateau pixels
+    # (0-value)
+    resolve_plateaus(dy)
+
+    # find the peaks by using the first order difference
+    peaks = np.zeros(ys.shape, dtype=bool)
+    peaks[:, 1:-1] = (dy[:, 1:] < 0.0) & (dy[:, :-1] > 0.0)
+    peaks &= np.greater(ys, thres)
+
+    # handle multiple peaks, respecting the minimum distance
+    if min_dist > 1:
+        suppress_close_peaks(peaks, ys, min_dist)
+
+    return [np.flatnonzero(row) for row in peaks]
+
+
 def peak_indexes(y, thres=0.3, min_dist=1, thres_abs=False):
     #  Copyright (c) 2014 Lucas Hermann Negri
-    #  Unmodified code snippet from PeakUtils 1.3.0
+    #  Code snippet adapted from PeakUtils 1.3.0 (vectorized plateau handling
+    #  and minimum distance suppression, see `peak_indexes_batch`)
     """Peak detection routine.
 
     Finds the numeric index of the peaks in *y* by taking its first order
@@ -99,73 +275,7 @@ def peak_indexes(y, thres=0.3, min_dist=1, thres_abs=False):
     ndarray
         Array containing the numeric indexes of the peaks that were detected
     """
-    if isinstance(y, np.ndarray) and np.issubdtype(y.dtype, np.unsignedinteger):
-        raise ValueError("y must be signed")
-
-    if not thres_abs:
-        thres = thres * (np.max(y) - np.min(y)) + np.min(y)
-
-    min_dist = int(min_dist)
-
-    # compute first order difference
-    dy = np.diff(y)
-
-    # propagate left and right values successively to fill all plateau pixels
-    # (0-value)
-    (zeros,) = np.where(dy == 0)
-
-    # check if the signal is totally flat
-    if len(zeros) == len(y) - 1:
-        return np.array([])
-
-    if len(zeros):
-        # compute first order difference of zero indexes
-        zeros_diff = np.diff(zeros)
-        # check when zeros are not chained together
-        (zeros_diff_not_one,) = np.add(np.where(zeros_diff != 1), 1)
-        # make an array of the chained zero indexes
-        zero_plateaus = np.split(zeros, zeros_diff_not_one)
-
-        # fix if leftmost value in dy is zero
-        if zero_plateaus[0][0] == 0:
-            dy[zero_plateaus[0]] = dy[zero_plateaus[0][-1] + 1]
-            zero_plateaus.pop(0)
-
-        # fix if rightmost value of dy is zero
-        if len(zero_plateaus) > 0 and zero_plateaus[-1][-1] == len(dy) - 1:
-            dy[zero_plateaus[-1]] = dy[zero_plateaus[-1][0] - 1]
-            zero_plateaus.pop(-1)
-
-        # for each chain of zero indexes
-        for plateau in zero_plateaus:
-            median = np.median(plateau)
-            # set leftmost values to leftmost non zero values
-            dy[plateau[plateau < median]] = dy[plateau[0] - 1]
-            # set rightmost and middle values to rightmost non zero values
-            dy[plateau[plateau >= median]] = dy[plateau[-1] + 1]
-
-    # find the peaks by using the first order difference
-    peaks = np.where(
-        (np.hstack([dy, 0.0]) < 0.0)
-        & (np.hstack([0.0, dy]) > 0.0)
-        & (np.greater(y, thres))
-    )[0]
-
-    # handle multiple peaks, respecting the minimum distance
-    if peaks.size > 1 and min_dist > 1:
-        highest = peaks[np.argsort(y[peaks])][::-1]
-        rem = np.ones(y.size, dtype=bool)
-        rem[peaks] = False
-
-        for peak in highest:
-            if not rem[peak]:
-                sl = slice(max(0, peak - min_dist), peak + min_dist + 1)
-                rem[sl] = True
-                rem[peak] = False
-
-        peaks = np.arange(y.size)[~rem]
-
-    return peaks
+    return peak_indexes_batch(np.asarray(y)[np.newaxis], thres, min_dist, thres_abs)[0]
 
 
 def xpeak(x, y):
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Statistics module
+
+Fused statistics kernel: minimum, maximum, sum, mean, standard deviation and
+median are computed together on the valid values of an array (masked values
+being removed once and for all), instead of calling one masked array function
+per statistic.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+from typing import Dict
+
+import numpy as np
+from numpy import ma
+
+from codraft.core.computation.reduction import get_accumulator_dtype
+
+#: Statistics computed by `get_stats`
+STAT_NAMES = ("min", "max", "sum", "mean", "std", "median")
+
+
+def get_stats(data: np.ndarray) -> Dict[str, float]:
+    """Return statistics of array `data` (see `STAT_NAMES`): if `data` is a
+    masked array, statistics are computed on unmasked values only (NaN if there
+    is no such value)"""
+    if isinstance(data, ma.MaskedArray):
+        values = data.compressed()  # 1-D copy of valid values
+        owned = True
+    else:
+        values = np.ravel(data)
+        owned = not np.shares_memory(values, data)
+    if values.size == 0:
+        return dict.fromkeys(STAT_NAMES, np.nan)
+    total = values.sum(dtype=get_accumulator_dtype(values.dtype))
+    mean = total / values.size
+    deviations = np.subtract(values, mean, dtype=total.dtype)
+    variance = np.real(np.vdot(deviations, deviations)) / values.size
+    stats = {
+        "min": values.min(),
+        "max": values.max(),
+        "sum": total,
+        "mean": mean,
+        "std": np.sqrt(variance),
+    }
+    # Median is computed last: when `values` is a copy, it is partially sorted
+    # in place (no additional copy)
+    stats["median"] = np.median(values, overwrite_input=owned)
+    return stats
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Computation / Tiling module
+
+Tiled execution of neighbourhood filters on large images: data is split into
+strips (with an overlapping halo matching filter kernel size) which are
+processed in parallel (see `parallel.get_thread_pool`), results being written
+into a preallocated output array. Temporary arrays are thus bounded by tile
+size, and the result is identical (bit for bit) to the untiled computation.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import math
+from typing import Callable, List, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.ndimage as spi
+import scipy.signal as sps
+
+from codraft.core.computation import parallel
+
+#: Default tile size (in bytes, input data)
+TILE_NBYTES = 16 * 1024**2
+
+
+def get_tiles(length: int, tile: int, halo: int) -> List[Tuple[slice, slice, slice]]:
+    """Split [0, length[ range in tiles of `tile` elements with an overlapping
+    halo of `halo` elements on each side.
+
+    Return a list of (block, inner, dest) slices: `block` is the tile range
+    including halo (in input data), `inner` is the tile range without halo
+    (relative to block) and `dest` is the tile range (in output data)"""
+    tiles = []
+    for start in range(0, length, tile):
+        stop = min(start + tile, length)
+        b_start, b_stop = max(start - halo, 0), min(stop + halo, length)
+        inner = slice(start - b_start, stop - b_start)
+        tiles.append((slice(b_start, b_stop), inner, slice(start, stop)))
+    return tiles
+
+
+def apply_tiled(
+    func: Callable,
+    data: np.ndarray,
+    halo: int = 0,
+    axis: int = 0,
+    tile_nbytes: int = None,
+) -> np.ndarray:
+    """Apply `func` to `data`, tile by tile (tiles being processed in parallel)
+
+    Args:
+        func: function taking a data block and returning a result array
+         whose length along `axis` is the block length (other dimensions may
+         differ from data, e.g. when returning sums along another axis)
+        data: input data
+        halo: number of overlapping elements on each side of tiles, along `axis`
+         (i.e. neighbourhood radius of the filter implemented by `func`)
+        axis: axis along which data is split
+        tile_nbytes: tile size in bytes (default: `TILE_NBYTES`)
+
+    Returns:
+        Output array (with the same data type as `func` results)
+    """
+    data = np.asarray(data)
+    length = data.shape[axis]
+    line_nbytes = max(data.nbytes // max(length, 1), 1)
+    tile = max((tile_nbytes or TILE_NBYTES) // line_nbytes, 2 * halo + 1)
+    tiles = get_tiles(length, tile, halo)
+
+    def index(slc: slice) -> tuple:
+        """Return index selecting `slc` along `axis`"""
+        return (slice(None),) * axis + (slc,)
+
+    block, inner, dest = tiles[0]
+    result = func(data[index(block)])
+    if len(tiles) == 1:
+        return result
+    shape = list(result.shape)
+    shape[axis] = length
+    output = np.empty(shape, dtype=result.dtype)
+    output[index(dest)] = result[index(inner)]
+    del result
+
+    def run_tile(block: slice, inner: slice, dest: slice) -> None:
+        """Process tile and store result"""
+        output[index(dest)] = func(data[index(block)])[index(inner)]
+
+    pool = parallel.get_thread_pool("tiles")
+    jobs = parallel.submit_jobs(run_tile, tiles[1:], pool)
+    try:
+        for job in jobs:
+            job.result()
+    finally:
+        parallel.cancel_jobs(jobs)
+    return output
+
+
+def apply_tiled_inplace(
+    func: Callable, data: np.ndarray, axis: int = 0, tile_nbytes: int = None
+) -> np.ndarray:
+    """Apply `func` to `data` in place, tile by tile (tiles being processed in
+    parallel)
+
+    Args:
+        func: function modifying in place the data block it is called with,
+         without reading data outside of the block (no halo: e.g. 1D filter
+         along another axis than `axis`)
+        data: input/output data
+        axis: axis along which data is split
+        tile_nbytes: tile size in bytes (default: `TILE_NBYTES`)
+
+    Returns:
+        Data (modified in place)
+    """
+    length = data.shape[axis]
+    line_nbytes = max(data.nbytes // max(length, 1), 1)
+    tile = max((tile_nbytes or TILE_NBYTES) // line_nbytes, 1)
+    index = (slice(None),) * axis
+    blocks = [
+        (data[index + (dest,)],) for _block, _inner, dest in get_tiles(length, tile, 0)
+    ]
+    pool = parallel.get_thread_pool("tiles")
+    jobs = parallel.submit_jobs(func, blocks, pool)
+    try:
+        for job in jobs:
+            job.result()
+    finally:
+        parallel.cancel_jobs(jobs)
+    return data
+
+
+def get_split_axis(axis: int) -> int:
+    """Return the axis along which data is split in tiles when applying a 1D
+    filter along `axis` (first axis if possible: e.g. frames of image stacks)"""
+    return 1 if axis == 0 else 0
+
+
+def get_filter_axes(values: Sequence[float], threshold: float) -> List[int]:
+    """Return axes along which a separable filter is actually applied, i.e.
+    axes whose filter parameter (e.g. sigma, size) is greater than `threshold`,
+    as `scipy.ndimage` separable filters do"""
+    return [axis for axis, value in enumerate(values) if value > threshold]
+
+
+def apply_separable_inplace(
+    func1d: Callable, data: np.ndarray, output: np.ndarray, axes: List[int] = None
+) -> np.ndarray:
+    """Apply separable filter to `data`, writing result into `output` (which may
+    be `data` itself): `func1d(block, axis)` is applied in place along each axis
+    of `axes` (default: all axes), exactly as `scipy.ndimage` separable filters
+    do (intermediate results having output data type), tiles being split along
+    another axis"""
+    if axes is None:
+        axes = range(np.ndim(data))
+    if output is not data:
+        np.copyto(output, data)
+    for axis in axes:
+        if np.ndim(output) < 2:
+            func1d(output, axis)
+        else:
+            apply_tiled_inplace(
+                lambda block, axis=axis: func1d(block, axis),
+                output,
+                get_split_axis(axis),
+            )
+    return output
+
+
+def get_axis_values(data: np.ndarray, value: Union[float, Sequence[float]]):
+    """Return filter parameter `value` (scalar or sequence) for each axis of
+    `data`"""
+    return np.broadcast_to(np.asarray(value), (np.ndim(data),)).tolist()
+
+
+def gaussian_filter(
+    data: np.ndarray,
+    sigma: Union[float, Sequence[float]],
+    truncate: float = 4.0,
+    output: np.ndarray = None,
+):
+    """Tiled `scipy.ndimage.gaussian_filter` (same result)
+
+    `sigma` may be a sequence (one value per axis): e.g. `(0, s, s)` filters
+    each frame of an image stack independently, in a single call.
+
+    If `output` is specified (it may be `data` itself, for in-place filtering),
+    result is written into it without any temporary full-size array."""
+    sigmas = get_axis_values(data, sigma)
+    if output is not None:
+        return apply_separable_inplace(
+            lambda block, axis: spi.gaussian_filter1d(
+                block, sigmas[axis], axis=axis, output=block, truncate=truncate
+            ),
+            data,
+            output,
+            get_filter_axes(sigmas, 1e-15),
+        )
+    return apply_tiled(
+        lambda block: spi.gaussian_filter(block, sigma, truncate=truncate),
+        data,
+        halo=int(truncate * float(sigmas[0]) + 0.5),
+    )
+
+
+def uniform_filter(
+    data: np.ndarray,
+    size: Union[int, Sequence[int]],
+    mode: str = "reflect",
+    output: np.ndarray = None,
+):
+    """Tiled `scipy.ndimage.uniform_filter` (same result)
+
+    `size` may be a sequence (one value per axis): e.g. `(1, n, n)` filters
+    each frame of an image stack independently, in a single call.
+
+    If `output` is specified (it may be `data` itself, for in-place filtering),
+    result is written into it without any temporary full-size array."""
+    sizes = get_axis_values(data, size)
+    axes = get_filter_axes(sizes, 1)
+    if output is not None:
+        return apply_separable_inplace(
+            lambda block, axis: spi.uniform_filter1d(
+                block, sizes[axis], axis=axis, output=block, mode=mode
+            ),
+            data,
+            output,
+            axes,
+        )
+    # Uniform filter is computed with running sums, so lines are not split:
+    # the 1D filter is applied along each axis on complete lines, exactly as
+    # `scipy.ndimage.uniform_filter` does
+    if np.ndim(data) < 2 or not axes:
+        return spi.uniform_filter(data, size, mode=mode)
+    output = data
+    for axis in axes:
+        output = apply_tiled(
+            lambda block, axis=axis: spi.uniform_filter1d(
+                block, sizes[axis], axis=axis, mode=mode
+            ),
+            output,
+            axis=get_split_axis(axis),
+        )
+    return output
+
+
+def medfilt(data: np.ndarray, kernel_size: Union[int, Sequence[int]] = 3):
+    """Tiled `scipy.signal.medfilt` (same result)
+
+    `kernel_size` may be a sequence (one value per axis): e.g. `(1, n, n)`
+    filters each frame of an image stack independently, in a single call."""
+    return apply_tiled(
+        lambda block: sps.medfilt(block, kernel_size=kernel_size),
+        data,
+        halo=get_axis_values(data, kernel_size)[0] // 2,
+    )
+
+
+def __local_sum(data: np.ndarray, size: int) -> np.ndarray:
+    """Return the sum of `data` over a `size`x`size` neighbourhood (zero padded)
+
+    Terms are summed in a fixed order (unlike running sums), so that the result
+    does not depend on data tiling."""
+    hsize = size // 2
+    padded = np.pad(data, hsize)
+    rows, cols = data.shape
+    colsum = padded[:rows].copy()
+    for i in range(1, size):
+        colsum += padded[i : i + rows]
+    result = colsum[:, :cols].copy()
+    for j in range(1, size):
+        result += colsum[:, j : j + cols]
+    return result
+
+
+def __local_mean_var(block: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return local mean and variance"""
+    block = np.asarray(block, dtype=np.float64)
+    lmean = __local_sum(block, size) / size**2
+    lvar = __local_sum(block**2, size) / size**2
+    lvar -= lmean**2
+    return lmean, lvar
+
+
+def wiener(data: np.ndarray, mysize: int = 3, noise: float = None):
+    """Tiled Wiener filter (2D data)
+
+    Same algorithm as `scipy.signal.wiener` (output may differ only by rounding
+    errors), without full-size temporary arrays: data is processed in tiles,
+    the noise power (if not specified) being estimated first in a separate pass.
+    Contrary to `scipy.signal.wiener`, integer data is converted to float before
+    computing local variance (no overflow)."""
+    if mysize % 2 != 1:
+        raise ValueError("Wiener filter size must be odd")
+    halo = mysize // 2
+    if noise is None:
+        # Variance is summed line by line, then lines are summed with `math.fsum`:
+        # noise estimate does not depend on tiling
+        rowsums = apply_tiled(
+            lambda block: __local_mean_var(block, mysize)[1].sum(axis=1),
+            data,
+            halo=halo,
+        )
+        noise = math.fsum(rowsums) / np.size(data)
+
+    def wiener_block(block: np.ndarray) -> np.ndarray:
+        """Apply Wiener filter to data block"""
+        lmean, lvar = __local_mean_var(block, mysize)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            res = block - lmean
+            res *= 1 - noise / lvar
+        res += lmean
+        return np.where(lvar < noise, lmean, res)
+
+    return apply_tiled(wiener_block, data, halo=halo)
@@ -14,13 +14,15 @@ These actions point to CodraFT panels, processors, objectlist, ...
 
 import abc
 import enum
+import functools
 
 from guidata.configtools import get_icon
 from guidata.qthelpers import add_actions, create_action
 from qtpy import QtGui as QG
 from qtpy import QtWidgets as QW
 
-from codraft.config import _
+from codraft.config import Conf, _
+from codraft.core.computation import fit
 from codraft.widgets import fitdialog
 
 
@@ -79,7 +81,13 @@ class BaseActionHandler(metaclass=abc.ABCMeta):
         featact[ActionCategory.EDIT] = edit_act = self.create_edit_actions()
         featact[ActionCategory.VIEW] = view_act = self.create_view_actions()
         featact[ActionCategory.OPERATION] = self.create_operation_actions()
-        featact[ActionCategory.PROCESSING] = self.create_processing_actions()
+        featact[ActionCategory.PROCESSING] = (
+            self.create_processing_actions()
+            + [None]
+            + self.create_pipeline_actions()
+            + [None]
+            + self.create_processing_option_actions()
+        )
         featact[ActionCategory.COMPUTING] = self.create_computing_actions()
         add_actions(toolbar, file_act + [None] + edit_act + [None] + view_act)
 
@@ -220,6 +228,12 @@ class BaseActionHandler(metaclass=abc.ABCMeta):
         )
         prod_action = self.cra(_("Product"), proc.compute_product)
         div_action = self.cra(_("Division"), proc.compute_division)
+        min_action = self.cra(_("Minimum"), lambda: proc.compute_reduction("min"))
+        max_action = self.cra(_("Maximum"), lambda: proc.compute_reduction("max"))
+        std_action = self.cra(
+            _("Standard deviation"), lambda: proc.compute_reduction("std")
+        )
+        median_action = self.cra(_("Median"), lambda: proc.compute_reduction("median"))
         roi_action = self.cra(
             _("ROI extraction"),
             proc.extract_roi,
@@ -230,6 +244,7 @@ class BaseActionHandler(metaclass=abc.ABCMeta):
         log_action = self.cra("Log10(y)", proc.compute_log10)
         self.actlist_1more += [roi_action, swapaxes_action, abs_action, log_action]
         self.actlist_2more += [sum_action, average_action, prod_action]
+        self.actlist_2more += [min_action, max_action, std_action, median_action]
         self.actlist_2 += [diff_action, qdiff_action, div_action]
         self.operation_end_actions = [roi_action, swapaxes_action]
         return [
@@ -240,6 +255,11 @@ class BaseActionHandler(metaclass=abc.ABCMeta):
             prod_action,
             div_action,
             None,
+            min_action,
+            max_action,
+            std_action,
+            median_action,
+            None,
             abs_action,
             log_action,
         ]
@@ -272,6 +292,68 @@ class BaseActionHandler(metaclass=abc.ABCMeta):
         self.actlist_1more += actions
         return actions
 
+    def create_pipeline_actions(self):
+        """Create processing pipeline actions"""
+        recompute_action = self.cra(
+            _("Recompute downstream"),
+            triggered=self.processor.recompute_downstream,
+            tip=_(
+                "Compute again processing results depending on selected objects, "
+                "if their inputs have changed"
+            ),
+        )
+        self.actlist_1more += [recompute_action]
+        return [recompute_action]
+
+    def create_processing_option_actions(self):
+        """Create processing option actions"""
+        workers_action = self.cra(
+            _("Run processing in background"),
+            tip=_(
+                "Run processing on worker threads (one per core), "
+                "keeping the user interface responsive"
+            ),
+            toggled=functools.partial(
+                self.panel.toggle_processing_option, "use_worker_threads"
+            ),
+        )
+        workers_action.setChecked(Conf.proc.use_worker_threads.get(False))
+        processes_action = self.cra(
+            _("Run computations in separate processes"),
+            tip=_(
+                "Run CPU-bound computations (e.g. contour or peak detection) "
+                "in a pool of processes, data being shared in memory"
+            ),
+            toggled=functools.partial(
+                self.panel.toggle_processing_option, "use_process_pool"
+            ),
+        )
+        processes_action.setChecked(Conf.proc.use_process_pool.get(False))
+        inplace_action = self.cra(
+            _("Apply processing in place"),
+            tip=_(
+                "Replace selected objects data by processing results instead of "
+                "creating new objects (original data is lost)"
+            ),
+            toggled=functools.partial(
+                self.panel.toggle_processing_option, "apply_in_place"
+            ),
+        )
+        inplace_action.setChecked(Conf.proc.apply_in_place.get(False))
+        cache_action = self.cra(
+            _("Cache processing results"),
+            tip=_(
+                "Return cached result when applying again the same processing "
+                "with the same parameters on the same data (data being hashed "
+                "and results stored in memory)"
+            ),
+            toggled=functools.partial(
+                self.panel.toggle_processing_option, "use_result_cache"
+            ),
+        )
+        cache_action.setChecked(Conf.proc.use_result_cache.get(False))
+        return [workers_action, processes_action, inplace_action, cache_action]
+
     @abc.abstractmethod
     def create_computing_actions(self):
         """Create computing actions"""
@@ -319,13 +401,18 @@ class SignalActionHandler(BaseActionHandler):
         polyfit_action = self.cra(_("Polynomial fit"), proc.compute_polyfit)
         mgfit_action = self.cra(_("Multi-Gaussian fit"), proc.compute_multigaussianfit)
 
-        def cra_fit(title, fitdlgfunc):
+        def cra_fit(title, fitdlgfunc, model):
             """Create curve fitting action"""
-            return self.cra(title, lambda: proc.compute_fit(title, fitdlgfunc))
+            fitter = functools.partial(fit.fit_model, model)
+            return self.cra(title, lambda: proc.compute_fit(title, fitdlgfunc, fitter))
 
-        gaussfit_action = cra_fit(_("Gaussian fit"), fitdialog.gaussianfit)
-        lorentzfit_action = cra_fit(_("Lorentzian fit"), fitdialog.lorentzianfit)
-        voigtfit_action = cra_fit(_("Voigt fit"), fitdialog.voigtfit)
+        gaussfit_action = cra_fit(
+            _("Gaussian fit"), fitdialog.gaussianfit, fit.GaussianModel
+        )
+        lorentzfit_action = cra_fit(
+            _("Lorentzian fit"), fitdialog.lorentzianfit, fit.LorentzianModel
+        )
+        voigtfit_action = cra_fit(_("Voigt fit"), fitdialog.voigtfit, fit.VoigtModel)
         actions1 = [normalize_action, deriv_action, integ_action]
         actions2 = [
             gaussfit_action,
@@ -406,7 +493,7 @@ class ImageActionHandler(BaseActionHandler):
         flatfield_act = self.cra(
             _("Flat-field correction"), triggered=proc.flat_field_correction
         )
-        self.actlist_2 += [flatfield_act]
+        self.actlist_2more += [flatfield_act]
         self.actlist_1more += [
             resize_act,
             hflip_act,
@@ -33,6 +33,10 @@ class DockablePlotWidget(DockableWidget):
         """Return plot instance"""
         return self.plotwidget.plot
 
+    def add_widget(self, widget: QW.QWidget) -> None:
+        """Add widget below plotting widget"""
+        self.layout().addWidget(widget)
+
     def setup(self):
         """Setup plotting widget"""
         title = self.toolbar.windowTitle()
@@ -15,6 +15,7 @@ from codraft.config import _
 from codraft.core.io.base import NativeH5Reader, NativeH5Writer
 from codraft.core.io.h5 import H5Importer
 from codraft.core.model.signal import SignalParam
+from codraft.utils.profiler import get_profiler
 from codraft.utils.qthelpers import create_progress_bar, qt_try_loadsave_file
 from codraft.widgets.h5browser import H5BrowserDialog
 
@@ -36,10 +37,12 @@ class H5InputOutput:
 
     def save_file(self, filename):
         """Save all signals and images from CodraFT model into a HDF5 file"""
-        writer = NativeH5Writer(filename)
-        for panel in self.mainwindow.panels:
-            panel.serialize_to_hdf5(writer)
-        writer.close()
+        objs = [list(panel.objlist) for panel in self.mainwindow.panels]
+        with get_profiler().measure("save", filename, objs):
+            writer = NativeH5Writer(filename)
+            for panel in self.mainwindow.panels:
+                panel.serialize_to_hdf5(writer)
+            writer.close()
 
     def open_file(self, filename, import_all, reset_all):
         """Open HDF5 file"""
@@ -51,12 +54,13 @@ class H5InputOutput:
             with create_progress_bar(
                 self.mainwindow, self.__progbartitle(filename), 2
             ) as progress:
-                for idx, panel in enumerate(self.mainwindow.panels):
-                    progress.setValue(idx)
-                    QW.QApplication.processEvents()
-                    panel.deserialize_from_hdf5(reader)
-                    if progress.wasCanceled():
-                        break
+                with get_profiler().measure("open", filename):
+                    for idx, panel in enumerate(self.mainwindow.panels):
+                        progress.setValue(idx)
+                        QW.QApplication.processEvents()
+                        panel.deserialize_from_hdf5(reader)
+                        if progress.wasCanceled():
+                            break
             reader.close()
         except KeyError:
             if progress is not None:
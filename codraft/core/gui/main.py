@@ -51,7 +51,8 @@ from codraft.utils import dephash
 from codraft.utils import qthelpers as qth
 from codraft.widgets.instconfviewer import exec_codraft_installconfig_dialog
 from codraft.widgets.logviewer import exec_codraft_logviewer_dialog
-from codraft.widgets.status import MemoryStatus
+from codraft.widgets.profiler import ProfilerWidget
+from codraft.widgets.status import CacheStatus, MemoryStatus
 
 DATAPATH = get_module_data_path("codraft", "data")
 
@@ -108,8 +109,10 @@ class CodraFTMainWindow(QW.QMainWindow):
         self.__old_size = None
         self.__memory_warning = False
         self.memorystatus = None
+        self.cachestatus = None
 
         self.console = None
+        self.profiler = None
         self.app_proxy = None
         self.signal_toolbar = None
         self.image_toolbar = None
@@ -284,6 +287,8 @@ class CodraFTMainWindow(QW.QMainWindow):
         self.memorystatus = MemoryStatus(Conf.main.available_memory_threshold.get(500))
         self.memorystatus.SIG_MEMORY_ALARM.connect(self.__set_low_memory_state)
         self.statusBar().addPermanentWidget(self.memorystatus)
+        self.cachestatus = CacheStatus()
+        self.statusBar().addPermanentWidget(self.cachestatus)
         self.__setup_commmon_actions()
         curvewidget = self.__add_signal_panel()
         imagewidget = self.__add_image_panel()
@@ -291,6 +296,7 @@ class CodraFTMainWindow(QW.QMainWindow):
         self.__add_menus()
         if console:
             self.__setup_console()
+        self.__setup_profiler()
         # Update selection dependent actions
         self.__update_actions()
         self.signal_image_docks[0].raise_()
@@ -357,6 +363,7 @@ class CodraFTMainWindow(QW.QMainWindow):
         imagevis_toolbar = self.addToolBar(_("Image Visualization Toolbar"))
         imagewidget = DockablePlotWidget(self, ImageWidget, imagevis_toolbar)
         self.imagepanel = ImagePanel(self, imagewidget.plotwidget, self.image_toolbar)
+        imagewidget.add_widget(self.imagepanel.frameslider)
         # -----------------------------------------------------------------------------
         # # Before eventually disabling the "peritem" mode by default, wait for the
         # # guiqwt bug to be fixed (peritem mode is not compatible with multiple image
@@ -511,6 +518,12 @@ class CodraFTMainWindow(QW.QMainWindow):
             lambda txt: self.refresh_lists()
         )
 
+    def __setup_profiler(self):
+        """Add profiler panel (hidden by default: see View menu)"""
+        self.profiler = ProfilerWidget(self)
+        profiler_dock = self.__add_dockwidget(self.profiler, _("Profiler"))
+        profiler_dock.hide()
+
     # ------GUI refresh
     def has_objects(self):
         """Return True if sig/ima panels have any object"""
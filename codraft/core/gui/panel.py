@@ -11,6 +11,8 @@ Signal and Image Panel widgets relie on components:
   * `ObjectProp`: widget handling signal/image properties
   using a guidata DataSet
 
+  * `FrameSlider`: widget selecting the current frame of image stacks
+
   * `core.gui.panel.objectlist.ObjectList`: widget handling signal/image list
 
   * `core.gui.panel.actionhandler.SignalActionHandler` or `ImageActionHandler`:
@@ -37,12 +39,11 @@ from typing import List
 
 import guidata.dataset.qtwidgets as gdq
 import numpy as np
-import pandas
 from guidata.configtools import get_icon
 from guidata.qthelpers import add_actions
 from guidata.utils import update_dataset
 from guidata.widgets.arrayeditor import ArrayEditor
-from guiqwt.io import imread, imwrite, iohandler
+from guiqwt.io import imwrite, iohandler
 from guiqwt.plot import CurveDialog, ImageDialog
 from guiqwt.tools import (
     AnnotatedCircleTool,
@@ -62,24 +63,25 @@ from qtpy import QtWidgets as QW
 from qtpy.compat import getopenfilename, getopenfilenames, getsavefilename
 
 from codraft.config import APP_NAME, Conf, _
+from codraft.core.computation.cache import get_result_cache
 from codraft.core.gui import actionhandler, objectlist, plotitemlist, roieditor
 from codraft.core.gui.processor.image import ImageProcessor
 from codraft.core.gui.processor.signal import SignalProcessor
-from codraft.core.io.conv import data_to_xy
+from codraft.core.io.objects import get_h5_object_name, read_images, read_signals
 from codraft.core.model.base import MetadataItem, ResultShape
 from codraft.core.model.image import (
     ImageDatatypes,
     ImageParam,
-    create_image,
     create_image_from_param,
     new_image_param,
 )
+from codraft.core.model.pipeline import ProcessingGraph
 from codraft.core.model.signal import (
     SignalParam,
-    create_signal,
     create_signal_from_param,
     new_signal_param,
 )
+from codraft.utils.profiler import get_profiler
 from codraft.utils.qthelpers import exec_dialog, qt_try_loadsave_file, save_restore_stds
 
 #  Registering MetadataItem edit widget
@@ -117,6 +119,43 @@ class ObjectProp(QW.QWidget):
         self.properties.get()
 
 
+class FrameSlider(QW.QWidget):
+    """Widget selecting the current frame of image stacks (hidden for other
+    images)"""
+
+    SIG_FRAME_CHANGED = QC.Signal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.slider = QW.QSlider(QC.Qt.Horizontal)
+        self.spinbox = QW.QSpinBox()
+        self.count_label = QW.QLabel()
+        self.slider.valueChanged.connect(self.spinbox.setValue)
+        self.spinbox.valueChanged.connect(self.slider.setValue)
+        self.slider.valueChanged.connect(self.SIG_FRAME_CHANGED.emit)
+        layout = QW.QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QW.QLabel(_("Frame:")))
+        layout.addWidget(self.slider)
+        layout.addWidget(self.spinbox)
+        layout.addWidget(self.count_label)
+        self.setLayout(layout)
+        self.hide()
+
+    def set_image(self, obj: ImageParam) -> None:
+        """Show current frame of image `obj` (hide slider if `obj` is None or
+        is not an image stack)"""
+        is_stack = obj is not None and obj.is_stack
+        if is_stack:
+            for widget in (self.slider, self.spinbox):
+                widget.blockSignals(True)
+                widget.setMaximum(obj.frame_count - 1)
+                widget.setValue(obj.current_frame)
+                widget.blockSignals(False)
+            self.count_label.setText(f"/ {obj.frame_count - 1}")
+        self.setVisible(is_stack)
+
+
 class BasePanelMeta(type(QW.QSplitter), abc.ABCMeta):
     """Mixed metaclass to avoid conflicts"""
 
@@ -156,6 +195,7 @@ class BasePanel(QW.QSplitter, metaclass=BasePanelMeta):
         self.itmlist = None
         self.processor = None
         self.acthandler = None
+        self.pipeline = ProcessingGraph()
         self.__metadata_clipboard = {}
         self.context_menu = QW.QMenu()
         self.__separate_views = {}
@@ -210,12 +250,13 @@ class BasePanel(QW.QSplitter, metaclass=BasePanelMeta):
 
     def add_object(self, obj, refresh=True):
         """Add signal/image object"""
-        self.objlist.append(obj)
-        row = len(self.objlist) - 1
-        item = self.itmlist.add_item_to_plot(row)
-        if refresh:
-            self.objlist.refresh_list(-1)
-        self.SIG_OBJECT_ADDED.emit()
+        with get_profiler().measure("add_object", obj.title, [obj]):
+            self.objlist.append(obj)
+            row = len(self.objlist) - 1
+            item = self.itmlist.add_item_to_plot(row)
+            if refresh:
+                self.objlist.refresh_list(-1)
+            self.SIG_OBJECT_ADDED.emit()
         return item
 
     # TODO: [P2] New feature: move objects up/down
@@ -279,6 +320,7 @@ class BasePanel(QW.QSplitter, metaclass=BasePanelMeta):
             for dlg, obj in self.__separate_views.items():
                 if obj is self.objlist[row]:
                     dlg.done(QW.QDialog.DialogCode.Rejected)
+            self.pipeline.remove_object(self.objlist[row])
             del self.objlist[row]
             del self.itmlist[row]
         self.objlist.refresh_list(0)
@@ -302,6 +344,7 @@ class BasePanel(QW.QSplitter, metaclass=BasePanelMeta):
         """Remove all signal/image objects"""
         for dlg in self.__separate_views:
             dlg.done(QW.QDialog.DialogCode.Rejected)
+        self.pipeline.clear()
         self.objlist.remove_all()
         self.itmlist.remove_all()
         self.objlist.refresh_list(0)
@@ -391,9 +434,7 @@ class BasePanel(QW.QSplitter, metaclass=BasePanelMeta):
         """Serialize objects to a HDF5 file"""
         with writer.group(self.H5_PREFIX):
             for idx, obj in enumerate(self.objlist):
-                title = re.sub("[^-a-zA-Z0-9_.() ]+", "", obj.title.replace("/", "_"))
-                name = f"{self.PREFIX}{idx:03d}: {title}"
-                with writer.group(name):
+                with writer.group(get_h5_object_name(obj, idx)):
                     obj.serialize(writer)
 
     def deserialize_from_hdf5(self, reader):
@@ -482,6 +523,16 @@ class BasePanel(QW.QSplitter, metaclass=BasePanelMeta):
             obj.metadata[obj.METADATA_LBL] = state
         self.SIG_REFRESH_PLOT.emit()
 
+    def toggle_processing_option(self, name: str, state: bool) -> None:
+        """Toggle processing option `name` (see `Conf.proc`): worker threads
+        ("use_worker_threads"), process pool ("use_process_pool"), in-place
+        processing ("apply_in_place") or result cache ("use_result_cache", up to
+        `result_cache_size` MB, cache being cleared when disabled)"""
+        getattr(Conf.proc, name).set(state)
+        if name == "use_result_cache":
+            size = Conf.proc.result_cache_size.get(512) if state else 0
+            get_result_cache().max_nbytes = size * 1024**2
+
     def create_new_dialog(
         self,
         rows,
@@ -694,20 +745,11 @@ class SignalPanel(BasePanel):
 
     def open_object(self, filename: str) -> None:
         """Open object from file (signal/image)"""
-        if osp.splitext(filename)[1] == ".npy":
-            xydata = np.load(filename)
-        else:
-            xydata_dataframe = pandas.read_csv(filename, comment="#")
-            xydata = xydata_dataframe.to_numpy()
-        assert len(xydata.shape) in (1, 2), "Data not supported"
-        signal = create_signal(osp.basename(filename))
-        signal.xlabel, signal.ylabel = xydata_dataframe.columns[:2]
-        if len(xydata.shape) == 1:
-            signal.set_xydata(np.arange(xydata.size), xydata)
-        else:
-            x, y, dx, dy = data_to_xy(xydata)
-            signal.set_xydata(x, y, dx, dy)
-        self.add_object(signal)
+        with get_profiler().measure("open", filename) as record:
+            signals = list(read_signals(filename))
+            record.set_outputs(signals)
+        for signal in signals:
+            self.add_object(signal)
 
     def save_object(self, obj, filename: str = None) -> None:
         """Save object to file (signal/image)"""
@@ -720,13 +762,14 @@ class SignalPanel(BasePanel):
         if filename:
             with qt_try_loadsave_file(self.parent(), filename, "save"):
                 Conf.main.base_dir.set(filename)
-                np.savetxt(
-                    filename,
-                    obj.xydata.T,
-                    header=",".join([obj.xlabel or "X", obj.ylabel or "Y"]),
-                    delimiter=",",
-                    comments="",
-                )
+                with get_profiler().measure("save", filename, [obj]):
+                    np.savetxt(
+                        filename,
+                        obj.xydata.T,
+                        header=",".join([obj.xlabel or "X", obj.ylabel or "Y"]),
+                        delimiter=",",
+                        comments="",
+                    )
 
 
 class ImagePanel(BasePanel):
@@ -760,9 +803,23 @@ class ImagePanel(BasePanel):
         self.acthandler = actionhandler.ImageActionHandler(
             self, self.objlist, self.itmlist, self.processor, toolbar
         )
+        self.frameslider = FrameSlider()
+        self.frameslider.SIG_FRAME_CHANGED.connect(self.frame_changed)
         self.setup_panel()
 
     # ------Refreshing GUI--------------------------------------------------------------
+    def current_item_changed(self, row):
+        """Current item changed"""
+        super().current_item_changed(row)
+        self.frameslider.set_image(None if row == -1 else self.objlist[row])
+
+    def frame_changed(self, index: int) -> None:
+        """Frame slider value changed: show frame `index` of current image stack"""
+        row = self.objlist.currentRow()
+        if row != -1:
+            self.objlist[row].current_frame = index
+            self.itmlist.refresh_item(row)
+
     def properties_changed(self):
         """The properties 'Apply' button was clicked: updating signal"""
         row = self.objlist.currentRow()
@@ -792,24 +849,10 @@ class ImagePanel(BasePanel):
 
     def open_object(self, filename: str) -> None:
         """Open object from file (signal/image)"""
-        data = imread(filename, to_grayscale=False)
-        if filename.lower().endswith(".sif") and len(data.shape) == 3:
-            for idx in range(data.shape[0]):
-                image = create_image(
-                    osp.basename(filename) + "_Im" + str(idx), data[idx, ::]
-                )
-                self.add_object(image)
-        else:
-            if data.ndim == 3:
-                # Converting to grayscale
-                data = data[..., :4].mean(axis=2)
-            image = create_image(osp.basename(filename), data)
-            if osp.splitext(filename)[1].lower() == ".dcm":
-                from pydicom import dicomio  # pylint: disable=C0415,E0401
-
-                image.dicom_template = dicomio.read_file(
-                    filename, stop_before_pixels=True, force=True
-                )
+        with get_profiler().measure("open", filename) as record:
+            images = list(read_images(filename))
+            record.set_outputs(images)
+        for image in images:
             self.add_object(image)
 
     def save_object(self, obj, filename: str = None) -> None:
@@ -831,7 +874,8 @@ class ImagePanel(BasePanel):
                 kwargs["template"] = obj.dicom_template
             with qt_try_loadsave_file(self.parent(), filename, "save"):
                 Conf.main.base_dir.set(filename)
-                imwrite(filename, obj.data, **kwargs)
+                with get_profiler().measure("save", filename, [obj]):
+                    imwrite(filename, obj.data, **kwargs)
 
     def toggle_show_contrast(self, state):
         """Toggle show contrast option"""
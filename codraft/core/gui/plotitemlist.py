@@ -17,6 +17,7 @@ from guiqwt.label import LegendBoxItem
 from guiqwt.styles import style_generator
 
 from codraft.config import Conf
+from codraft.utils.profiler import profiled
 
 
 class BaseItemList:
@@ -79,6 +80,12 @@ class BaseItemList:
         """Update plot item associated to data"""
         self.objlist[row].update_item(self[row], ref_item=ref_item)
 
+    def refresh_item(self, row):
+        """Refresh plot item associated to data at row (plot scales are kept)"""
+        if row < len(self) and self[row] is not None:
+            self.update_item(row)
+            self.plot.replot()
+
     def add_shapes(self, row):
         """Add geometric shape items associated to computed results and annotations"""
         obj = self.objlist[row]
@@ -98,6 +105,7 @@ class BaseItemList:
             self.plot.del_items(self.__shapeitems)
         self.__shapeitems = []
 
+    @profiled("refresh_plot")
     def refresh_plot(self):
         """Refresh plot"""
         rows = self.objlist.get_selected_rows()
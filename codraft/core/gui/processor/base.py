@@ -10,10 +10,11 @@ CodraFT Base Processor GUI module
 # pylint: disable=invalid-name  # Allows short reference names like x, y, ...
 
 import abc
+import concurrent.futures as cf
+import functools
 import warnings
 from typing import Callable, Dict, List
 
-import guidata.dataset.dataitems as gdi
 import guidata.dataset.datatypes as gdt
 import numpy as np
 from guidata.configtools import get_icon
@@ -22,53 +23,40 @@ from qtpy import QtCore as QC
 from qtpy import QtWidgets as QW
 
 from codraft import env
-from codraft.config import _
+from codraft.config import Conf, _
+from codraft.core.computation import fft, parallel, reduction
+from codraft.core.computation.cache import get_result_cache
+from codraft.core.computation.stats import get_stats
 from codraft.core.gui.objectlist import ObjectList
 from codraft.core.gui.roieditor import ROIEditorData
 from codraft.core.model.base import ResultShape
+from codraft.core.processing import get_operation
+from codraft.core.processing.base import (
+    ClipParam,
+    FFTParam,
+    GaussianParam,
+    IFFTParam,
+    MovingAverageParam,
+    MovingMedianParam,
+    ThresholdParam,
+)
 from codraft.utils import misc
+from codraft.utils.profiler import get_profiler
 from codraft.utils.qthelpers import (
     create_progress_bar,
     exec_dialog,
+    qt_handle_error_message,
     qt_try_except,
 )
 
 
-class GaussianParam(gdt.DataSet):
-    """Gaussian filter parameters"""
-
-    sigma = gdi.FloatItem("σ", default=1.0)
-
-
-class MovingAverageParam(gdt.DataSet):
-    """Moving average parameters"""
-
-    n = gdi.IntItem(_("Size of the moving window"), default=3, min=1)
-
-
-class MovingMedianParam(gdt.DataSet):
-    """Moving median parameters"""
-
-    n = gdi.IntItem(_("Size of the moving window"), default=3, min=1, even=False)
-
-
-class ThresholdParam(gdt.DataSet):
-    """Threshold parameters"""
-
-    value = gdi.FloatItem(_("Threshold"))
-
-
-class ClipParam(gdt.DataSet):
-    """Data clipping parameters"""
-
-    value = gdi.FloatItem(_("Clipping value"))
-
-
 class BaseProcessor(QC.QObject):
     """Object handling data processing: operations, processing, computing"""
 
     SIG_ADD_SHAPE = QC.Signal(int)
     EDIT_ROI_PARAMS = False
+    WORKER_POLL_INTERVAL = 0.05  # Seconds between GUI event processing
+    BATCH_SIZE = 64  # Objects processed at once by batch functions (compute_10)
 
     def __init__(self, panel, objlist: ObjectList, plotwidget):
         super().__init__()
@@ -77,60 +65,68 @@ class BaseProcessor(QC.QObject):
         self.plotwidget = plotwidget
         self.prefix = panel.PREFIX
 
-    @qt_try_except()
-    def compute_sum(self):
-        """Compute sum"""
+    def __compute_reduction(self, method: str, title: str, merge: bool = False):
+        """Compute element-wise reduction of selected objects (streaming
+        computation: see `codraft.core.computation.reduction`)
+
+        :param str method: reduction method
+        :param str title: output object title
+        :param bool merge: if True, merge result shapes and ROIs of selected
+         objects into output object
+        """
         rows = self.objlist.get_selected_rows()
+        objs = [self.objlist[row] for row in rows]
+        dtype = np.result_type(*[obj.data.dtype for obj in objs])
         outobj = self.panel.create_object()
-        outobj.title = "+".join([f"{self.prefix}{row:03d}" for row in rows])
-        roilist = []
-        for row in rows:
-            obj = self.objlist[row]
-            if obj.roi is not None:
-                roilist.append(obj.roi)
-            if outobj.data is None:
-                outobj.copy_data_from(obj)
-            else:
-                outobj.data += np.array(obj.data, dtype=outobj.data.dtype)
+        outobj.title = title
+        outobj.copy_data_from(objs[0])
+        if merge:
+            roilist = [obj.roi for obj in objs if obj.roi is not None]
+            if roilist:
+                outobj.roi = np.vstack(roilist)
+            for obj in objs[1:]:
                 outobj.update_resultshapes_from(obj)
-        if roilist:
-            outobj.roi = np.vstack(roilist)
+        data = reduction.reduce_arrays([obj.data for obj in objs], method, dtype=dtype)
+        if method in ("sum", "prod") or (
+            method == "mean" and misc.is_integer_dtype(dtype)
+        ):
+            data = reduction.cast_result(data, dtype)
+        outobj.data = data
         self.panel.add_object(outobj)
 
+    def __get_rows_title(self, separator: str) -> str:
+        """Return title made of selected objects short names"""
+        rows = self.objlist.get_selected_rows()
+        return separator.join([f"{self.prefix}{row:03d}" for row in rows])
+
+    @qt_try_except()
+    def compute_sum(self):
+        """Compute sum"""
+        self.__compute_reduction("sum", self.__get_rows_title("+"), merge=True)
+
     @qt_try_except()
     def compute_average(self):
         """Compute average"""
-        rows = self.objlist.get_selected_rows()
-        outobj = self.panel.create_object()
-        title = ", ".join([f"{self.prefix}{row:03d}" for row in rows])
-        outobj.title = f'{_("Average")}({title})'
-        original_dtype = self.objlist.get_sel_object().data.dtype
-        new_dtype = complex if misc.is_complex_dtype(original_dtype) else float
-        for row in rows:
-            obj = self.objlist[row]
-            if outobj.data is None:
-                outobj.copy_data_from(obj, dtype=new_dtype)
-            else:
-                outobj.data += np.array(obj.data, dtype=outobj.data.dtype)
-                outobj.update_resultshapes_from(obj)
-        outobj.data /= float(len(rows))
-        if misc.is_integer_dtype(original_dtype):
-            outobj.set_data_type(dtype=original_dtype)
-        self.panel.add_object(outobj)
+        title = f'{_("Average")}({self.__get_rows_title(", ")})'
+        self.__compute_reduction("mean", title, merge=True)
 
     @qt_try_except()
     def compute_product(self):
         """Compute product"""
-        rows = self.objlist.get_selected_rows()
-        outobj = self.panel.create_object()
-        outobj.title = "*".join([f"{self.prefix}{row:03d}" for row in rows])
-        for row in rows:
-            obj = self.objlist[row]
-            if outobj.data is None:
-                outobj.copy_data_from(obj)
-            else:
-                outobj.data *= np.array(obj.data, dtype=outobj.data.dtype)
-        self.panel.add_object(outobj)
+        self.__compute_reduction("prod", self.__get_rows_title("*"))
+
+    @qt_try_except()
+    def compute_reduction(self, method: str):
+        """Compute element-wise reduction of selected objects: `method` is one
+        of "min", "max", "std" or "median" (see `reduction.reduce_arrays`)"""
+        names = {
+            "min": _("Minimum"),
+            "max": _("Maximum"),
+            "std": "σ",
+            "median": _("Median"),
+        }
+        title = f'{names[method]}({self.__get_rows_title(", ")})'
+        self.__compute_reduction(method, title)
 
     @qt_try_except()
     def compute_difference(self, quad: bool):
@@ -142,7 +138,7 @@ class BaseProcessor(QC.QObject):
             outobj.title = f"({outobj.title})/sqrt(2)"
         obj0, obj1 = self.objlist.get_sel_object(), self.objlist.get_sel_object(1)
         outobj.copy_data_from(obj0)
-        outobj.data -= np.array(obj1.data, dtype=outobj.data.dtype)
+        outobj.data = outobj.data - np.array(obj1.data, dtype=outobj.data.dtype)
         if quad:
             outobj.data = outobj.data / np.sqrt(2.0)
         if np.issubdtype(outobj.data.dtype, np.unsignedinteger):
@@ -188,23 +184,85 @@ class BaseProcessor(QC.QObject):
     def extract_roi(self, roidata: np.ndarray = None) -> None:
         """Extract Region Of Interest (ROI) from data"""
 
-    @abc.abstractmethod
     def swap_axes(self):
         """Swap data axes"""
+        self._compute_operation11("swap_axes")
 
-    @abc.abstractmethod
     def compute_abs(self):
         """Compute absolute value"""
+        self._compute_operation11("abs")
 
-    @abc.abstractmethod
     def compute_log10(self):
         """Compute Log10"""
+        self._compute_operation11("log10")
 
     # ------Data Processing
+    @staticmethod
     @abc.abstractmethod
+    def _apply_11_func(obj, orig, func, param):
+        """Apply 11 function: 1 object in --> 1 object out
+        (no GUI interaction: may be called from a worker thread)"""
+
+    @staticmethod
+    @abc.abstractmethod
+    def _apply_11_func_in_place(obj, func, param, inplace_kinds):
+        """Apply 11 function in place: object data is replaced by the result
+        (no GUI interaction: may be called from a worker thread)"""
+
     def apply_11_func(self, obj, orig, func, param, message):
         """Apply 11 function: 1 object in --> 1 object out"""
 
+        # (self is used by @qt_try_except)
+        # pylint: disable=unused-argument
+        @qt_try_except(message)
+        def apply_11_func_callback(self, obj, orig, func, param):
+            """Apply 11 function callback: 1 object in --> 1 object out"""
+            self.__apply_11_func_profiled(obj, orig, func, param)
+
+        return apply_11_func_callback(self, obj, orig, func, param)
+
+    def __apply_11_func_profiled(self, obj, orig, func, param):
+        """Apply 11 function (see `_apply_11_func`), profiling the call if
+        profiler is enabled"""
+        with get_profiler().measure("compute_11", obj.title, [orig]) as record:
+            self._apply_11_func(obj, orig, func, param)
+            record.set_outputs(obj)
+
+    @staticmethod
+    def _use_workers() -> bool:
+        """Return True if computations have to be run on worker threads"""
+        use_threads = Conf.proc.use_worker_threads.get(False)
+        return use_threads or Conf.proc.use_process_pool.get(False)
+
+    @staticmethod
+    def _get_process_func(func: Callable) -> Callable:
+        """Return function running `func` in a worker process (data arrays being
+        handed to the process through shared memory) if process pool option is
+        enabled and if `func` may be sent to another process, return `func`
+        otherwise"""
+        if Conf.proc.use_process_pool.get(False):
+            engine = parallel.get_process_engine()
+            if engine is not None and engine.is_picklable(func):
+                return functools.partial(engine.run, func)
+        return func
+
+    def _get_cached_func(self, func: Callable) -> Callable:
+        """Return function computing `func` results (see `_get_process_func`),
+        unless they are available in the result cache (if enabled, see
+        `codraft.core.gui.panel.BasePanel.toggle_processing_option`)"""
+        return get_result_cache().wrap(func, self._get_process_func(func))
+
+    def __wait_for_job(self, job: cf.Future, jobs: List[cf.Future], progress) -> bool:
+        """Wait for job to be done while processing GUI events. Return False
+        (after cancelling pending jobs) if progress dialog was cancelled"""
+        while not job.done():
+            QW.QApplication.processEvents()
+            if progress.wasCanceled():
+                parallel.cancel_jobs(jobs)
+                return False
+            cf.wait([job], timeout=self.WORKER_POLL_INTERVAL)
+        return True
+
     def compute_11(
         self,
         name: str,
@@ -213,12 +271,48 @@ class BaseProcessor(QC.QObject):
         suffix: Callable = None,
         func_obj: Callable = None,
         edit: bool = True,
+        in_place: bool = None,
+        inplace_kinds: str = "",
     ):
-        """Compute 11 function: 1 object in --> 1 object out"""
+        """Compute 11 function: 1 object in --> 1 object out
+
+        If `in_place` is True (default: "Apply processing in place" option),
+        selected objects data is replaced by the result instead of creating new
+        objects: the result is written into data if data type kind is in
+        `inplace_kinds` (`func` having an `out` keyword argument, see
+        `codraft.core.processing.base.Operation11`)"""
         if param is not None:
             if edit and not param.edit(parent=self.panel.parent()):
                 return
-        self._compute_11_subroutine([name], func, [param], suffix, func_obj)
+        if in_place is None:
+            in_place = Conf.proc.apply_in_place.get(False)
+        if in_place:
+            self.__compute_11_in_place(
+                name, func, param, suffix, func_obj, inplace_kinds
+            )
+        else:
+            self._compute_11_subroutine([name], func, [param], suffix, func_obj)
+
+    def _compute_operation11(
+        self,
+        name: str,
+        param: gdt.DataSet = None,
+        edit: bool = True,
+        in_place: bool = None,
+    ) -> None:
+        """Compute registered operation `name` (see `codraft.core.processing`):
+        1 object in --> 1 object out (see `compute_11` for `in_place`)"""
+        operation = get_operation(self.panel.PARAMCLASS, name)
+        self.compute_11(
+            operation.title,
+            operation.func,
+            param,
+            suffix=operation.suffix,
+            func_obj=operation.func_obj,
+            edit=edit,
+            in_place=in_place,
+            inplace_kinds=operation.inplace_kinds,
+        )
 
     def compute_1n(
         self,
@@ -246,6 +340,10 @@ class BaseProcessor(QC.QObject):
     ):
         """Compute 11 subroutine: used by compute 11 and compute 1n methods"""
         rows = self.objlist.get_selected_rows()
+        if self._use_workers():
+            self.__compute_11_in_workers(rows, names, func, params, suffix, func_obj)
+            return
+        compute_func = self._get_cached_func(func)
         with create_progress_bar(
             self.panel, names[0], max_=len(rows) * len(params)
         ) as progress:
@@ -257,23 +355,262 @@ class BaseProcessor(QC.QObject):
                     if progress.wasCanceled():
                         break
                     orig = self.objlist[row]
-                    obj = self.panel.create_object()
-                    obj.title = f"{name}({self.prefix}{row:03d})"
-                    if suffix is not None:
-                        obj.title += "|" + suffix(param)
-                    obj.copy_data_from(orig)
+                    obj = self.__create_11_object(orig, row, name, param, suffix)
                     message = _("Computing:") + " " + obj.title
-                    self.apply_11_func(obj, orig, func, param, message)
-                    if func_obj is not None:
-                        if param is None:
-                            func_obj(obj)
-                        else:
-                            func_obj(obj, param)
-                    self.panel.add_object(obj)
+                    self.apply_11_func(obj, orig, compute_func, param, message)
+                    self.__add_11_object(obj, orig, func, param, func_obj)
+
+    def __create_11_object(self, orig, row: int, name: str, param, suffix: Callable):
+        """Create 11 function output object"""
+        obj = self.panel.create_object()
+        obj.title = f"{name}({self.prefix}{row:03d})"
+        if suffix is not None:
+            obj.title += "|" + suffix(param)
+        obj.copy_data_from(orig)
+        return obj
 
-    @abc.abstractmethod
-    def apply_10_func(self, orig, func, param, message) -> ResultShape:
+    @staticmethod
+    def __finalize_11_object(obj, param, func_obj: Callable):
+        """Finalize 11 function output object"""
+        if func_obj is not None:
+            if param is None:
+                func_obj(obj)
+            else:
+                func_obj(obj, param)
+
+    def __add_11_object(self, obj, orig, func: Callable, param, func_obj: Callable):
+        """Finalize 11 function output object, add it to panel and record the
+        processing step in panel pipeline"""
+        self.__finalize_11_object(obj, param, func_obj)
+        self.panel.add_object(obj)
+        recompute = functools.partial(
+            self.__recompute_11_object, func=func, param=param, func_obj=func_obj
+        )
+        self.panel.pipeline.add_step(obj, [orig], recompute)
+
+    def __recompute_11_object(self, obj, sources: List, func, param, func_obj):
+        """Compute again 11 function output object from its source object
+        (processing pipeline step)"""
+        orig = sources[0]
+        obj.copy_data_from(orig)
+        compute_func = self._get_cached_func(func)
+        self.__apply_11_func_profiled(obj, orig, compute_func, param)
+        self.__finalize_11_object(obj, param, func_obj)
+
+    def __compute_11_in_workers(
+        self,
+        rows: List[int],
+        names: List,
+        func: Callable,
+        params: List,
+        suffix: Callable,
+        func_obj: Callable,
+    ):
+        """Compute 11 subroutine, running computations on worker threads:
+        output objects are added to panel (in selection order) as soon as they
+        are available, and pending computations are cancelled when the progress
+        dialog is cancelled"""
+        jobs = []
+        compute_func = self._get_cached_func(func)
+        for row in rows:
+            orig = self.objlist[row]
+            for param, name in zip(params, names):
+                obj = self.__create_11_object(orig, row, name, param, suffix)
+                jobs.append((obj, orig, compute_func, param))
+        futures = parallel.submit_jobs(self.__apply_11_func_profiled, jobs)
+        with create_progress_bar(self.panel, names[0], max_=len(jobs)) as progress:
+            for index, ((obj, orig, _func, param), future) in enumerate(
+                zip(jobs, futures)
+            ):
+                progress.setValue(index)
+                progress.setLabelText(_("Computing:") + " " + obj.title)
+                if not self.__wait_for_job(future, futures, progress):
+                    return
+                try:
+                    future.result()
+                except Exception as msg:  # pylint: disable=broad-except
+                    qt_handle_error_message(self.panel.parent(), msg)
+                    continue
+                self.__add_11_object(obj, orig, func, param, func_obj)
+
+    def __compute_11_in_place(
+        self,
+        name: str,
+        func: Callable,
+        param: gdt.DataSet,
+        suffix: Callable,
+        func_obj: Callable,
+        inplace_kinds: str,
+    ):
+        """Compute 11 function in place: selected objects data is replaced by the
+        result, and their plot items are updated (instead of being created)"""
+        rows = self.objlist.get_selected_rows()
+        with create_progress_bar(self.panel, name, max_=len(rows)) as progress:
+            for index, row in enumerate(rows):
+                obj = self.objlist[row]
+                progress.setValue(index)
+                progress.setLabelText(_("Computing:") + " " + obj.title)
+                QW.QApplication.processEvents()
+                if progress.wasCanceled():
+                    break
+                title = f"{name}({obj.title})"
+                if suffix is not None:
+                    title += "|" + suffix(param)
+                message = _("Computing:") + " " + title
+
+                # (self is used by @qt_try_except)
+                # pylint: disable=unused-argument
+                @qt_try_except(message)
+                def apply_in_place_callback(self, obj, title: str) -> bool:
+                    """Apply 11 function in place callback"""
+                    with get_profiler().measure("compute_11", title, [obj]) as record:
+                        self._apply_11_func_in_place(obj, func, param, inplace_kinds)
+                        record.set_outputs(obj)
+                    return True
+
+                if not apply_in_place_callback(self, obj, title):
+                    continue
+                obj.title = title
+                self.__finalize_11_object(obj, param, func_obj)
+                step = self.panel.pipeline.get_step(obj)
+                if step is not None:
+                    # Object is computed by a processing step: processing it again
+                    # in place after computing it
+                    step.func = functools.partial(
+                        self.__recompute_11_in_place,
+                        previous=step.func,
+                        func=func,
+                        param=param,
+                        func_obj=func_obj,
+                        inplace_kinds=inplace_kinds,
+                    )
+        self.objlist.refresh_list()
+        self.panel.current_item_changed(self.objlist.currentRow())
+        self.panel.SIG_REFRESH_PLOT.emit()
+
+    def __recompute_11_in_place(
+        self, obj, sources: List, previous, func, param, func_obj, inplace_kinds
+    ):
+        """Compute again object processed in place (processing pipeline step):
+        object is computed again from its sources, then processed in place"""
+        previous(obj, sources)
+        self._apply_11_func_in_place(obj, func, param, inplace_kinds)
+        self.__finalize_11_object(obj, param, func_obj)
+
+    @qt_try_except()
+    def recompute_downstream(self) -> None:
+        """Compute again processing steps depending on selected objects (or
+        computing them), if their inputs have changed since they were computed"""
+        objs = self.objlist.get_sel_objects()
+        steps = self.panel.pipeline.get_downstream_steps(objs)
+        title = _("Recompute downstream")
+        with create_progress_bar(self.panel, title, max_=len(steps)) as progress:
+            counter = iter(range(len(steps)))
+
+            def update_progress(obj) -> bool:
+                """Update progress dialog before computing step"""
+                progress.setValue(next(counter))
+                progress.setLabelText(_("Computing:") + " " + obj.title)
+                QW.QApplication.processEvents()
+                return not progress.wasCanceled()
+
+            try:
+                self.panel.pipeline.recompute(objs, update_progress)
+            finally:
+                # Plot items of selected objects are updated from objects data
+                self.panel.SIG_REFRESH_PLOT.emit()
+
+    @staticmethod
+    def _apply_10_func(orig, func, param) -> ResultShape:
+        """Apply 10 function: 1 object in --> 0 object out (scalar result)
+        (no GUI interaction: may be called from a worker thread)"""
+        if param is None:
+            return func(orig)
+        return func(orig, param)
+
+    def apply_10_func(self, orig, func, param, title: str) -> ResultShape:
         """Apply 10 function: 1 object in --> 0 object out (scalar result)"""
+        message = _("Computing:") + " " + title
+
+        # (self is used by @qt_try_except)
+        # pylint: disable=unused-argument
+        @qt_try_except(message)
+        def apply_10_func_callback(self, orig, func, param):
+            """Apply 10 function cb: 1 object in --> 0 object out (scalar result)"""
+            return self.__apply_10_func_profiled(orig, func, param, title)
+
+        return apply_10_func_callback(self, orig, func, param)
+
+    def __apply_10_func_profiled(self, orig, func, param, title: str) -> ResultShape:
+        """Apply 10 function (see `_apply_10_func`), profiling the call if
+        profiler is enabled"""
+        with get_profiler().measure("compute_10", title, [orig]) as record:
+            result = self._apply_10_func(orig, func, param)
+            if result is not None:
+                record.set_outputs(result.array)
+            return result
+
+    @staticmethod
+    def _apply_10_batch_func(origs, batch_func, param, title: str) -> list:
+        """Apply 10 batch function: N objects in --> 0 object out (one scalar
+        result per object, see `Operation10.apply_batch`), profiling the call if
+        profiler is enabled (no GUI interaction: may be called from a worker
+        thread)"""
+        with get_profiler().measure("compute_10", title, origs) as record:
+            results = batch_func(origs, param)
+            record.set_outputs(
+                *[result.array for result in results if result is not None]
+            )
+            return results
+
+    def __compute_10_batch(
+        self,
+        rows: List[int],
+        name: str,
+        func: Callable,
+        param: gdt.DataSet,
+        title_suffix: str,
+        batch_func: Callable,
+    ) -> Dict[int, ResultShape]:
+        """Compute 10 function with batch function `batch_func`: selected objects
+        are processed by chunks of `BATCH_SIZE` objects (on a worker thread if
+        worker threads are enabled), progress dialog being updated between
+        chunks. If a chunk fails, its objects are processed one by one with
+        `func`, so that an error only affects the object causing it."""
+        results = {}
+        with create_progress_bar(self.panel, name, max_=len(rows)) as progress:
+            for start in range(0, len(rows), self.BATCH_SIZE):
+                progress.setValue(start)
+                QW.QApplication.processEvents()
+                if progress.wasCanceled():
+                    break
+                chunk = rows[start : start + self.BATCH_SIZE]
+                origs = [self.objlist[row] for row in chunk]
+                title = f"{name}({len(chunk)} objects){title_suffix}"
+                args = (origs, batch_func, param, title)
+                try:
+                    if self._use_workers():
+                        jobs = parallel.submit_jobs(self._apply_10_batch_func, [args])
+                        if not self.__wait_for_job(jobs[0], jobs, progress):
+                            break
+                        chunk_results = jobs[0].result()
+                    else:
+                        chunk_results = self._apply_10_batch_func(*args)
+                except Exception:  # pylint: disable=broad-except
+                    chunk_results = [
+                        self.apply_10_func(
+                            orig,
+                            func,
+                            param,
+                            f"{name}({self.prefix}{row:03d}){title_suffix}",
+                        )
+                        for row, orig in zip(chunk, origs)
+                    ]
+                for row, result in zip(chunk, chunk_results):
+                    if result is not None:
+                        results[row] = result
+                        self.__show_10_result(row)
+        return results
 
     def compute_10(
         self,
@@ -282,34 +619,47 @@ class BaseProcessor(QC.QObject):
         param: gdt.DataSet = None,
         suffix: Callable = None,
         edit: bool = True,
+        batch_func: Callable = None,
     ) -> Dict[int, ResultShape]:
         """Compute 10 function: 1 object in --> 0 object out
-        (the result of this method is stored in original object's metadata)"""
+        (the result of this method is stored in original object's metadata)
+
+        If `batch_func` is specified (function taking objects list and
+        parameters, and returning one result per object, see
+        `Operation10.apply_batch`), selected objects are processed by chunks
+        (see `__compute_10_batch`)"""
         if param is not None:
             if edit and not param.edit(parent=self.panel.parent()):
                 return None
         rows = self.objlist.get_selected_rows()
-        with create_progress_bar(self.panel, name, max_=len(rows)) as progress:
-            results = {}
-            xlabels = None
-            ylabels = []
-            title_suffix = "" if suffix is None else "|" + suffix(param)
-            for idx, row in enumerate(rows):
-                progress.setValue(idx)
-                QW.QApplication.processEvents()
-                if progress.wasCanceled():
-                    break
-                orig = self.objlist[row]
-                title = f"{name}{title_suffix}"
-                message = _("Computing:") + " " + title
-                result = self.apply_10_func(orig, func, param, message)
-                if result is None:
-                    continue
-                results[row] = result
+        title_suffix = "" if suffix is None else "|" + suffix(param)
+        if batch_func is not None and len(rows) > 1:
+            results = self.__compute_10_batch(
+                rows, name, func, param, title_suffix, batch_func
+            )
+        elif self._use_workers():
+            results = self.__compute_10_in_workers(rows, name, func, param, suffix)
+        else:
+            with create_progress_bar(self.panel, name, max_=len(rows)) as progress:
+                results = {}
+                for idx, row in enumerate(rows):
+                    progress.setValue(idx)
+                    QW.QApplication.processEvents()
+                    if progress.wasCanceled():
+                        break
+                    orig = self.objlist[row]
+                    title = f"{name}({self.prefix}{row:03d}){title_suffix}"
+                    result = self.apply_10_func(orig, func, param, title)
+                    if result is None:
+                        continue
+                    results[row] = result
+                    self.__show_10_result(row)
+        xlabels = None
+        ylabels = []
+        for idx, row in enumerate(rows):
+            if row in results:
+                result = results[row]
                 xlabels = result.xlabels
-                self.SIG_ADD_SHAPE.emit(row)
-                self.panel.current_item_changed(row)
-                self.panel.SIG_REFRESH_PLOT.emit()
                 for _i_row_res in range(result.array.shape[0]):
                     ylabel = f"{name}({self.prefix}{idx:03d}){title_suffix}"
                     ylabels.append(ylabel)
@@ -327,15 +677,88 @@ class BaseProcessor(QC.QObject):
                 exec_dialog(dlg)
         return results
 
+    def _compute_operation10(
+        self, name: str, param: gdt.DataSet = None, edit: bool = True
+    ) -> Dict[int, ResultShape]:
+        """Compute registered operation `name` (see `codraft.core.processing`):
+        1 object in --> 0 object out (see `compute_10`)"""
+        operation = get_operation(self.panel.PARAMCLASS, name)
+        func = operation
+        if operation.kernel is not None:
+            kernel = self._get_process_func(operation.kernel)
+            func = functools.partial(operation, kernel=kernel)
+        batch_func = None
+        if operation.batch_func is not None:
+            batch_func = operation.apply_batch
+        return self.compute_10(
+            operation.title, func, param, edit=edit, batch_func=batch_func
+        )
+
+    def __show_10_result(self, row: int) -> None:
+        """Show 10 function result (stored in object's metadata)"""
+        self.SIG_ADD_SHAPE.emit(row)
+        self.panel.current_item_changed(row)
+        self.panel.SIG_REFRESH_PLOT.emit()
+
+    def __compute_10_in_workers(
+        self,
+        rows: List[int],
+        name: str,
+        func: Callable,
+        param: gdt.DataSet,
+        suffix: Callable,
+    ) -> Dict[int, ResultShape]:
+        """Compute 10 function, running computations on worker threads:
+        results are shown as soon as they are available (in selection order),
+        and pending computations are cancelled when the progress dialog is
+        cancelled"""
+        results = {}
+        title_suffix = "" if suffix is None else "|" + suffix(param)
+        jobs = [
+            (
+                self.objlist[row],
+                func,
+                param,
+                f"{name}({self.prefix}{row:03d}){title_suffix}",
+            )
+            for row in rows
+        ]
+        futures = parallel.submit_jobs(self.__apply_10_func_profiled, jobs)
+        with create_progress_bar(self.panel, name, max_=len(rows)) as progress:
+            for idx, (row, future) in enumerate(zip(rows, futures)):
+                progress.setValue(idx)
+                if not self.__wait_for_job(future, futures, progress):
+                    break
+                try:
+                    result = future.result()
+                except Exception as msg:  # pylint: disable=broad-except
+                    qt_handle_error_message(self.panel.parent(), msg)
+                    continue
+                if result is not None:
+                    results[row] = result
+                    self.__show_10_result(row)
+        return results
+
     @abc.abstractmethod
     @qt_try_except()
     def calibrate(self, param=None) -> None:
         """Compute data linear calibration"""
 
-    @staticmethod
-    @abc.abstractmethod
-    def func_gaussian_filter(x, y, p):
-        """Compute gaussian filter"""
+    @qt_try_except()
+    def compute_threshold(self, param: ThresholdParam = None) -> None:
+        """Compute threshold clipping"""
+        edit = param is None
+        if edit:
+            param = ThresholdParam(_("Thresholding"))
+        self._compute_operation11("threshold", param, edit=edit)
+
+    @qt_try_except()
+    def compute_clip(self, param: ClipParam = None) -> None:
+        """Compute maximum data clipping"""
+        edit = param is None
+        if edit:
+            param = ClipParam(_("Clipping"))
+        self._compute_operation11("clip", param, edit=edit)
 
     @qt_try_except()
     def compute_gaussian(self, param: GaussianParam = None) -> None:
@@ -343,19 +766,7 @@ class BaseProcessor(QC.QObject):
         edit = param is None
         if edit:
             param = GaussianParam(_("Gaussian filter"))
-        func = self.func_gaussian_filter
-        self.compute_11(
-            "GaussianFilter",
-            func,
-            param,
-            suffix=lambda p: f"σ={p.sigma:.3f} pixels",
-            edit=edit,
-        )
-
-    @staticmethod
-    @abc.abstractmethod
-    def func_moving_average(x, y, p):
-        """Moving average computing function"""
+        self._compute_operation11("gaussian_filter", param, edit=edit)
 
     @qt_try_except()
     def compute_moving_average(self, param: MovingAverageParam = None) -> None:
@@ -363,13 +774,7 @@ class BaseProcessor(QC.QObject):
         edit = param is None
         if edit:
             param = MovingAverageParam(_("Moving average"))
-        func = self.func_moving_average
-        self.compute_11("MovAvg", func, param, suffix=lambda p: f"n={p.n}", edit=edit)
-
-    @staticmethod
-    @abc.abstractmethod
-    def func_moving_median(x, y, p):
-        """Moving median computing function"""
+        self._compute_operation11("moving_average", param, edit=edit)
 
     @qt_try_except()
     def compute_moving_median(self, param: MovingMedianParam = None) -> None:
@@ -377,23 +782,30 @@ class BaseProcessor(QC.QObject):
         edit = param is None
         if edit:
             param = MovingMedianParam(_("Moving median"))
-        func = self.func_moving_median
-        self.compute_11("MovMed", func, param, suffix=lambda p: f"n={p.n}", edit=edit)
+        self._compute_operation11("moving_median", param, edit=edit)
 
-    @abc.abstractmethod
     @qt_try_except()
     def compute_wiener(self):
         """Compute Wiener filter"""
+        self._compute_operation11("wiener")
 
-    @abc.abstractmethod
     @qt_try_except()
-    def compute_fft(self):
-        """Compute iFFT"""
+    def compute_fft(self, param: FFTParam = None) -> None:
+        """Compute FFT"""
+        edit = param is None
+        if edit:
+            param = FFTParam(_("FFT"))
+        fft.set_workers(Conf.proc.fft_workers.get(0) or None)
+        self._compute_operation11("fft", param, edit=edit)
 
-    @abc.abstractmethod
     @qt_try_except()
-    def compute_ifft(self):
-        """Compute FFT"""
+    def compute_ifft(self, param: IFFTParam = None) -> None:
+        """Compute iFFT"""
+        edit = param is None
+        if edit:
+            param = IFFTParam(_("Inverse FFT"))
+        fft.set_workers(Conf.proc.fft_workers.get(0) or None)
+        self._compute_operation11("ifft", param, edit=edit)
 
     # ------Computing
     def edit_regions_of_interest(
@@ -420,9 +832,24 @@ class BaseProcessor(QC.QObject):
                     self.panel.SIG_REFRESH_PLOT.emit()
         return roieditordata
 
+    @abc.abstractmethod
+    def _get_stat_values(self, data):
+        """Return values from which statistics are computed (see
+        `codraft.core.computation.stats.get_stats`), `data` being returned by
+        object's `get_data` method"""
+
     @abc.abstractmethod
     def _get_stat_funcs(self):
-        """Return statistics functions list"""
+        """Return statistics functions list: each function is called with data
+        returned by object's `get_data` method and statistics dictionary returned
+        by `codraft.core.computation.stats.get_stats`"""
+
+    def __compute_roi_stats(self, obj, roi_index: int, stfuncs: list) -> list:
+        """Compute statistics of object's ROI `roi_index` (None: whole data)"""
+        with np.errstate(all="ignore"):
+            data = obj.get_data(roi_index=roi_index)
+            stats = get_stats(self._get_stat_values(data))
+            return [func(data, stats) for _label, func in stfuncs]
 
     @qt_try_except()
     def compute_stats(self):
@@ -430,23 +857,21 @@ class BaseProcessor(QC.QObject):
         row = self.objlist.get_selected_rows()[0]
         obj = self.objlist.get_sel_object()
         stfuncs = self._get_stat_funcs()
-        nbcal = len(stfuncs)
+        xlabels = [label for label, _func in stfuncs]
         roi_nb = 0 if obj.roi is None else obj.roi.shape[0]
-        res = np.zeros((1 + roi_nb, nbcal))
-        xlabels = [None] * nbcal
+        roi_indexes = [None] + list(range(roi_nb))
         obj_t = f"{self.prefix}{row:03d}"
-        ylabels = [None] * (roi_nb + 1)
+        ylabels = [obj_t] + [f"{obj_t}|ROI{index:02d}" for index in roi_indexes[1:]]
+        if roi_nb:
+            obj.get_data(roi_index=0)  # Build ROI mask cache before running jobs
+        # ROIs are evaluated in parallel (on their bounding box only)
+        argslist = [(obj, index, stfuncs) for index in roi_indexes]
+        jobs = parallel.submit_jobs(
+            self.__compute_roi_stats, argslist, parallel.get_thread_pool("rois")
+        )
         with warnings.catch_warnings():
             warnings.simplefilter("ignore", UserWarning)
-            with np.errstate(all="ignore"):
-                for iroi, roi_index in enumerate([None] + list(range(roi_nb))):
-                    for ical, (label, func) in enumerate(stfuncs):
-                        xlabels[ical] = label
-                        res[iroi, ical] = func(obj.get_data(roi_index=roi_index))
-                    if roi_index is None:
-                        ylabels[iroi] = obj_t
-                    else:
-                        ylabels[iroi] = f"{obj_t}|ROI{roi_index:02d}"
+            res = np.array([job.result() for job in jobs]).real.astype(float)
         with warnings.catch_warnings():
             warnings.simplefilter("ignore", RuntimeWarning)
             dlg = ArrayEditor(self.panel.parent())
@@ -9,86 +9,33 @@ CodraFT Signal Processor GUI module
 
 # pylint: disable=invalid-name  # Allows short reference names like x, y, ...
 
+import functools
 import re
+from typing import Callable
 
 import numpy as np
-import scipy.integrate as spt
-import scipy.ndimage as spi
-import scipy.optimize as spo
-import scipy.signal as sps
-from guidata.dataset.dataitems import ChoiceItem, FloatItem, IntItem
-from guidata.dataset.datatypes import DataSet, DataSetGroup
+from guidata.dataset.datatypes import DataSetGroup
+from qtpy import QtWidgets as QW
 
+from codraft import env
 from codraft.config import _
 from codraft.core.computation import fit
-from codraft.core.computation.signal import (
-    derivative,
-    moving_average,
-    normalize,
-    peak_indexes,
-    xpeak,
-    xy_fft,
-    xy_ifft,
+from codraft.core.gui.processor.base import BaseProcessor
+from codraft.core.model.signal import create_signal
+from codraft.core.processing.base import MovingAverageParam
+from codraft.core.processing.signal import (
+    CalibrateParam,
+    FWHMParam,
+    NormalizeParam,
+    PeakDetectionParam,
+    PolynomialFitParam,
+    SignalMovingAverageParam,
+    SignalOperation11,
 )
-from codraft.core.gui.processor.base import (
-    BaseProcessor,
-    ClipParam,
-    ThresholdParam,
-)
-from codraft.core.model.base import ResultShape, ShapeTypes
-from codraft.core.model.signal import SignalParam, create_signal
 from codraft.utils.qthelpers import exec_dialog, qt_try_except
 from codraft.widgets import fitdialog, signalpeakdialog
 
 
-class PeakDetectionParam(DataSet):
-    """Peak detection parameters"""
-
-    threshold = IntItem(
-        _("Threshold"), default=30, min=0, max=100, slider=True, unit="%"
-    )
-    min_dist = IntItem(_("Minimum distance"), default=1, min=1, unit="points")
-
-
-class NormalizeParam(DataSet):
-    """Normalize parameters"""
-
-    methods = (
-        (_("maximum"), "maximum"),
-        (_("amplitude"), "amplitude"),
-        (_("sum"), "sum"),
-        (_("energy"), "energy"),
-    )
-    method = ChoiceItem(_("Normalize with respect to"), methods)
-
-
-class CalibrateParam(DataSet):
-    """Calibration parameters"""
-
-    axes = (("x", _("X-axis")), ("y", _("Y-axis")))
-    axis = ChoiceItem(_("Calibrate"), axes, default="y")
-    a = FloatItem("a", default=1.0)
-    b = FloatItem("b", default=0.0)
-
-
-class PolynomialFitParam(DataSet):
-    """Polynomial fitting parameters"""
-
-    degree = IntItem(_("Degree"), 3, min=1, max=10, slider=True)
-
-
-class FWHMParam(DataSet):
-    """FWHM parameters"""
-
-    fittypes = (
-        ("GaussianModel", _("Gaussian")),
-        ("LorentzianModel", _("Lorentzian")),
-        ("VoigtModel", "Voigt"),
-    )
-
-    fittype = ChoiceItem(_("Fit type"), fittypes, default="GaussianModel")
-
-
 class SignalProcessor(BaseProcessor):
     """Object handling signal processing: operations, processing, computing"""
 
@@ -139,22 +86,6 @@ class SignalProcessor(BaseProcessor):
                 edit=False,
             )
 
-    def swap_axes(self):
-        """Swap data axes"""
-        self.compute_11(
-            "SwapAxes",
-            lambda x, y: (y, x),
-            func_obj=lambda obj: obj.remove_resultshapes(),
-        )
-
-    def compute_abs(self):
-        """Compute absolute value"""
-        self.compute_11("Abs", lambda x, y: (x, np.abs(y)))
-
-    def compute_log10(self):
-        """Compute Log10"""
-        self.compute_11("Log10", lambda x, y: (x, np.log10(y)))
-
     def detect_peaks(self, param: PeakDetectionParam = None) -> None:
         """Detect peaks from data"""
         obj = self.objlist.get_sel_object()
@@ -162,56 +93,25 @@ class SignalProcessor(BaseProcessor):
         if edit:
             dlg = signalpeakdialog.SignalPeakDetectionDialog(self.panel)
             dlg.setup_data(obj.x, obj.y)
-            if exec_dialog(dlg):
-                param = PeakDetectionParam(_("Peak detection"))
-                param.threshold = int(dlg.get_threshold() * 100)
-                param.min_dist = dlg.get_min_dist()
-
-        def func(x, y, p):
-            """Peak detection"""
-            indexes = peak_indexes(y, thres=p.threshold * 0.01, min_dist=p.min_dist)
-            return x[indexes], y[indexes]
-
-        def func_obj(obj, param):  # pylint: disable=unused-argument
-            """Customize signal object"""
-            obj.metadata["curvestyle"] = "Sticks"
-
-        self.compute_11(
-            "Peaks",
-            func,
-            param,
-            suffix=lambda p: f"threshold={p.threshold}%, min_dist={p.min_dist}pts",
-            func_obj=func_obj,
-            edit=edit,
-        )
+            if not exec_dialog(dlg):
+                return
+            param = PeakDetectionParam(_("Peak detection"))
+            param.threshold = int(dlg.get_threshold() * 100)
+            param.min_dist = dlg.get_min_dist()
+        self._compute_operation11("peak_detection", param, edit=edit)
 
     # ------Signal Processing
-    def apply_11_func(self, obj, orig, func, param, message):
-        """Apply 11 function: 1 object in --> 1 object out"""
-
-        # (self is used by @qt_try_except)
-        # pylint: disable=unused-argument
-        @qt_try_except(message)
-        def apply_11_func_callback(self, obj, orig, func, param):
-            """Apply 11 function callback: 1 object in --> 1 object out"""
-            data = orig.xydata
-            if len(data) == 2:  # x, y signal
-                x, y = data
-                if param is None:
-                    obj.xydata = func(x, y)
-                else:
-                    obj.xydata = func(x, y, param)
-            elif len(data) == 4:  # x, y, dx, dy error bar signal
-                x, y, dx, dy = data
-                if param is None:
-                    x2, y2 = func(x, y)
-                    _x3, dy2 = func(x, dy)
-                else:
-                    x2, y2 = func(x, y, param)
-                    _x3, dy2 = func(x, dy, param)
-                obj.xydata = x2, y2, dx, dy2
+    @staticmethod
+    def _apply_11_func(obj, orig, func, param):
+        """Apply 11 function: 1 object in --> 1 object out
+        (no GUI interaction: may be called from a worker thread)"""
+        SignalOperation11.apply_func(obj, orig, func, param)
 
-        return apply_11_func_callback(self, obj, orig, func, param)
+    @staticmethod
+    def _apply_11_func_in_place(obj, func, param, inplace_kinds):
+        """Apply 11 function in place: object data is replaced by the result
+        (no GUI interaction: may be called from a worker thread)"""
+        SignalOperation11.apply_func_in_place(obj, func, param, inplace_kinds)
 
     @qt_try_except()
     def normalize(self, param: NormalizeParam = None) -> None:
@@ -219,23 +119,25 @@ class SignalProcessor(BaseProcessor):
         edit = param is None
         if edit:
             param = NormalizeParam(_("Normalize"))
+        self._compute_operation11("normalize", param, edit=edit)
 
-        def func(x, y, p):
-            return (x, normalize(y, p.method))
-
-        self.compute_11(
-            "Normalize", func, param, suffix=lambda p: f"ref={p.method}", edit=edit
-        )
+    @qt_try_except()
+    def compute_moving_average(self, param: MovingAverageParam = None) -> None:
+        """Compute moving average"""
+        edit = param is None
+        if edit:
+            param = SignalMovingAverageParam(_("Moving average"))
+        self._compute_operation11("moving_average", param, edit=edit)
 
     @qt_try_except()
     def compute_derivative(self):
         """Compute derivative"""
-        self.compute_11("Derivative", lambda x, y: (x, derivative(x, y)))
+        self._compute_operation11("derivative")
 
     @qt_try_except()
     def compute_integral(self):
         """Compute integral"""
-        self.compute_11("Integral", lambda x, y: (x, spt.cumtrapz(y, x, initial=0.0)))
+        self._compute_operation11("integral")
 
     @qt_try_except()
     def calibrate(self, param: CalibrateParam = None) -> None:
@@ -243,85 +145,45 @@ class SignalProcessor(BaseProcessor):
         edit = param is None
         if edit:
             param = CalibrateParam(_("Linear calibration"), "y = a.x + b")
-
-        def func(x, y, p):
-            """Compute linear calibration"""
-            if p.axis == "x":
-                return p.a * x + p.b, y
-            return x, p.a * y + p.b
-
-        self.compute_11(
-            "LinearCal",
-            func,
-            param,
-            suffix=lambda p: f"{p.axis}={p.a}*{p.axis}+{p.b}",
-            edit=edit,
-        )
-
-    @qt_try_except()
-    def compute_threshold(self, param: ThresholdParam = None) -> None:
-        """Compute threshold clipping"""
-        edit = param is None
-        if edit:
-            param = ThresholdParam(_("Thresholding"))
-        self.compute_11(
-            "Threshold",
-            lambda x, y, p: (x, np.clip(y, p.value, y.max())),
-            param,
-            suffix=lambda p: f"min={p.value} lsb",
-            edit=edit,
-        )
-
-    @qt_try_except()
-    def compute_clip(self, param: ClipParam = None) -> None:
-        """Compute maximum data clipping"""
-        edit = param is None
-        if edit:
-            param = ClipParam(_("Clipping"))
-        self.compute_11(
-            "Clip",
-            lambda x, y, p: (x, np.clip(y, y.min(), p.value)),
-            param,
-            suffix=lambda p: f"max={p.value} lsb",
-            edit=edit,
-        )
-
-    @staticmethod
-    def func_gaussian_filter(x, y, p):
-        """Compute gaussian filter"""
-        return (x, spi.gaussian_filter1d(y, p.sigma))
-
-    @staticmethod
-    def func_moving_average(x, y, p):
-        """Moving average computing function"""
-        return (x, moving_average(y, p.n))
-
-    @staticmethod
-    def func_moving_median(x, y, p):
-        """Moving median computing function"""
-        return (x, sps.medfilt(y, kernel_size=p.n))
-
-    @qt_try_except()
-    def compute_wiener(self):
-        """Compute Wiener filter"""
-        self.compute_11("WienerFilter", lambda x, y: (x, sps.wiener(y)))
-
-    @qt_try_except()
-    def compute_fft(self):
-        """Compute iFFT"""
-        self.compute_11("FFT", xy_fft)
-
-    @qt_try_except()
-    def compute_ifft(self):
-        """Compute FFT"""
-        self.compute_11("iFFT", xy_ifft)
+        self._compute_operation11("calibrate", param, edit=edit)
 
     @qt_try_except()
-    def compute_fit(self, name, fitdlgfunc):
-        """Compute fitting curve"""
+    def compute_fit(self, name, fitdlgfunc, fitter: Callable = None):
+        """Compute fitting curve
+
+        If non-interactive fitting function `fitter` is given (see
+        `codraft.core.computation.fit.fit_curves`) and more than one signal is
+        selected, signals are first fitted in parallel, curve fitting dialogs
+        being then shown only if user chooses to review fits (or if fit did not
+        converge)"""
         rows = self.objlist.get_selected_rows()
-        for row in rows:
-            self.__row_compute_fit(row, name, fitdlgfunc)
+        if fitter is not None and len(rows) > 1:
+            curves = [(self.objlist[row].x, self.objlist[row].y) for row in rows]
+            results = fit.fit_curves(fitter, curves)
+            message = _("%d signals have been fitted.") % len(rows)
+            nfailed = len([result for result in results if not result[1]])
+            if nfailed:
+                message += (
+                    "\n"
+                    + _("%d fits did not converge (these fits will be reviewed).")
+                    % nfailed
+                )
+            review = env.execenv.unattended or (
+                QW.QMessageBox.question(
+                    self.panel,
+                    name,
+                    message + "\n" + _("Do you want to review each fit?"),
+                )
+                == QW.QMessageBox.Yes
+            )
+            for row, (values, converged) in zip(rows, results):
+                func = functools.partial(
+                    fitdlgfunc, values=values, review=review or not converged
+                )
+                self.__row_compute_fit(row, name, func)
+        else:
+            for row in rows:
+                self.__row_compute_fit(row, name, fitdlgfunc)
 
     @qt_try_except()
     def compute_polyfit(self, param: PolynomialFitParam = None) -> None:
@@ -331,12 +193,10 @@ class SignalProcessor(BaseProcessor):
         if edit:
             param = PolynomialFitParam(txt)
         if not edit or param.edit(self):
-            dlgfunc = fitdialog.polynomialfit
             self.compute_fit(
                 txt,
-                lambda x, y, degree=param.degree, parent=self.panel.parent(): dlgfunc(
-                    x, y, degree, parent=parent
-                ),
+                functools.partial(fitdialog.polynomialfit, degree=param.degree),
+                functools.partial(fit.fit_polynomial, degree=param.degree),
             )
 
     def __row_compute_fit(self, row, name, fitdlgfunc):
@@ -359,12 +219,14 @@ class SignalProcessor(BaseProcessor):
             self.panel.add_object(signal, refresh=False)
             # Refreshing list
             self.objlist.refresh_list(-1)
+            return params
+        return None
 
     @qt_try_except()
     def compute_multigaussianfit(self):
         """Compute multi-Gaussian fitting curve"""
         rows = self.objlist.get_selected_rows()
-        fitdlgfunc = fitdialog.multigaussianfit
+        p0 = None
         for row in rows:
             dlg = signalpeakdialog.SignalPeakDetectionDialog(self.panel)
             obj = self.objlist[row]
@@ -372,103 +234,45 @@ class SignalProcessor(BaseProcessor):
             if exec_dialog(dlg):
                 # Computing x, y
                 peaks = dlg.get_peak_indexes()
-                self.__row_compute_fit(
+                if p0 is not None and p0.size != 2 * len(peaks) + 1:
+                    p0 = None
+                params = self.__row_compute_fit(
                     row,
                     _("Multi-Gaussian fit"),
-                    lambda x, y, peaks=peaks, parent=self.panel.parent(): fitdlgfunc(
-                        x, y, peaks, parent=parent
+                    functools.partial(
+                        fitdialog.multigaussianfit, peak_indexes=peaks, p0=p0
                     ),
                 )
+                if params is not None:
+                    # Next fit starts from this one (warm start)
+                    p0 = np.array([param.value for param in params])
 
     # ------Signal Computing
-    def apply_10_func(self, orig, func, param, message) -> ResultShape:
-        """Apply 10 function: 1 object in --> 0 object out (scalar result)"""
-
-        # (self is used by @qt_try_except)
-        # pylint: disable=unused-argument
-        @qt_try_except(message)
-        def apply_10_func_callback(self, orig, func, param):
-            """Apply 10 function cb: 1 object in --> 0 object out (scalar result)"""
-            if param is None:
-                return func(orig)
-            return func(orig, param)
-
-        return apply_10_func_callback(self, orig, func, param)
-
     @qt_try_except()
     def compute_fwhm(self, param: FWHMParam = None) -> None:
         """Compute FWHM"""
-        title = _("FWHM")
-
-        def fwhm(signal: SignalParam, param: FWHMParam):
-            """Compute FWHM"""
-            res = []
-            for i_roi in signal.iterate_roi_indexes():
-                x, y = signal.get_data(i_roi)
-                dx = np.max(x) - np.min(x)
-                dy = np.max(y) - np.min(y)
-                base = np.min(y)
-                sigma, mu = dx * 0.1, xpeak(x, y)
-                FitModel = getattr(fit, param.fittype)
-                amp = FitModel.get_amp_from_amplitude(dy, sigma)
-
-                def func(params):
-                    """Fitting model function"""
-                    # pylint: disable=cell-var-from-loop
-                    return y - FitModel.func(x, *params)
-
-                (amp, sigma, mu, base), _ier = spo.leastsq(
-                    func, np.array([amp, sigma, mu, base])
-                )
-                x0, y0, x1, y1 = FitModel.half_max_segment(amp, sigma, mu, base)
-                res.append([i_roi, x0, y0, x1, y1])
-            return signal.add_resultshape(title, ShapeTypes.SEGMENT, np.array(res))
-
         edit = param is None
         if edit:
-            param = FWHMParam(title)
-        self.compute_10(title, fwhm, param, edit=edit)
+            param = FWHMParam(_("FWHM"))
+        self._compute_operation10("fwhm", param, edit=edit)
 
     @qt_try_except()
     def compute_fw1e2(self):
         """Compute FW at 1/e²"""
-        title = _("FW") + "1/e²"
-
-        def fw1e2(signal: SignalParam):
-            """Compute FW at 1/e²"""
-            res = []
-            for i_roi in signal.iterate_roi_indexes():
-                x, y = signal.get_data(i_roi)
-                dx = np.max(x) - np.min(x)
-                dy = np.max(y) - np.min(y)
-                base = np.min(y)
-                sigma, mu = dx * 0.1, xpeak(x, y)
-                amp = fit.GaussianModel.get_amp_from_amplitude(dy, sigma)
-                p_in = np.array([amp, sigma, mu, base])
-
-                def func(params):
-                    """Fitting model function"""
-                    # pylint: disable=cell-var-from-loop
-                    return y - fit.GaussianModel.func(x, *params)
-
-                p_out, _ier = spo.leastsq(func, p_in)
-                amp, sigma, mu, base = p_out
-                hw = 2 * sigma
-                amplitude = fit.GaussianModel.amplitude(amp, sigma)
-                yhm = amplitude / np.e**2 + base
-                res.append([i_roi, mu - hw, yhm, mu + hw, yhm])
-            return signal.add_resultshape(title, ShapeTypes.SEGMENT, np.array(res))
+        self._compute_operation10("fw1e2")
 
-        self.compute_10(title, fw1e2)
+    def _get_stat_values(self, data):
+        """Return values from which statistics are computed"""
+        return data[1]
 
     def _get_stat_funcs(self):
         """Return statistics functions list"""
         return [
-            ("min(y)", lambda xy: xy[1].min()),
-            ("max(y)", lambda xy: xy[1].max()),
-            ("<y>", lambda xy: xy[1].mean()),
-            ("Median(y)", lambda xy: np.median(xy[1])),
-            ("σ(y)", lambda xy: xy[1].std()),
-            ("Σ(y)", lambda xy: xy[1].sum()),
-            ("∫ydx", lambda xy: np.trapz(xy[1], xy[0])),
+            ("min(y)", lambda xy, st: st["min"]),
+            ("max(y)", lambda xy, st: st["max"]),
+            ("<y>", lambda xy, st: st["mean"]),
+            ("Median(y)", lambda xy, st: st["median"]),
+            ("σ(y)", lambda xy, st: st["std"]),
+            ("Σ(y)", lambda xy, st: st["sum"]),
+            ("∫ydx", lambda xy, st: np.trapz(xy[1], xy[0])),
         ]
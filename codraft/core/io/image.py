@@ -214,6 +214,18 @@ class SIFFile:
             data = np.fromstring(block, dtype=np.float32)
         return data.reshape(self.stacksize, self.height, self.width)
 
+    def memmap(self):
+        """
+        Returns all blocks (i.e. frames) in the .sif file as a read-only
+        memory-mapped array: frames are read from the file only when accessed
+        (e.g. for streaming reductions of large stacks).
+        :return: a numpy memory-mapped array with shape (blocks, y, x)
+        """
+        shape = (self.stacksize, self.height, self.width)
+        return np.memmap(
+            self.filepath, dtype=np.float32, mode="r", offset=self.m_offset, shape=shape
+        )
+
 
 def imread_sif(filename):
     """Open a SIF image"""
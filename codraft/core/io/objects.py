@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT object I/O module
+
+Reading signal/image objects from files and writing them to CodraFT native HDF5
+files, without any user interface.
+"""
+
+import os.path as osp
+import re
+from typing import Iterator, List
+
+import numpy as np
+import pandas
+from guiqwt.io import imread
+
+from codraft.core.io.base import NativeH5Reader, NativeH5Writer
+from codraft.core.io.conv import data_to_xy
+from codraft.core.io.image import SIFFile
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.model.signal import SignalParam, create_signal
+
+#: HDF5 groups (in CodraFT native HDF5 files) and object name prefixes, by class
+H5_GROUPS = {SignalParam: ("CodraFT_Sig", "s"), ImageParam: ("CodraFT_Ima", "i")}
+
+#: Signal file extensions (other files are read as images)
+SIGNAL_EXTENSIONS = (".csv", ".txt")
+
+#: CodraFT native HDF5 file extensions
+H5_EXTENSIONS = (".h5", ".hdf5")
+
+
+def read_signals(filename: str) -> List[SignalParam]:
+    """Read signals from CSV or NumPy file"""
+    xydata_dataframe = None
+    if osp.splitext(filename)[1] == ".npy":
+        xydata = np.load(filename)
+    else:
+        xydata_dataframe = pandas.read_csv(filename, comment="#")
+        xydata = xydata_dataframe.to_numpy()
+    assert len(xydata.shape) in (1, 2), "Data not supported"
+    signal = create_signal(osp.basename(filename))
+    if xydata_dataframe is not None:
+        signal.xlabel, signal.ylabel = xydata_dataframe.columns[:2]
+    if len(xydata.shape) == 1:
+        signal.set_xydata(np.arange(xydata.size), xydata)
+    else:
+        x, y, dx, dy = data_to_xy(xydata)
+        signal.set_xydata(x, y, dx, dy)
+    return [signal]
+
+
+def read_images(filename: str) -> List[ImageParam]:
+    """Read images from file (supported formats: see `guiqwt.io.iohandler`):
+    multi-frame files (e.g. Andor SIF) result in a single image stack, whose
+    data is memory-mapped (frames are read from file only when accessed)"""
+    if filename.lower().endswith(".sif"):
+        data = SIFFile(filename).memmap()
+        if data.shape[0] == 1:
+            data = data[0]
+        return [create_image(osp.basename(filename), data)]
+    data = imread(filename, to_grayscale=False)
+    if data.ndim == 3:
+        # Converting to grayscale
+        data = data[..., :4].mean(axis=2)
+    image = create_image(osp.basename(filename), data)
+    if osp.splitext(filename)[1].lower() == ".dcm":
+        from pydicom import dicomio  # pylint: disable=C0415,E0401
+
+        image.dicom_template = dicomio.read_file(
+            filename, stop_before_pixels=True, force=True
+        )
+    return [image]
+
+
+def read_h5_objects(filename: str) -> Iterator:
+    """Iterate over signals and images stored in a CodraFT native HDF5 file"""
+    reader = NativeH5Reader(filename)
+    try:
+        for klass, (group, _prefix) in H5_GROUPS.items():
+            with reader.group(group):
+                for name in reader.h5.get(group, []):
+                    obj = klass()
+                    with reader.group(name):
+                        obj.deserialize(reader)
+                    yield obj
+    finally:
+        reader.close()
+
+
+def read_objects(filename: str) -> List:
+    """Read signals or images from file (CodraFT native HDF5 file, signal file
+    or image file, depending on file extension)"""
+    ext = osp.splitext(filename)[1].lower()
+    if ext in H5_EXTENSIONS:
+        return list(read_h5_objects(filename))
+    if ext in SIGNAL_EXTENSIONS:
+        return read_signals(filename)
+    return read_images(filename)
+
+
+def get_h5_object_name(obj, index: int) -> str:
+    """Return HDF5 group name of object (`index` is the object number)"""
+    _group, prefix = H5_GROUPS[type(obj)]
+    title = re.sub("[^-a-zA-Z0-9_.() ]+", "", obj.title.replace("/", "_"))
+    return f"{prefix}{index:03d}: {title}"
+
+
+class H5ObjectWriter:
+    """Write signals and images to a CodraFT native HDF5 file, one at a time
+    (objects are numbered by class, as in CodraFT panels)
+
+    :param str filename: HDF5 file name
+    """
+
+    def __init__(self, filename: str):
+        self.writer = NativeH5Writer(filename)
+        self.counts = dict.fromkeys(H5_GROUPS, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, obj) -> None:
+        """Write object to file"""
+        klass = type(obj)
+        group, _prefix = H5_GROUPS[klass]
+        with self.writer.group(group):
+            with self.writer.group(get_h5_object_name(obj, self.counts[klass])):
+                obj.serialize(self.writer)
+        self.counts[klass] += 1
+
+    def close(self) -> None:
+        """Close file"""
+        self.writer.close()
@@ -11,8 +11,12 @@ CodraFT Datasets
 
 import abc
 import enum
+import itertools
 import json
 import sys
+import threading
+import weakref
+from copy import deepcopy
 
 import guidata.dataset.dataitems as gdi
 import guidata.dataset.datatypes as gdt
@@ -79,6 +83,137 @@ class MetadataItem(gdt.DataItem):
         return reader.read_dict()
 
 
+#: Data version numbers (see `CowData.version`)
+_DATA_VERSIONS = itertools.count(1)
+
+
+class CowData:
+    """Copy-on-write data holder: NumPy array shared by objects (signals/images)
+
+    The array is not copied when an object is copied from another (see
+    `ObjectItf.copy_data_from`): both objects share the same holder, and a
+    private copy is made only when one of them has to modify the array in place
+    (see `ObjectItf.detach_data`). While shared, the array is handed out as a
+    read-only view, so that it can't be modified by mistake.
+
+    Each holder has a unique version number, which changes when the array is
+    about to be modified in place (see `touch`): objects data has changed if
+    the version of its holder has changed (see `ObjectItf.get_data_version`).
+
+    :param np.ndarray array: data
+    :param owner: object owning the holder
+    """
+
+    def __init__(self, array: np.ndarray, owner):
+        self.array = array
+        self.__owners = weakref.WeakSet([owner])
+        self.__view = None
+        self.__lock = threading.Lock()
+        self.version = next(_DATA_VERSIONS)
+
+    def touch(self) -> None:
+        """Change version number (array is about to be modified in place)"""
+        self.version = next(_DATA_VERSIONS)
+
+    @property
+    def shared(self) -> bool:
+        """Return True if array is shared by more than one object"""
+        return len(self.__owners) > 1
+
+    def acquire(self, owner) -> "CowData":
+        """Share holder with object `owner`, and return holder"""
+        with self.__lock:
+            self.__owners.add(owner)
+        return self
+
+    def release(self, owner) -> None:
+        """Release holder (object `owner` doesn't use it anymore)"""
+        with self.__lock:
+            self.__owners.discard(owner)
+
+    def get_array(self) -> np.ndarray:
+        """Return array (read-only view if array is shared)"""
+        if not self.shared or not isinstance(self.array, np.ndarray):
+            return self.array
+        if self.__view is None:
+            view = self.array.view()
+            view.flags.writeable = False
+            self.__view = view
+        return self.__view
+
+    def detach(self, owner) -> "CowData":
+        """Return holder owned by `owner` only, with a writable array (making a
+        private copy of the array if it is shared or read-only)"""
+        array = self.array
+        readonly = isinstance(array, np.ndarray) and not array.flags.writeable
+        with self.__lock:
+            if len(self.__owners) <= 1 and not readonly:
+                return self
+            self.__owners.discard(owner)
+        return CowData(np.array(array, copy=True), owner)
+
+
+class CowFloatArrayItem(gdi.FloatArrayItem):
+    """Float array item whose value is stored in a copy-on-write data holder
+    (see `CowData`)"""
+
+    def __get__(self, instance, klass):
+        if instance is None:
+            return self
+        holder = getattr(instance, "_" + self._name, None)
+        if holder is None:
+            return self._default
+        return holder.get_array()
+
+    def __set__(self, instance, value):
+        holder = getattr(instance, "_" + self._name, None)
+        if holder is not None:
+            holder.release(instance)
+        if value is not None:
+            value = CowData(value, instance)
+        setattr(instance, "_" + self._name, value)
+
+    def share(self, instance, other) -> None:
+        """Share `other` object array with `instance` (no copy)"""
+        holder = getattr(other, "_" + self._name, None)
+        if holder is not None:
+            holder = holder.acquire(instance)
+        current = getattr(instance, "_" + self._name, None)
+        if current is not None and current is not holder:
+            current.release(instance)
+        setattr(instance, "_" + self._name, holder)
+
+    def detach(self, instance) -> None:
+        """Make `instance` the only owner of its array (copying it if shared),
+        before modifying it in place (array version is changed)"""
+        holder = getattr(instance, "_" + self._name, None)
+        if holder is not None:
+            holder = holder.detach(instance)
+            holder.touch()
+            setattr(instance, "_" + self._name, holder)
+
+    def get_version(self, instance) -> int:
+        """Return `instance` array version number (0 if there is no array)"""
+        holder = getattr(instance, "_" + self._name, None)
+        return 0 if holder is None else holder.version
+
+
+def share_metadata(metadata: dict) -> dict:
+    """Return a copy of metadata dictionary, sharing NumPy arrays with the
+    original one instead of copying them (arrays are handed out as read-only
+    views: metadata arrays are replaced, never modified in place).
+    Other mutable values (e.g. nested dictionaries or lists) are copied."""
+    if isinstance(metadata, dict):
+        return {key: share_metadata(value) for key, value in metadata.items()}
+    if type(metadata) in (list, tuple):
+        return type(metadata)(share_metadata(value) for value in metadata)
+    if isinstance(metadata, np.ndarray):
+        view = metadata.view()
+        view.flags.writeable = False
+        return view
+    return deepcopy(metadata)
+
+
 @enum.unique
 class Choices(enum.Enum):
     """Object associating an enum to guidata.dataset.dataitems.ChoiceItem choices"""
@@ -347,7 +482,8 @@ class ResultShape:
         :param bool lbl: if True, show shape labels
         """
         for args in self.data:
-            yield self.create_plot_item(args, fmt, lbl)
+            if np.all(np.isfinite(args)):  # Skipping failed results (NaN)
+                yield self.create_plot_item(args, fmt, lbl)
 
     def create_plot_item(self, args: np.ndarray, fmt: str, lbl: bool):
         """Make plot item"""
@@ -474,7 +610,25 @@ class ObjectItf(metaclass=ObjectItfMeta):
 
     @abc.abstractmethod
     def copy_data_from(self, other, dtype=None):
-        """Copy data from other dataset instance"""
+        """Copy data from other dataset instance (data is shared until one of
+        the objects modifies it, see `detach_data`)"""
+
+    def detach_data(self) -> None:
+        """Make a private copy of object data if it is shared with other objects
+        (copy-on-write, see `CowData`): this has to be called before modifying
+        data in place"""
+        for item in self._items:  # pylint: disable=no-member
+            if isinstance(item, CowFloatArrayItem):
+                item.detach(self)
+
+    def get_data_version(self) -> tuple:
+        """Return data version: changes when data is set or modified in place
+        (see `detach_data`), without hashing data"""
+        return tuple(
+            item.get_version(self)
+            for item in self._items  # pylint: disable=no-member
+            if isinstance(item, CowFloatArrayItem)
+        )
 
     @abc.abstractmethod
     def set_data_type(self, dtype):
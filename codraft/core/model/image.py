@@ -12,9 +12,8 @@ CodraFT Datasets
 
 import enum
 import re
-import weakref
 from collections import abc
-from copy import deepcopy
+from typing import List, Tuple
 
 import guidata.dataset.dataitems as gdi
 import guidata.dataset.datatypes as gdt
@@ -106,24 +105,45 @@ class RoiDataItem:
             y1 += x1 - x0
         return x0, y0, x1, y1
 
-    def get_masked_view(self, data: np.ndarray, maskdata: np.ndarray) -> np.ndarray:
-        """Return masked view for data"""
+    def get_bounding_box(self, shape: tuple) -> Tuple[int, int, int, int]:
+        """Return ROI bounding box (x0, y0, x1, y1), clipped to data `shape`"""
         x0, y0, x1, y1 = self.get_rect()
-        masked_view = data.view(ma.MaskedArray)
-        masked_view.mask = maskdata
-        return masked_view[y0:y1, x0:x1]
+        rows, cols = shape[-2:]
+        return (
+            min(max(x0, 0), cols),
+            min(max(y0, 0), rows),
+            min(max(x1, 0), cols),
+            min(max(y1, 0), rows),
+        )
+
+    def get_local_mask(self, shape: tuple, yxratio: float) -> np.ndarray:
+        """Return ROI mask (True outside ROI) restricted to ROI bounding box
+        (see `get_bounding_box`) of data `shape`: built in O(ROI area)"""
+        x0, y0, x1, y1 = self.get_bounding_box(shape)
+        if self.geometry is RoiDataGeometries.RECTANGLE:
+            return np.zeros((y1 - y0, x1 - x0), dtype=bool)
+        local_mask = np.ones((y1 - y0, x1 - x0), dtype=bool)
+        rx0, ry0, rx1, ry1 = self.get_rect()
+        xc, yc = 0.5 * (rx0 + rx1) - x0, 0.5 * (ry0 + ry1) - y0
+        radius = 0.5 * (rx1 - rx0)
+        rr, cc = draw.ellipse(yc, xc, radius / yxratio, radius, shape=local_mask.shape)
+        local_mask[rr, cc] = False
+        return local_mask
+
+    def get_masked_view(self, data: np.ndarray, local_mask: np.ndarray) -> np.ndarray:
+        """Return masked view for data (ROI bounding box only, see
+        `get_bounding_box`), `local_mask` being the ROI mask restricted to
+        bounding box (see `get_local_mask`)"""
+        x0, y0, x1, y1 = self.get_bounding_box(data.shape)
+        masked_view = data[y0:y1, x0:x1].view(ma.MaskedArray)
+        masked_view.mask = local_mask
+        return masked_view
 
     def apply_mask(self, data: np.ndarray, yxratio: float) -> np.ndarray:
         """Apply ROI to data as a mask and return masked array"""
-        roi_mask = np.ones_like(data, dtype=bool)
-        x0, y0, x1, y1 = self.get_rect()
-        if self.geometry is RoiDataGeometries.RECTANGLE:
-            roi_mask[y0:y1, x0:x1] = False
-        else:
-            xc, yc = 0.5 * (x0 + x1), 0.5 * (y0 + y1)
-            radius = 0.5 * (x1 - x0)
-            rr, cc = draw.ellipse(yc, xc, radius / yxratio, radius)
-            roi_mask[rr, cc] = False
+        roi_mask = np.ones(data.shape[-2:], dtype=bool)
+        x0, y0, x1, y1 = self.get_bounding_box(data.shape)
+        roi_mask[y0:y1, x0:x1] = self.get_local_mask(data.shape, yxratio)
         return roi_mask
 
     def make_roi_item(self, index: int, fmt: str, lbl: bool, editable: bool = True):
@@ -138,7 +158,13 @@ class RoiDataItem:
 
 
 class ImageParam(gdt.DataSet, base.ObjectItf):
-    """Image dataset"""
+    """Image dataset
+
+    Data may be a single image (2-D data) or an image stack (3-D data: frame,
+    row, column), e.g. a kinetic series. In the latter case, the current frame is
+    the one which is shown, and on which ROI and computations (statistics,
+    centroid, ...) are based, whereas processing operations apply to all frames.
+    """
 
     CONF_FMT = Conf.view.ima_format
     DEFAULT_FMT = ".1f"
@@ -147,12 +173,43 @@ class ImageParam(gdt.DataSet, base.ObjectItf):
         gdt.DataSet.__init__(self, title, comment, icon)
         self._dicom_template = None
         self._maskdata_cache = None
-        self._roidata_cache = None  # weak reference
+        self._roimasks_cache = None  # (key, local masks)
+        self._frame = 0
 
     @property
     def size(self):
         """Returns (width, height)"""
-        return self.data.shape[1], self.data.shape[0]
+        return self.data.shape[-1], self.data.shape[-2]
+
+    @property
+    def is_stack(self) -> bool:
+        """Return True if image is an image stack (3-D data)"""
+        return self.data is not None and self.data.ndim == 3
+
+    @property
+    def frame_count(self) -> int:
+        """Return number of frames (1 if image is not a stack)"""
+        return self.data.shape[0] if self.is_stack else 1
+
+    @property
+    def current_frame(self) -> int:
+        """Return current frame index"""
+        return min(self._frame, self.frame_count - 1)
+
+    @current_frame.setter
+    def current_frame(self, index: int) -> None:
+        """Set current frame index"""
+        if not 0 <= index < self.frame_count:
+            raise IndexError(f"Frame index out of range: {index}")
+        self._frame = index
+
+    def get_frame(self, index: int = None) -> np.ndarray:
+        """Return frame `index` data (default: current frame), or data itself if
+        image is not a stack. Frames of memory-mapped stacks are read from file
+        only when accessed."""
+        if not self.is_stack:
+            return self.data
+        return self.data[self.current_frame if index is None else index]
 
     def __add_metadata(self, key, value):
         """Add value to metadata if value can be converted into builtin/NumPy type"""
@@ -200,7 +257,7 @@ class ImageParam(gdt.DataSet, base.ObjectItf):
     _tabs = gdt.BeginTabGroup("all")
 
     _datag = gdt.BeginGroup(_("Data and metadata"))
-    data = gdi.FloatArrayItem(_("Data"))
+    data = base.CowFloatArrayItem(_("Data"))
     metadata = base.MetadataItem(_("Metadata"), default={})
     _e_datag = gdt.EndGroup(_("Data and metadata"))
 
@@ -239,13 +296,15 @@ class ImageParam(gdt.DataSet, base.ObjectItf):
         """
         Return original data (if ROI is not defined or `roi_index` is None),
         or ROI data (if both ROI and `roi_index` are defined).
+        For image stacks, data of the current frame is returned.
 
         Returns a masked array.
         """
+        data = self.get_frame()
         if self.roi is None or roi_index is None:
-            return self.data
+            return data
         roidataitem = RoiDataItem(self.roi[roi_index])
-        return roidataitem.get_masked_view(self.data, self.maskdata)
+        return roidataitem.get_masked_view(data, self.get_roi_masks()[roi_index])
 
     def copy_data_from(self, other, dtype=None):
         """Copy data from other dataset instance"""
@@ -253,8 +312,12 @@ class ImageParam(gdt.DataSet, base.ObjectItf):
         self.y0 = other.y0
         self.dx = other.dx
         self.dy = other.dy
-        self.metadata = deepcopy(other.metadata)
-        self.data = np.array(other.data, copy=True, dtype=dtype)
+        self.metadata = base.share_metadata(other.metadata)
+        if dtype is None or other.data is None or np.dtype(dtype) == other.data.dtype:
+            ImageParam.data.share(self, other)
+        else:
+            self.data = np.array(other.data, dtype=dtype)
+        self._frame = other.current_frame
         self.dicom_template = other.dicom_template
 
     def set_data_type(self, dtype):
@@ -262,8 +325,8 @@ class ImageParam(gdt.DataSet, base.ObjectItf):
         self.data = np.array(self.data, dtype=dtype)
 
     def __viewable_data(self):
-        """Return viewable data"""
-        data = self.data.real
+        """Return viewable data (current frame, for image stacks)"""
+        data = self.get_frame().real
         if np.any(np.isnan(data)):
             data = np.nan_to_num(data, posinf=0, neginf=0)
         return data
@@ -443,27 +506,46 @@ class ImageParam(gdt.DataSet, base.ObjectItf):
                 roidataitem = RoiDataItem(coords)
                 yield roidataitem.make_roi_item(index, fmt, lbl, editable)
 
+    def __get_roimasks_key(self) -> tuple:
+        """Return ROI masks cache key: ROI masks depend on ROI coordinates,
+        image shape and pixel aspect ratio"""
+        roi = self.roi
+        return (roi.shape, roi.tobytes(), self.data.shape[-2:], self.dy / self.dx)
+
+    def get_roi_masks(self) -> List[np.ndarray]:
+        """Return ROI masks restricted to ROI bounding boxes (True outside ROI,
+        see `RoiDataItem.get_local_mask`): one mask per ROI, cached as long as
+        ROI coordinates, image shape and pixel size are unchanged"""
+        key = self.__get_roimasks_key()
+        if self._roimasks_cache is None or self._roimasks_cache[0] != key:
+            shape, yxratio = self.data.shape[-2:], self.dy / self.dx
+            masks = [
+                RoiDataItem(roirow).get_local_mask(shape, yxratio)
+                for roirow in self.roi
+            ]
+            self._roimasks_cache = (key, masks)
+            self._maskdata_cache = None
+        return self._roimasks_cache[1]
+
     @property
     def maskdata(self):
         """Return masked data (areas outside defined regions of interest)"""
-        roi_changed = self._roidata_cache is not None and self._roidata_cache() is None
         if self.roi is None:
-            if roi_changed:
-                self._roidata_cache = None
-                self._maskdata_cache = None
-        elif roi_changed or self._maskdata_cache is None:
-            mask = np.ones_like(self.data, dtype=bool)
-            for roirow in self.roi:
-                roidataitem = RoiDataItem(roirow)
-                roi_mask = roidataitem.apply_mask(self.data, yxratio=self.dy / self.dx)
-                mask &= roi_mask
-            self._maskdata_cache = mask
-            self._roidata_cache = weakref.ref(self.roi)
+            self._roimasks_cache = self._maskdata_cache = None
+        else:
+            masks = self.get_roi_masks()
+            if self._maskdata_cache is None:
+                shape = self.data.shape[-2:]
+                mask = np.ones(shape, dtype=bool)
+                for roirow, local_mask in zip(self.roi, masks):
+                    x0, y0, x1, y1 = RoiDataItem(roirow).get_bounding_box(shape)
+                    mask[y0:y1, x0:x1] &= local_mask
+                self._maskdata_cache = mask
         return self._maskdata_cache
 
     def invalidate_maskdata_cache(self):
         """Invalidate mask data cache: force to rebuild it"""
-        self._maskdata_cache = None
+        self._roimasks_cache = self._maskdata_cache = None
 
 
 def create_image(
@@ -476,7 +558,8 @@ def create_image(
     """Create a new Image object
 
     :param str title: image title
-    :param numpy.ndarray data: image data
+    :param numpy.ndarray data: image data (2-D), or image stack data (3-D: frame,
+     row, column)
     :param dict metadata: image metadata
     :param tuple units: X, Y, Z units (tuple of strings)
     :param tuple labels: X, Y, Z labels (tuple of strings)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Processing pipeline model
+
+Each processing step (output object, source objects and the function computing
+the output from the sources) is recorded in a dependency graph, so that only
+the steps whose inputs have changed may be computed again: a step is "dirty"
+when the fingerprint of one of its sources differs from the one recorded when
+the step was last computed.
+
+Fingerprints are data version numbers (see `ObjectItf.get_data_version`), which
+change whenever data is set or modified in place: they cost nothing to compute,
+contrary to data content hashes.
+"""
+
+from typing import Callable, Iterable, List, Optional
+
+
+def get_object_fingerprint(obj) -> tuple:
+    """Return object data fingerprint"""
+    return obj.get_data_version()
+
+
+class ProcessingStep:
+    """Processing step: `output` object is computed from `sources` objects by
+    calling `func(output, sources)` (which updates `output` in place)
+
+    :param output: output object (signal/image)
+    :param list sources: source objects (signals/images)
+    :param callable func: function computing output object from sources
+    """
+
+    def __init__(self, output, sources: List, func: Callable):
+        self.output = output
+        self.sources = list(sources)
+        self.func = func
+        self.fingerprints = [get_object_fingerprint(obj) for obj in self.sources]
+
+    def is_dirty(self) -> bool:
+        """Return True if one of the sources has changed since step was computed"""
+        return self.fingerprints != [
+            get_object_fingerprint(obj) for obj in self.sources
+        ]
+
+    def run(self) -> None:
+        """Compute output object again (and record sources fingerprints)"""
+        fingerprints = [get_object_fingerprint(obj) for obj in self.sources]
+        self.func(self.output, self.sources)
+        self.fingerprints = fingerprints
+
+
+class ProcessingGraph:
+    """Dependency graph of processing steps (one step per output object).
+    Steps are stored in creation order, which is a topological order (sources
+    are always created before outputs)."""
+
+    def __init__(self):
+        self.__steps = {}
+
+    def __len__(self):
+        return len(self.__steps)
+
+    def __iter__(self):
+        """Return an iterator over steps (in creation order)"""
+        yield from self.__steps.values()
+
+    def add_step(self, output, sources: List, func: Callable) -> ProcessingStep:
+        """Record processing step computing `output` from `sources`"""
+        step = ProcessingStep(output, sources, func)
+        self.__steps.pop(id(output), None)
+        self.__steps[id(output)] = step
+        return step
+
+    def get_step(self, obj) -> Optional[ProcessingStep]:
+        """Return step computing object `obj` (None if `obj` is not the output
+        of a recorded processing step)"""
+        step = self.__steps.get(id(obj))
+        if step is not None and step.output is obj:
+            return step
+        return None
+
+    def remove_object(self, obj) -> None:
+        """Remove object from graph: the step computing the object is removed, as
+        well as the steps using it as a source (they can't be computed anymore)"""
+        for key, step in list(self.__steps.items()):
+            if step.output is obj or any(src is obj for src in step.sources):
+                self.__steps.pop(key)
+
+    def clear(self) -> None:
+        """Remove all steps"""
+        self.__steps.clear()
+
+    def get_downstream_steps(self, objs: Iterable) -> List[ProcessingStep]:
+        """Return steps computing objects `objs` or depending on them (directly
+        or not), in creation order"""
+        objids = set(id(obj) for obj in objs)
+        steps = []
+        for step in self:
+            if id(step.output) in objids or any(
+                id(src) in objids for src in step.sources
+            ):
+                objids.add(id(step.output))
+                steps.append(step)
+        return steps
+
+    def get_dirty_steps(self, objs: Iterable = None) -> List[ProcessingStep]:
+        """Return dirty steps downstream of objects `objs` (default: all steps).
+        Downstream steps of dirty steps are not included (they will become dirty
+        only if the output of the dirty step actually changes)."""
+        steps = list(self) if objs is None else self.get_downstream_steps(objs)
+        return [step for step in steps if step.is_dirty()]
+
+    def recompute(self, objs: Iterable = None, callback: Callable = None) -> List:
+        """Compute again dirty steps downstream of objects `objs` (default: all
+        steps), in creation order: a step is computed again only if one of its
+        sources has changed (which includes the outputs of steps computed again
+        just before). Return the list of objects computed again.
+
+        `callback` is called before each step is checked with the output object
+        as argument: it may return False to abort computation"""
+        steps = list(self) if objs is None else self.get_downstream_steps(objs)
+        outputs = []
+        for step in steps:
+            if callback is not None and callback(step.output) is False:
+                break
+            if step.is_dirty():
+                step.run()
+                outputs.append(step.output)
+        return outputs
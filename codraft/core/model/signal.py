@@ -10,8 +10,6 @@ CodraFT Datasets
 # pylint: disable=invalid-name  # Allows short reference names like x, y, ...
 # pylint: disable=duplicate-code
 
-from copy import deepcopy
-
 import guidata.dataset.dataitems as gdi
 import guidata.dataset.datatypes as gdt
 import numpy as np
@@ -37,7 +35,7 @@ class SignalParam(gdt.DataSet, base.ObjectItf):
 
     _datag = gdt.BeginGroup(_("Data and metadata"))
     title = gdi.StringItem(_("Signal title"), default=_("Untitled"))
-    xydata = gdi.FloatArrayItem(_("Data"), transpose=True, minmax="rows")
+    xydata = base.CowFloatArrayItem(_("Data"), transpose=True, minmax="rows")
     metadata = base.MetadataItem(_("Metadata"), default={})
     _e_datag = gdt.EndGroup(_("Data and metadata"))
 
@@ -61,8 +59,12 @@ class SignalParam(gdt.DataSet, base.ObjectItf):
         """Copy data from other dataset instance"""
         if dtype not in (None, float, complex, np.complex128):
             raise RuntimeError("Signal data only supports float64/complex128 dtype")
-        self.metadata = deepcopy(other.metadata)
-        self.xydata = np.array(other.xydata, copy=True, dtype=dtype)
+        self.metadata = base.share_metadata(other.metadata)
+        xydata = other.xydata
+        if dtype is None or xydata is None or np.dtype(dtype) == xydata.dtype:
+            SignalParam.xydata.share(self, other)
+        else:
+            self.xydata = np.array(xydata, dtype=dtype)
 
     def set_data_type(self, dtype):  # pylint: disable=unused-argument,no-self-use
         """Change data type"""
@@ -95,6 +97,7 @@ class SignalParam(gdt.DataSet, base.ObjectItf):
 
     def __set_x(self, data):
         """Set x data"""
+        self.detach_data()
         self.xydata[0] = np.array(data)
 
     def __get_y(self):
@@ -105,6 +108,7 @@ class SignalParam(gdt.DataSet, base.ObjectItf):
 
     def __set_y(self, data):
         """Set y data"""
+        self.detach_data()
         self.xydata[1] = np.array(data)
 
     x = property(__get_x, __set_x)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+
+"""
+CodraFT Processing module
+
+Catalogue of signal/image processing operations, without any user interface
+(operations may be used in a headless process, e.g. an acquisition server):
+
+  * core.processing.base: operation classes, common parameters and registry
+  * core.processing.signal: signal processing operations
+  * core.processing.image: image processing operations
+"""
+
+# Registering processing operations:
+from codraft.core.processing import image, signal  # pylint: disable=W0611
+from codraft.core.processing.base import (  # pylint: disable=W0611
+    get_operation,
+    get_operation_names,
+)
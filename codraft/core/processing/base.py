@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Processing base module
+
+Processing operations are registered by object class (signal or image) and by
+name. Each operation is called with an object (and a parameters dataset, if
+the operation has parameters):
+
+  * 1 object in --> 1 object out operations (`Operation11`) return a new object
+    (or replace object data, see `Operation11.apply_in_place`)
+  * 1 object in --> 0 object out operations (`Operation10`) return a result
+    shape (which is also added to the object metadata)
+
+Operations have no user interface: they may be called from a worker thread or
+from a process without any application window.
+"""
+
+import abc
+from typing import Callable, List
+
+import guidata.dataset.dataitems as gdi
+import guidata.dataset.datatypes as gdt
+
+from codraft.config import _
+from codraft.core.model.base import ResultShape
+
+
+class GaussianParam(gdt.DataSet):
+    """Gaussian filter parameters"""
+
+    sigma = gdi.FloatItem("σ", default=1.0)
+
+
+class MovingAverageParam(gdt.DataSet):
+    """Moving average parameters"""
+
+    n = gdi.IntItem(_("Size of the moving window"), default=3, min=1)
+
+
+class MovingMedianParam(gdt.DataSet):
+    """Moving median parameters"""
+
+    n = gdi.IntItem(_("Size of the moving window"), default=3, min=1, even=False)
+
+
+class ThresholdParam(gdt.DataSet):
+    """Threshold parameters"""
+
+    value = gdi.FloatItem(_("Threshold"))
+
+
+class ClipParam(gdt.DataSet):
+    """Data clipping parameters"""
+
+    value = gdi.FloatItem(_("Clipping value"))
+
+
+class FFTParam(gdt.DataSet):
+    """FFT parameters"""
+
+    real = gdi.BoolItem(
+        _("Real-input FFT"),
+        default=False,
+        help=_(
+            "Real data only: compute the half spectrum (non-negative frequencies "
+            "along X-axis), which halves memory usage"
+        ),
+    )
+    fast_length = gdi.BoolItem(
+        _("Zero-padding to fast length"),
+        default=False,
+        help=_("Pad data with zeros to the next size for which FFT is fast"),
+    )
+
+
+class IFFTParam(gdt.DataSet):
+    """Inverse FFT parameters"""
+
+    real = gdi.BoolItem(
+        _("Real output"),
+        default=False,
+        help=_("Input data is a half spectrum (result of a real-input FFT)"),
+    )
+    size = gdi.IntItem(
+        _("Output size"),
+        default=0,
+        min=0,
+        help=_(
+            "Real output size along X-axis (0: even size deduced from half "
+            "spectrum size)"
+        ),
+    )
+
+
+def remove_resultshapes(obj, param=None) -> None:  # pylint: disable=unused-argument
+    """Remove result shapes from object (output object finalizing function of
+    operations changing data geometry)"""
+    obj.remove_resultshapes()
+
+
+class BaseOperation(abc.ABC):
+    """Base processing operation
+
+    :param str name: operation name (registry key, e.g. "gaussian_filter")
+    :param str title: operation title (e.g. "GaussianFilter")
+    :param callable func: computing function
+    :param type paramclass: parameters dataset class (None: no parameters)
+    """
+
+    OBJCLASS = None  # Replaced by the right class in child object
+
+    def __init__(self, name: str, title: str, func: Callable, paramclass=None):
+        self.name = name
+        self.title = title
+        self.func = func
+        self.paramclass = paramclass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+    def check_param(self, param: gdt.DataSet = None) -> gdt.DataSet:
+        """Return operation parameters (default parameters if `param` is None)"""
+        if self.paramclass is None:
+            if param is not None:
+                raise ValueError(f"Operation '{self.name}' has no parameters")
+            return None
+        if param is None:
+            return self.paramclass()
+        if not isinstance(param, self.paramclass):
+            raise TypeError(
+                f"Operation '{self.name}' parameters must be an instance "
+                f"of {self.paramclass.__name__}"
+            )
+        return param
+
+
+class Operation11(BaseOperation):
+    """Processing operation: 1 object in --> 1 object out
+
+    :param str name: operation name (registry key, e.g. "gaussian_filter")
+    :param str title: output object title prefix (e.g. "GaussianFilter")
+    :param callable func: data computing function (see `apply_func`)
+    :param type paramclass: parameters dataset class (None: no parameters)
+    :param callable suffix: function returning output object title suffix
+     from parameters
+    :param callable func_obj: output object finalizing function, called with
+     output object (and parameters, if any)
+    :param str inplace_kinds: data type kinds (see `numpy.dtype.kind`, e.g. "f"
+     for floating point data) for which `func` may write its result into input
+     data (`out` keyword argument) when applying operation in place
+    """
+
+    def __init__(
+        self,
+        name: str,
+        title: str,
+        func: Callable,
+        paramclass=None,
+        suffix: Callable = None,
+        func_obj: Callable = None,
+        inplace_kinds: str = "",
+    ):
+        super().__init__(name, title, func, paramclass)
+        self.suffix = suffix
+        self.func_obj = func_obj
+        self.inplace_kinds = inplace_kinds
+
+    @staticmethod
+    @abc.abstractmethod
+    def apply_func(obj, orig, func: Callable, param: gdt.DataSet) -> None:
+        """Compute `obj` data from `orig` data with data computing function
+        `func` (`obj` is updated in place)"""
+
+    @staticmethod
+    @abc.abstractmethod
+    def apply_func_in_place(
+        obj, func: Callable, param: gdt.DataSet, inplace_kinds: str = ""
+    ) -> None:
+        """Replace `obj` data by the result of data computing function `func`
+        (result is written into data if data type kind is in `inplace_kinds`)"""
+
+    def finalize(self, obj, param: gdt.DataSet) -> None:
+        """Finalize output object"""
+        if self.func_obj is not None:
+            if param is None:
+                self.func_obj(obj)
+            else:
+                self.func_obj(obj, param)
+
+    def get_title(self, srctitle: str, param: gdt.DataSet) -> str:
+        """Return output object title"""
+        title = f"{self.title}({srctitle})"
+        if self.suffix is not None:
+            title += "|" + self.suffix(param)
+        return title
+
+    def __call__(self, orig, param: gdt.DataSet = None):
+        """Return new object computed from `orig` object"""
+        param = self.check_param(param)
+        obj = self.OBJCLASS()  # pylint: disable=not-callable
+        obj.title = self.get_title(orig.title, param)
+        obj.copy_data_from(orig)
+        self.apply_func(obj, orig, self.func, param)
+        self.finalize(obj, param)
+        return obj
+
+    def apply_in_place(self, obj, param: gdt.DataSet = None) -> None:
+        """Apply operation to `obj` in place: `obj` data is replaced (or
+        overwritten, if possible) instead of creating a new object"""
+        param = self.check_param(param)
+        obj.title = self.get_title(obj.title, param)
+        self.apply_func_in_place(obj, self.func, param, self.inplace_kinds)
+        self.finalize(obj, param)
+
+
+class Operation10(BaseOperation):
+    """Processing operation: 1 object in --> 0 object out (result shape)
+
+    :param str name: operation name (registry key, e.g. "centroid")
+    :param str title: operation title (e.g. "Centroid")
+    :param callable func: function computing result shape from object (and
+     parameters, if any) and adding it to object metadata; if `kernel` is
+     specified, it is passed to `func` as `kernel` keyword argument
+    :param type paramclass: parameters dataset class (None: no parameters)
+    :param callable kernel: data computing function called by `func` (which
+     may be replaced when calling operation, e.g. to run it in another process)
+    :param callable batch_func: function computing result shapes of a list of
+     objects at once (and parameters, if any), returning one result per object
+     (see `apply_batch`): e.g. to fit all curves in a single call
+    """
+
+    def __init__(
+        self,
+        name: str,
+        title: str,
+        func: Callable,
+        paramclass=None,
+        kernel: Callable = None,
+        batch_func: Callable = None,
+    ):
+        super().__init__(name, title, func, paramclass)
+        self.kernel = kernel
+        self.batch_func = batch_func
+
+    def __call__(
+        self, obj, param: gdt.DataSet = None, kernel: Callable = None
+    ) -> ResultShape:
+        """Compute result shape from object (None if there is no result)"""
+        param = self.check_param(param)
+        args = (obj,) if param is None else (obj, param)
+        if self.kernel is None:
+            return self.func(*args)
+        return self.func(*args, kernel=self.kernel if kernel is None else kernel)
+
+    def apply_batch(self, objs: list, param: gdt.DataSet = None) -> list:
+        """Compute result shapes from objects list, at once if operation has a
+        batch function (one call per object otherwise): return one result per
+        object (None if there is no result)"""
+        if self.batch_func is None:
+            return [self(obj, param) for obj in objs]
+        param = self.check_param(param)
+        if param is None:
+            return self.batch_func(objs)
+        return self.batch_func(objs, param)
+
+
+_OPERATIONS = {}
+
+
+def register_operation(operation: BaseOperation) -> BaseOperation:
+    """Register processing operation (for its object class)"""
+    _OPERATIONS[(operation.OBJCLASS, operation.name)] = operation
+    return operation
+
+
+def get_operation_names(objclass: type = None) -> List[str]:
+    """Return names of operations registered for object class `objclass`
+    (default: all object classes)"""
+    return sorted(set(name for klass, name in _OPERATIONS if objclass in (None, klass)))
+
+
+def get_operation(objclass: type, name: str) -> BaseOperation:
+    """Return processing operation `name` registered for object class `objclass`"""
+    try:
+        return _OPERATIONS[(objclass, name)]
+    except KeyError as exc:
+        names = ", ".join(get_operation_names(objclass))
+        raise ValueError(
+            f"Unknown operation '{name}' for {objclass.__name__} objects "
+            f"(valid operations: {names})"
+        ) from exc
@@ -0,0 +1,601 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Image processing module
+
+Image processing operations (see `codraft.core.processing.base`): data
+computing functions take a data array (and parameters, if any) and return a
+new data array. Some of them also accept an `out` keyword argument (output
+array, which may be input data itself: see `ImageOperation11.apply_func_in_place`).
+
+Data may also be an image stack (3-D data: frame, row, column): data computing
+functions then process all frames in a single call (image axes being the last
+two axes), frames being processed independently.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+from typing import Callable
+
+import numpy as np
+import scipy.ndimage as spi
+from guidata.dataset.dataitems import BoolItem, ChoiceItem, FloatItem, IntItem
+from guidata.dataset.datatypes import DataSet, ValueProp
+
+from codraft.config import _
+from codraft.core.computation import fft, median, parallel, tiling
+from codraft.core.computation.flatfield import FlatFieldCorrector
+from codraft.core.computation.image import (
+    get_2d_peaks_coords,
+    get_centroid_coords,
+    get_contour_shapes,
+    get_enclosing_circle_coords,
+    get_nearest_neighbor_distances,
+)
+from codraft.core.model.base import BaseProcParam, ResultShape, ShapeTypes
+from codraft.core.model.image import ImageParam, RoiDataItem
+from codraft.core.processing.base import (
+    ClipParam,
+    FFTParam,
+    GaussianParam,
+    IFFTParam,
+    MovingAverageParam,
+    MovingMedianParam,
+    Operation10,
+    Operation11,
+    ThresholdParam,
+    register_operation,
+    remove_resultshapes,
+)
+
+
+class LogP1Param(DataSet):
+    """Log10 parameters"""
+
+    n = FloatItem("n")
+
+
+class RotateParam(DataSet):
+    """Rotate parameters"""
+
+    boundaries = ("constant", "nearest", "reflect", "wrap")
+    prop = ValueProp(False)
+
+    angle = FloatItem(f"{_('Angle')} (°)")
+    mode = ChoiceItem(
+        _("Mode"), list(zip(boundaries, boundaries)), default=boundaries[0]
+    )
+    cval = FloatItem(
+        _("cval"),
+        default=0.0,
+        help=_(
+            "Value used for points outside the "
+            "boundaries of the input if mode is "
+            "'constant'"
+        ),
+    )
+    reshape = BoolItem(
+        _("Reshape the output array"),
+        default=True,
+        help=_(
+            "Reshape the output array "
+            "so that the input array is "
+            "contained completely in the output"
+        ),
+    )
+    prefilter = BoolItem(_("Prefilter the input image"), default=True).set_prop(
+        "display", store=prop
+    )
+    order = IntItem(
+        _("Order"),
+        default=3,
+        min=0,
+        max=5,
+        help=_("Spline interpolation order"),
+    ).set_prop("display", active=prop)
+
+
+class ResizeParam(DataSet):
+    """Resize parameters"""
+
+    boundaries = ("constant", "nearest", "reflect", "wrap")
+    prop = ValueProp(False)
+
+    zoom = FloatItem(_("Zoom"))
+    mode = ChoiceItem(
+        _("Mode"), list(zip(boundaries, boundaries)), default=boundaries[0]
+    )
+    cval = FloatItem(
+        _("cval"),
+        default=0.0,
+        help=_(
+            "Value used for points outside the "
+            "boundaries of the input if mode is "
+            "'constant'"
+        ),
+    )
+    prefilter = BoolItem(_("Prefilter the input image"), default=True).set_prop(
+        "display", store=prop
+    )
+    order = IntItem(
+        _("Order"),
+        default=3,
+        min=0,
+        max=5,
+        help=_("Spline interpolation order"),
+    ).set_prop("display", active=prop)
+
+
+class FlatFieldParam(BaseProcParam):
+    """Flat-field parameters"""
+
+    threshold = FloatItem(_("Threshold"), default=0.0)
+
+
+class CalibrateParam(DataSet):
+    """Linear calibration parameters"""
+
+    a = FloatItem("a", default=1.0)
+    b = FloatItem("b", default=0.0)
+
+
+class PeakDetectionParam(DataSet):
+    """Peak detection parameters"""
+
+    size = IntItem(
+        _("Neighborhoods size"),
+        default=10,
+        min=1,
+        unit="pixels",
+        help=_(
+            "Size of the sliding window used in maximum/minimum filtering algorithm"
+        ),
+    )
+    threshold = FloatItem(
+        _("Relative threshold"),
+        default=0.5,
+        min=0.1,
+        max=0.9,
+        help=_(
+            "Detection threshold, relative to difference between "
+            "data maximum and minimum"
+        ),
+    )
+    create_rois = BoolItem(_("Create regions of interest"))
+
+
+class ContourShapeParam(DataSet):
+    """Contour shape parameters"""
+
+    shapes = (
+        ("ellipse", _("Ellipse")),
+        ("circle", _("Circle")),
+    )
+
+    shape = ChoiceItem(_("Shape"), shapes, default="ellipse")
+
+
+class ImageOperation11(Operation11):
+    """Image processing operation: 1 image in --> 1 image out"""
+
+    OBJCLASS = ImageParam
+
+    @staticmethod
+    def apply_func(obj, orig, func, param):
+        """Compute `obj` data from `orig` data with data computing function
+        `func` (`obj` is updated in place)"""
+        if param is None:
+            obj.data = func(orig.data)
+        else:
+            obj.data = func(orig.data, param)
+
+    @staticmethod
+    def apply_func_in_place(obj, func, param, inplace_kinds=""):
+        """Replace `obj` data by the result of data computing function `func`
+        (result is written into data if data type kind is in `inplace_kinds`)"""
+        args = () if param is None else (param,)
+        if obj.data.dtype.kind in inplace_kinds:
+            obj.detach_data()
+            func(obj.data, *args, out=obj.data)
+        else:
+            obj.data = func(obj.data, *args)
+        obj.invalidate_maskdata_cache()
+
+
+class ImageOperation10(Operation10):
+    """Image processing operation: 1 image in --> 0 image out (result shape)"""
+
+    OBJCLASS = ImageParam
+
+
+# ------Data computing functions
+def get_frame_param(z: np.ndarray, value, frame_value):
+    """Return filter parameter applied along image axes (`value`), and along the
+    frame axis of image stacks (`frame_value`: e.g. 0 for a gaussian filter)"""
+    if z.ndim == 2:
+        return value
+    return (frame_value,) * (z.ndim - 2) + (value, value)
+
+
+def apply_to_frames(func: Callable, z: np.ndarray, *args) -> np.ndarray:
+    """Apply 2-D data computing function `func` to `z`, frame by frame if `z` is
+    an image stack (for functions which can't process all frames at once)"""
+    if z.ndim == 2:
+        return func(z, *args)
+    result = func(z[0], *args)
+    out = np.empty(z.shape[:-2] + result.shape, dtype=result.dtype)
+    out[0] = result
+    del result
+    for index in range(1, len(z)):
+        out[index] = func(z[index], *args)
+    return out
+
+
+def compute_logp1(z, p: LogP1Param, out=None):
+    """Compute base 10 logarithm of z+n"""
+    return np.log10(np.add(z, p.n, out=out), out=out)
+
+
+def compute_rotate(z, p: RotateParam):
+    """Rotate data arbitrarily"""
+    return spi.rotate(
+        z,
+        p.angle,
+        axes=(z.ndim - 1, z.ndim - 2),
+        reshape=p.reshape,
+        order=p.order,
+        mode=p.mode,
+        cval=p.cval,
+        prefilter=p.prefilter,
+    )
+
+
+def compute_rotate90(z):
+    """Rotate data 90°"""
+    return np.rot90(z, 1, axes=(-2, -1))
+
+
+def compute_rotate270(z):
+    """Rotate data 270°"""
+    return np.rot90(z, 3, axes=(-2, -1))
+
+
+def compute_fliplr(z):
+    """Flip data horizontally"""
+    return np.flip(z, axis=-1)
+
+
+def compute_flipud(z):
+    """Flip data vertically"""
+    return np.flip(z, axis=-2)
+
+
+def __resize(z, p: ResizeParam):
+    """Resize 2-D data"""
+    return spi.interpolation.zoom(
+        z,
+        p.zoom,
+        order=p.order,
+        mode=p.mode,
+        cval=p.cval,
+        prefilter=p.prefilter,
+    )
+
+
+def compute_resize(z, p: ResizeParam):
+    """Resize data"""
+    # Frame by frame: spline prefiltering would otherwise mix frames
+    return apply_to_frames(__resize, z, p)
+
+
+def compute_swap_axes(z):
+    """Swap data axes"""
+    return np.swapaxes(z, -1, -2)
+
+
+def compute_calibration(z, p: CalibrateParam, out=None):
+    """Compute linear calibration"""
+    if out is None:
+        return p.a * z + p.b
+    np.multiply(z, p.a, out=out)
+    out += p.b
+    return out
+
+
+def compute_threshold(z, p: ThresholdParam, out=None):
+    """Compute threshold clipping"""
+    return np.clip(z, p.value, z.max(), out=out)
+
+
+def compute_clip(z, p: ClipParam, out=None):
+    """Compute maximum data clipping"""
+    return np.clip(z, z.min(), p.value, out=out)
+
+
+def compute_gaussian_filter(z, p: GaussianParam, out=None):
+    """Compute gaussian filter"""
+    sigma = get_frame_param(z, p.sigma, 0.0)
+    return tiling.gaussian_filter(z, sigma, output=out)
+
+
+def compute_moving_average(z, p: MovingAverageParam, out=None):
+    """Compute moving average"""
+    size = get_frame_param(z, p.n, 1)
+    return tiling.uniform_filter(z, size=size, mode="constant", output=out)
+
+
+def compute_moving_median(z, p: MovingMedianParam):
+    """Compute moving median"""
+    return median.median_filter(z, p.n)
+
+
+def compute_wiener(z):
+    """Compute Wiener filter"""
+    return apply_to_frames(tiling.wiener, z)
+
+
+def compute_fft(z, p: FFTParam):
+    """Compute FFT (of each frame, for image stacks)"""
+    return fft.fftn(z, axes=(-2, -1), real=p.real, fast_length=p.fast_length)
+
+
+def compute_ifft(z, p: IFFTParam):
+    """Compute inverse FFT (of each frame, for image stacks)"""
+    return fft.ifftn(z, axes=(-2, -1), real=p.real, size=p.size)
+
+
+def finalize_resize(obj, param: ResizeParam) -> None:
+    """Finalize resized image: update pixel size"""
+    if obj.dx is not None and obj.dy is not None:
+        obj.dx, obj.dy = obj.dx / param.zoom, obj.dy / param.zoom
+    # TODO: [P2] Instead of removing geometric shapes, apply zoom
+    obj.remove_resultshapes()
+
+
+def compute_flat_field(
+    raw: ImageParam,
+    flat: ImageParam,
+    param: FlatFieldParam,
+    corrector: FlatFieldCorrector = None,
+) -> ImageParam:
+    """Return flat field corrected image (2 images in --> 1 image out)
+
+    `corrector` is the flat-field correction engine created from `flat` data,
+    which may be reused to correct several raw images (default: new engine)"""
+    if corrector is None:
+        corrector = FlatFieldCorrector(flat.data)
+    obj = ImageParam()
+    obj.title = f"FlatField({raw.title},{flat.title},threshold={param.threshold})"
+    obj.copy_data_from(raw)
+    obj.data = corrector.correct(raw.data, param.threshold)
+    return obj
+
+
+# ------Result shape computing functions
+def apply_origin_size_roi(image: ImageParam, func: Callable, *args) -> np.ndarray:
+    """Exec computation taking into account image x0, y0, dx, dy and ROIs
+
+    ROIs being independent, `func` is evaluated on all ROI data views in
+    parallel, on the application-wide "rois" thread pool: this is well suited
+    for functions releasing the GIL, while functions holding the GIL may be
+    run in worker processes by passing a process pool wrapper as `func` (e.g.
+    `functools.partial(engine.run, kernel)`, see `parallel.ProcessPoolEngine`),
+    threads then only dispatching ROIs to processes. Results are gathered in
+    ROI order."""
+    i_rois = list(image.iterate_roi_indexes())
+    argslist = [(image.get_data(i_roi),) + args for i_roi in i_rois]
+    if len(argslist) > 1:
+        pool = parallel.get_thread_pool("rois")
+        results = parallel.map_jobs(func, argslist, pool)
+    else:
+        results = [func(*fargs) for fargs in argslist]
+    res = []
+    for i_roi, coords in zip(i_rois, results):
+        if coords.size:
+            if image.roi is not None:
+                roidataitem = RoiDataItem(image.roi[i_roi])
+                x0, y0, _x1, _y1 = roidataitem.get_bounding_box(image.data.shape)
+                coords[:, ::2] += x0
+                coords[:, 1::2] += y0
+            coords[:, ::2] = image.dx * coords[:, ::2] + image.x0
+            coords[:, 1::2] = image.dy * coords[:, 1::2] + image.y0
+            idx = np.ones((coords.shape[0], 1)) * i_roi
+            coords = np.hstack([idx, coords])
+            res.append(coords)
+    if res:
+        return np.vstack(res)
+    return None
+
+
+def compute_centroid(
+    image: ImageParam, kernel: Callable = get_centroid_coords
+) -> ResultShape:
+    """Compute centroid"""
+    res = apply_origin_size_roi(image, kernel)
+    if res is not None:
+        return image.add_resultshape("Centroid", ShapeTypes.MARKER, res)
+    return None
+
+
+def compute_enclosing_circle(
+    image: ImageParam, kernel: Callable = get_enclosing_circle_coords
+) -> ResultShape:
+    """Compute minimum enclosing circle"""
+    res = apply_origin_size_roi(image, kernel)
+    if res is not None:
+        return image.add_resultshape("MinEnclosCircle", ShapeTypes.CIRCLE, res)
+    return None
+
+
+def create_peak_rois(image: ImageParam, coords: np.ndarray) -> None:
+    """Create square regions of interest around peaks (`coords`: peaks
+    coordinates), as large as possible without overlapping (a single peak
+    region of interest covering the whole image, at least 1 pixel wide)"""
+    if len(coords) == 0:
+        return
+    dist = get_nearest_neighbor_distances(coords)
+    dist = dist[dist > 0]
+    if np.isfinite(dist).any():
+        radius = max(int(0.5 * dist.min() / np.sqrt(2) - 1), 1)
+    else:
+        # Single peak: no neighbor to avoid
+        radius = max(image.size)
+    roicoords = []
+    xmax, ymax = image.size
+    for x, y in coords:
+        roicoords.append(
+            [
+                max(x - radius, 0),
+                max(y - radius, 0),
+                min(x + radius, xmax),
+                min(y + radius, ymax),
+            ]
+        )
+    image.roi = np.array(roicoords, int)
+
+
+def compute_peak_detection(
+    image: ImageParam, p: PeakDetectionParam, kernel: Callable = get_2d_peaks_coords
+) -> ResultShape:
+    """Compute 2D peak detection (and create regions of interest around
+    peaks, if `create_rois` parameter is set)"""
+    res = apply_origin_size_roi(image, kernel, p.size, p.threshold)
+    if res is None:
+        return None
+    result = image.add_resultshape("Peaks", ShapeTypes.POINT, res)
+    if p.create_rois:
+        create_peak_rois(image, result.data)
+    return result
+
+
+def compute_contour_shape(
+    image: ImageParam, p: ContourShapeParam, kernel: Callable = get_contour_shapes
+) -> ResultShape:
+    """Compute contour shape fit"""
+    res = apply_origin_size_roi(image, kernel, p.shape)
+    if res is not None:
+        shape = ShapeTypes.CIRCLE if p.shape == "circle" else ShapeTypes.ELLIPSE
+        return image.add_resultshape("Contour", shape, res)
+    return None
+
+
+# ------Operations
+for _operation in (
+    ImageOperation11(
+        "logp1",
+        "Log10(z+n)",
+        compute_logp1,
+        LogP1Param,
+        suffix=lambda p: f"n={p.n}",
+        inplace_kinds="f",
+    ),
+    # TODO: [P2] Instead of removing geometric shapes, apply rotation
+    ImageOperation11(
+        "rotate",
+        "Rotate",
+        compute_rotate,
+        RotateParam,
+        suffix=lambda p: f"α={p.angle:.3f}°, mode='{p.mode}'",
+        func_obj=remove_resultshapes,
+    ),
+    ImageOperation11(
+        "rotate90", "Rotate90", compute_rotate90, func_obj=remove_resultshapes
+    ),
+    ImageOperation11(
+        "rotate270", "Rotate270", compute_rotate270, func_obj=remove_resultshapes
+    ),
+    ImageOperation11("fliplr", "HFlip", compute_fliplr, func_obj=remove_resultshapes),
+    ImageOperation11("flipud", "VFlip", compute_flipud, func_obj=remove_resultshapes),
+    ImageOperation11(
+        "resize",
+        "Zoom",
+        compute_resize,
+        ResizeParam,
+        suffix=lambda p: f"zoom={p.zoom:.3f}",
+        func_obj=finalize_resize,
+    ),
+    ImageOperation11(
+        "swap_axes", "SwapAxes", compute_swap_axes, func_obj=remove_resultshapes
+    ),
+    ImageOperation11("abs", "Abs", np.abs, inplace_kinds="fiu"),
+    ImageOperation11("log10", "Log10", np.log10, inplace_kinds="f"),
+    ImageOperation11(
+        "calibrate",
+        "LinearCal",
+        compute_calibration,
+        CalibrateParam,
+        suffix=lambda p: f"z={p.a}*z+{p.b}",
+        inplace_kinds="f",
+    ),
+    ImageOperation11(
+        "threshold",
+        "Threshold",
+        compute_threshold,
+        ThresholdParam,
+        suffix=lambda p: f"min={p.value} lsb",
+        inplace_kinds="f",
+    ),
+    ImageOperation11(
+        "clip",
+        "Clip",
+        compute_clip,
+        ClipParam,
+        suffix=lambda p: f"max={p.value} lsb",
+        inplace_kinds="f",
+    ),
+    ImageOperation11(
+        "gaussian_filter",
+        "GaussianFilter",
+        compute_gaussian_filter,
+        GaussianParam,
+        suffix=lambda p: f"σ={p.sigma:.3f} pixels",
+        inplace_kinds="fiu",
+    ),
+    ImageOperation11(
+        "moving_average",
+        "MovAvg",
+        compute_moving_average,
+        MovingAverageParam,
+        suffix=lambda p: f"n={p.n}",
+        inplace_kinds="fiu",
+    ),
+    ImageOperation11(
+        "moving_median",
+        "MovMed",
+        compute_moving_median,
+        MovingMedianParam,
+        suffix=lambda p: f"n={p.n}",
+    ),
+    ImageOperation11("wiener", "WienerFilter", compute_wiener),
+    ImageOperation11("fft", "FFT", compute_fft, FFTParam),
+    ImageOperation11("ifft", "iFFT", compute_ifft, IFFTParam),
+    ImageOperation10(
+        "centroid", _("Centroid"), compute_centroid, kernel=get_centroid_coords
+    ),
+    # TODO: [P2] Find a way to add the circle to the computing results
+    #  as in "enclosingcircle_test.py"
+    ImageOperation10(
+        "enclosing_circle",
+        _("MinEnclosingCircle"),
+        compute_enclosing_circle,
+        kernel=get_enclosing_circle_coords,
+    ),
+    ImageOperation10(
+        "peak_detection",
+        _("Peaks"),
+        compute_peak_detection,
+        PeakDetectionParam,
+        kernel=get_2d_peaks_coords,
+    ),
+    ImageOperation10(
+        "contour_shape",
+        _("Contour"),
+        compute_contour_shape,
+        ContourShapeParam,
+        kernel=get_contour_shapes,
+    ),
+):
+    register_operation(_operation)
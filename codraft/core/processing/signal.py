@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT Signal processing module
+
+Signal processing operations (see `codraft.core.processing.base`): data
+computing functions take X and Y data arrays (and parameters, if any) and
+return new X and Y data arrays.
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+from typing import List
+
+import numpy as np
+import scipy.integrate as spt
+import scipy.ndimage as spi
+import scipy.signal as sps
+from guidata.dataset.dataitems import ChoiceItem, FloatItem, IntItem
+from guidata.dataset.datatypes import DataSet
+
+from codraft.config import _
+from codraft.core.computation import fit, median
+from codraft.core.computation.signal import (
+    MOVING_AVERAGE_MODES,
+    derivative,
+    moving_average,
+    normalize,
+    peak_indexes,
+    xy_fft,
+    xy_ifft,
+)
+from codraft.core.model.base import ResultShape, ShapeTypes
+from codraft.core.model.signal import SignalParam
+from codraft.core.processing.base import (
+    ClipParam,
+    FFTParam,
+    GaussianParam,
+    IFFTParam,
+    MovingAverageParam,
+    MovingMedianParam,
+    Operation10,
+    Operation11,
+    ThresholdParam,
+    register_operation,
+    remove_resultshapes,
+)
+
+
+class SignalMovingAverageParam(MovingAverageParam):
+    """Signal moving average parameters"""
+
+    modes = (
+        ("edge", _("Edge value")),
+        ("constant", _("Zero")),
+        ("reflect", _("Reflection (about edge sample)")),
+        ("symmetric", _("Mirror (including edge sample)")),
+        ("wrap", _("Periodic")),
+    )
+    mode = ChoiceItem(_("Signal extension beyond edges"), modes, default="edge")
+
+
+class PeakDetectionParam(DataSet):
+    """Peak detection parameters"""
+
+    threshold = IntItem(
+        _("Threshold"), default=30, min=0, max=100, slider=True, unit="%"
+    )
+    min_dist = IntItem(_("Minimum distance"), default=1, min=1, unit="points")
+
+
+class NormalizeParam(DataSet):
+    """Normalize parameters"""
+
+    methods = (
+        (_("maximum"), "maximum"),
+        (_("amplitude"), "amplitude"),
+        (_("sum"), "sum"),
+        (_("energy"), "energy"),
+    )
+    method = ChoiceItem(_("Normalize with respect to"), methods)
+
+
+class CalibrateParam(DataSet):
+    """Calibration parameters"""
+
+    axes = (("x", _("X-axis")), ("y", _("Y-axis")))
+    axis = ChoiceItem(_("Calibrate"), axes, default="y")
+    a = FloatItem("a", default=1.0)
+    b = FloatItem("b", default=0.0)
+
+
+class PolynomialFitParam(DataSet):
+    """Polynomial fitting parameters"""
+
+    degree = IntItem(_("Degree"), 3, min=1, max=10, slider=True)
+
+
+class FWHMParam(DataSet):
+    """FWHM parameters"""
+
+    fittypes = (
+        ("GaussianModel", _("Gaussian")),
+        ("LorentzianModel", _("Lorentzian")),
+        ("VoigtModel", "Voigt"),
+    )
+
+    fittype = ChoiceItem(_("Fit type"), fittypes, default="GaussianModel")
+
+
+class SignalOperation11(Operation11):
+    """Signal processing operation: 1 signal in --> 1 signal out"""
+
+    OBJCLASS = SignalParam
+
+    @staticmethod
+    def apply_func(obj, orig, func, param):
+        """Compute `obj` data from `orig` data with data computing function
+        `func` (`obj` is updated in place)"""
+        data = orig.xydata
+        if len(data) == 2:  # x, y signal
+            x, y = data
+            if param is None:
+                obj.xydata = func(x, y)
+            else:
+                obj.xydata = func(x, y, param)
+        elif len(data) == 4:  # x, y, dx, dy error bar signal
+            x, y, dx, dy = data
+            if param is None:
+                x2, y2 = func(x, y)
+                _x3, dy2 = func(x, dy)
+            else:
+                x2, y2 = func(x, y, param)
+                _x3, dy2 = func(x, dy, param)
+            obj.xydata = x2, y2, dx, dy2
+
+    @staticmethod
+    # pylint: disable=unused-argument
+    def apply_func_in_place(obj, func, param, inplace_kinds=""):
+        """Replace `obj` data by the result of data computing function `func`
+        (signal data is always replaced: `inplace_kinds` is ignored)"""
+        SignalOperation11.apply_func(obj, obj, func, param)
+
+
+class SignalOperation10(Operation10):
+    """Signal processing operation: 1 signal in --> 0 signal out (result shape)"""
+
+    OBJCLASS = SignalParam
+
+
+# ------Data computing functions
+def compute_swap_axes(x, y):
+    """Swap data axes"""
+    return y, x
+
+
+def compute_abs(x, y):
+    """Compute absolute value"""
+    return x, np.abs(y)
+
+
+def compute_log10(x, y):
+    """Compute Log10"""
+    return x, np.log10(y)
+
+
+def compute_peak_detection(x, y, p: PeakDetectionParam):
+    """Detect peaks"""
+    indexes = peak_indexes(y, thres=p.threshold * 0.01, min_dist=p.min_dist)
+    return x[indexes], y[indexes]
+
+
+def compute_normalize(x, y, p: NormalizeParam):
+    """Normalize data"""
+    return x, normalize(y, p.method)
+
+
+def compute_derivative(x, y):
+    """Compute derivative"""
+    return x, derivative(x, y)
+
+
+def compute_integral(x, y):
+    """Compute integral"""
+    return x, spt.cumtrapz(y, x, initial=0.0)
+
+
+def compute_calibration(x, y, p: CalibrateParam):
+    """Compute linear calibration"""
+    if p.axis == "x":
+        return p.a * x + p.b, y
+    return x, p.a * y + p.b
+
+
+def compute_threshold(x, y, p: ThresholdParam):
+    """Compute threshold clipping"""
+    return x, np.clip(y, p.value, y.max())
+
+
+def compute_clip(x, y, p: ClipParam):
+    """Compute maximum data clipping"""
+    return x, np.clip(y, y.min(), p.value)
+
+
+def compute_gaussian_filter(x, y, p: GaussianParam):
+    """Compute gaussian filter"""
+    return x, spi.gaussian_filter1d(y, p.sigma)
+
+
+def compute_moving_average(x, y, p: MovingAverageParam):
+    """Compute moving average (edge mode is taken from `p` if it is a
+    `SignalMovingAverageParam` instance)"""
+    mode = getattr(p, "mode", MOVING_AVERAGE_MODES[0])
+    return x, moving_average(y, p.n, mode)
+
+
+def compute_moving_median(x, y, p: MovingMedianParam):
+    """Compute moving median"""
+    return x, median.median_filter(y, p.n)
+
+
+def compute_wiener(x, y):
+    """Compute Wiener filter"""
+    return x, sps.wiener(y)
+
+
+def compute_fft(x, y, p: FFTParam):
+    """Compute FFT"""
+    return xy_fft(x, y, real=p.real, fast_length=p.fast_length)
+
+
+def compute_ifft(x, y, p: IFFTParam):
+    """Compute iFFT"""
+    return xy_ifft(x, y, real=p.real, size=p.size)
+
+
+def set_sticks_style(obj, param=None) -> None:  # pylint: disable=unused-argument
+    """Set signal curve style to "Sticks" (e.g. for detected peaks)"""
+    obj.metadata["curvestyle"] = "Sticks"
+
+
+# ------Result shape computing functions
+FWHM_TITLE = _("FWHM")
+FW1E2_TITLE = _("FW") + "1/e²"
+
+
+def fit_rois(signals: List[SignalParam], FitModel: fit.FitModel) -> List[list]:
+    """Fit `FitModel` on all ROIs of all `signals` at once (see `fit.fit_batch`)
+    and return, for each signal, the list of (ROI index, fitted parameters),
+    parameters being NaN if fit did not converge"""
+    curves, p0, owners = [], [], []
+    for index, signal in enumerate(signals):
+        for i_roi in signal.iterate_roi_indexes():
+            x, y = signal.get_data(i_roi)
+            curves.append((x, y))
+            p0.append(fit.get_initial_params(FitModel, x, y))
+            owners.append((index, i_roi))
+    fits = [[] for _signal in signals]
+    if curves:
+        x, y, weights = fit.stack_curves(curves)
+        params, converged = fit.fit_batch(FitModel, x, y, p0, weights)
+        params[~converged] = np.nan
+        for (index, i_roi), fparams in zip(owners, params):
+            fits[index].append((i_roi, fparams))
+    return fits
+
+
+def compute_fwhm_batch(
+    signals: List[SignalParam], param: FWHMParam
+) -> List[ResultShape]:
+    """Compute FWHM of signals (all ROIs of all signals being fitted at once,
+    segment coordinates being NaN if fit did not converge)"""
+    FitModel = getattr(fit, param.fittype)
+    results = []
+    for signal, fits in zip(signals, fit_rois(signals, FitModel)):
+        res = []
+        for i_roi, (amp, sigma, mu, base) in fits:
+            x0, y0, x1, y1 = FitModel.half_max_segment(amp, sigma, mu, base)
+            res.append([i_roi, x0, y0, x1, y1])
+        array = np.array(res)
+        results.append(signal.add_resultshape(FWHM_TITLE, ShapeTypes.SEGMENT, array))
+    return results
+
+
+def compute_fwhm(signal: SignalParam, param: FWHMParam) -> ResultShape:
+    """Compute FWHM"""
+    return compute_fwhm_batch([signal], param)[0]
+
+
+def compute_fw1e2_batch(signals: List[SignalParam]) -> List[ResultShape]:
+    """Compute FW at 1/e² of signals (all ROIs of all signals being fitted at
+    once, segment coordinates being NaN if fit did not converge)"""
+    results = []
+    for signal, fits in zip(signals, fit_rois(signals, fit.GaussianModel)):
+        res = []
+        for i_roi, (amp, sigma, mu, base) in fits:
+            hw = 2 * sigma
+            amplitude = fit.GaussianModel.amplitude(amp, sigma)
+            yhm = amplitude / np.e**2 + base
+            res.append([i_roi, mu - hw, yhm, mu + hw, yhm])
+        array = np.array(res)
+        results.append(signal.add_resultshape(FW1E2_TITLE, ShapeTypes.SEGMENT, array))
+    return results
+
+
+def compute_fw1e2(signal: SignalParam) -> ResultShape:
+    """Compute FW at 1/e²"""
+    return compute_fw1e2_batch([signal])[0]
+
+
+# ------Operations
+for _operation in (
+    SignalOperation11(
+        "swap_axes", "SwapAxes", compute_swap_axes, func_obj=remove_resultshapes
+    ),
+    SignalOperation11("abs", "Abs", compute_abs),
+    SignalOperation11("log10", "Log10", compute_log10),
+    SignalOperation11(
+        "peak_detection",
+        "Peaks",
+        compute_peak_detection,
+        PeakDetectionParam,
+        suffix=lambda p: f"threshold={p.threshold}%, min_dist={p.min_dist}pts",
+        func_obj=set_sticks_style,
+    ),
+    SignalOperation11(
+        "normalize",
+        "Normalize",
+        compute_normalize,
+        NormalizeParam,
+        suffix=lambda p: f"ref={p.method}",
+    ),
+    SignalOperation11("derivative", "Derivative", compute_derivative),
+    SignalOperation11("integral", "Integral", compute_integral),
+    SignalOperation11(
+        "calibrate",
+        "LinearCal",
+        compute_calibration,
+        CalibrateParam,
+        suffix=lambda p: f"{p.axis}={p.a}*{p.axis}+{p.b}",
+    ),
+    SignalOperation11(
+        "threshold",
+        "Threshold",
+        compute_threshold,
+        ThresholdParam,
+        suffix=lambda p: f"min={p.value} lsb",
+    ),
+    SignalOperation11(
+        "clip",
+        "Clip",
+        compute_clip,
+        ClipParam,
+        suffix=lambda p: f"max={p.value} lsb",
+    ),
+    SignalOperation11(
+        "gaussian_filter",
+        "GaussianFilter",
+        compute_gaussian_filter,
+        GaussianParam,
+        suffix=lambda p: f"σ={p.sigma:.3f} pixels",
+    ),
+    SignalOperation11(
+        "moving_average",
+        "MovAvg",
+        compute_moving_average,
+        MovingAverageParam,
+        suffix=lambda p: f"n={p.n}",
+    ),
+    SignalOperation11(
+        "moving_median",
+        "MovMed",
+        compute_moving_median,
+        MovingMedianParam,
+        suffix=lambda p: f"n={p.n}",
+    ),
+    SignalOperation11("wiener", "WienerFilter", compute_wiener),
+    SignalOperation11("fft", "FFT", compute_fft, FFTParam),
+    SignalOperation11("ifft", "iFFT", compute_ifft, IFFTParam),
+    SignalOperation10(
+        "fwhm", FWHM_TITLE, compute_fwhm, FWHMParam, batch_func=compute_fwhm_batch
+    ),
+    SignalOperation10(
+        "fw1e2", FW1E2_TITLE, compute_fw1e2, batch_func=compute_fw1e2_batch
+    ),
+):
+    register_operation(_operation)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Batch processing test
+
+Testing the following:
+  - Write test images and signals to files
+  - Apply processing recipes to these files (in current process and in a pool
+    of processes), results being saved to HDF5 files
+  - Check that results are identical to those obtained with processing functions
+  - Check that files which can't be processed are reported
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import json
+import os.path as osp
+
+import numpy as np
+import scipy.ndimage as spi
+
+from codraft import batch
+from codraft.core.computation.image import flatfield
+from codraft.core.io.objects import read_h5_objects
+from codraft.core.model.image import ImageParam
+from codraft.env import execenv
+from codraft.tests.data import PeakDataParam, create_test_signal2, get_peak2d_data
+from codraft.utils.tests import temporary_directory
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+IMAGE_RECIPE = {
+    "operations": [
+        {"operation": "flat_field", "flat": "flat.npy", "param": {"threshold": 0.0}},
+        {"operation": "gaussian_filter", "param": {"sigma": 2.0}},
+        {"operation": "abs"},
+    ]
+}
+
+SIGNAL_RECIPE = [{"operation": "moving_median", "param": {"n": 5}}]
+
+
+def check_recipe_test():
+    """Test recipe checking"""
+    for recipe in (
+        [],
+        [{"operation": "unknown"}],
+        [{"operation": "gaussian_filter", "param": {"sgma": 2.0}}],
+        [{"operation": "abs", "param": {"value": 2.0}}],
+        [{"operation": "flat_field"}],
+    ):
+        try:
+            batch.check_recipe(recipe)
+        except ValueError as exc:
+            execenv.print(f"Invalid recipe (as expected): {exc}")
+        else:
+            raise AssertionError(f"Invalid recipe was accepted: {recipe}")
+
+
+def batch_test(nbfiles: int = 4):
+    """Test batch processing"""
+    with temporary_directory() as tmpdir:
+        flat = np.linspace(0.5, 1.5, 200 * 200).reshape(200, 200)
+        np.save(osp.join(tmpdir, "flat.npy"), flat)
+        recipe = json.loads(json.dumps(IMAGE_RECIPE))
+        recipe["operations"][0]["flat"] = osp.join(tmpdir, "flat.npy")
+        recipe_fname = osp.join(tmpdir, "recipe.json")
+        with open(recipe_fname, "w", encoding="utf-8") as fdesc:
+            json.dump(recipe, fdesc)
+        recipe = batch.load_recipe(recipe_fname)
+        filenames, references = [], []
+        for index in range(nbfiles):
+            data = get_peak2d_data(PeakDataParam(size=200), seed=index)
+            filenames.append(osp.join(tmpdir, f"image{index:02d}.npy"))
+            np.save(filenames[-1], data)
+            corrected = flatfield(data, flat, 0.0)
+            references.append(np.abs(spi.gaussian_filter(corrected, 2.0)))
+        signal = create_test_signal2()
+        sig_fname = osp.join(tmpdir, "signal.csv")
+        np.savetxt(sig_fname, signal.xydata.T, header="X,Y", delimiter=",", comments="")
+        for max_workers in (0, 2):
+            output = osp.join(tmpdir, f"output{max_workers}.h5")
+            failed = batch.run_batch(
+                recipe, filenames + [sig_fname], output, max_workers=max_workers
+            )
+            assert failed == [sig_fname]  # Flat field does not apply to signals
+            objs = list(read_h5_objects(output))
+            assert len(objs) == nbfiles
+            for obj, reference, fname in zip(objs, references, filenames):
+                assert isinstance(obj, ImageParam)
+                assert obj.title.startswith("Abs(GaussianFilter(FlatField(")
+                assert osp.basename(fname) in obj.title
+                assert np.array_equal(obj.data, reference)
+        output = osp.join(tmpdir, "signals.h5")
+        assert not batch.run_batch(SIGNAL_RECIPE, [sig_fname], output, max_workers=0)
+        (obj,) = read_h5_objects(output)
+        assert np.allclose(obj.x, signal.x)
+        assert obj.title == "MovMed(signal.csv)|n=5"
+
+
+if __name__ == "__main__":
+    check_recipe_test()
+    batch_test()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Result cache test
+
+Testing the following:
+  - Cache keys depend on function, data and parameters
+  - Cached results are returned (as copies) instead of being computed again
+  - Least recently used results are evicted when memory cap is reached
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import time
+
+import numpy as np
+import scipy.ndimage as spi
+
+from codraft.core.computation.cache import ResultCache, get_func_key
+from codraft.core.gui.processor.base import GaussianParam
+from codraft.env import execenv
+from codraft.tests.data import get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def func_key_test():
+    """Test function keys"""
+    p1, p2 = GaussianParam(), GaussianParam()
+    p2.sigma = 2.0
+
+    def func(x, p):
+        return spi.gaussian_filter(x, p.sigma)
+
+    assert get_func_key(func) is not None
+    assert get_func_key(np.abs) is not None
+    assert get_func_key(p1.edit) is None  # Bound method
+    cache = ResultCache(1024**2)
+    edit = p1.edit
+    assert cache.wrap(edit) is edit
+    assert cache.wrap(func, runfunc=np.abs) is not np.abs
+    cached_func = cache.wrap(func)
+    for param in (p1, p2, p1):
+        cached_func(np.ones(4), param)
+    assert cache.hits == 1 and cache.misses == 2
+
+
+def result_cache_test():
+    """Test result cache"""
+    data = get_peak2d_data(seed=1)
+    param = GaussianParam()
+    param.sigma = 5.0
+    cache = ResultCache(max_nbytes=3 * data.nbytes)
+    func = cache.wrap(lambda x, p: spi.gaussian_filter(x, p.sigma))
+    t0 = time.time()
+    result = func(data, param)
+    t1 = time.time()
+    cached = func(data, param)
+    t2 = time.time()
+    execenv.print(
+        f"Computed in {int((t1 - t0) * 1e3):d} ms, "
+        f"cached result returned in {int((t2 - t1) * 1e3):d} ms"
+    )
+    assert cache.hits == 1 and cache.misses == 1
+    assert np.array_equal(result, cached) and result is not cached
+    cached[:] = 0  # Modifying result must not alter cached result
+    assert np.array_equal(func(data, param), result)
+    func(data + 1, param)  # Different data
+    param.sigma = 1.0
+    func(data, param)  # Different parameters
+    assert cache.misses == 3 and len(cache) == 3
+    func(data * 2, param)  # Oldest result is evicted
+    assert len(cache) == 3 and cache.nbytes <= cache.max_nbytes
+    cache.max_nbytes = data.nbytes
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+if __name__ == "__main__":
+    func_key_test()
+    result_cache_test()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Fourier centroid algorithm test
+
+Testing the following:
+  - Row/column projections give the same weighted sums as full-size 2D sums
+  - Cosine/sine vectors are cached by size
+  - Masked arrays (masked pixels are ignored)
+  - Batch centroids (image stack) are the same as centroids of each frame
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+from numpy import ma
+
+from codraft.core.computation.image import (
+    get_centroid_fourier,
+    get_centroid_fourier_batch,
+    get_fourier_sums,
+    get_fourier_vectors,
+)
+from codraft.env import execenv
+from codraft.tests.data import get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def fourier_sums_test():
+    """Test weighted sums computed from projections"""
+    data = get_peak2d_data(multi=False)
+    cos_a, sin_a = get_fourier_vectors(data.shape[0])
+    cos_b, sin_b = get_fourier_vectors(data.shape[1])
+    expected = (
+        (cos_a[:, np.newaxis] * data).sum(),
+        (sin_a[:, np.newaxis] * data).sum(),
+        (data * cos_b).sum(),
+        (data * sin_b).sum(),
+    )
+    assert np.allclose(get_fourier_sums(data), expected)
+    assert get_fourier_vectors(data.shape[0])[0] is cos_a
+    assert not cos_a.flags.writeable
+    execenv.print("Fourier weighted sums: OK")
+
+
+def masked_test():
+    """Test centroid of masked arrays"""
+    data = get_peak2d_data(multi=False)
+    _row, col = get_centroid_fourier(data)
+    masked = ma.masked_array(data.copy(), mask=np.zeros(data.shape, dtype=bool))
+    masked.mask[:, : col // 2] = True
+    expected = get_centroid_fourier(masked.filled(0))
+    masked.data[:, : col // 2] = data.max()  # Masked values are ignored
+    assert get_centroid_fourier(masked) == expected
+    masked.mask[:] = True
+    assert np.isnan(get_centroid_fourier(masked)).all()
+    execenv.print("Masked arrays: OK")
+
+
+def batch_test():
+    """Test batch centroids"""
+    rng = np.random.default_rng(1)
+    stack = rng.random((8, 60, 50)) ** 8
+    stack[3] = 0.0  # Undefined centroid
+    rows, cols = get_centroid_fourier_batch(stack)
+    assert rows.shape == cols.shape == (8,)
+    for frame, row, col in zip(stack, rows, cols):
+        assert get_centroid_fourier(frame) == (row, col)
+    execenv.print("Batch centroids: OK")
+
+
+def centroid_fourier_test():
+    """Fourier centroid algorithm test"""
+    fourier_sums_test()
+    masked_test()
+    batch_test()
+
+
+if __name__ == "__main__":
+    centroid_fourier_test()
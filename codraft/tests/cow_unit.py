@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Copy-on-write object data test
+
+Testing the following:
+  - Copying an object shares its data (read-only views) instead of copying it
+  - A private copy is made only when an object modifies its data in place
+    (`detach_data`), and the data becomes writable again when the other objects
+    are released
+  - Metadata arrays are shared, other metadata entries are independent
+  - Processing operations no longer allocate a throw-away copy of input data
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import gc
+import tracemalloc
+
+import numpy as np
+
+from codraft.core.model.base import ROI_KEY
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.model.signal import SignalParam, create_signal
+from codraft.core.processing import get_operation
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def image_cow_test():
+    """Test copy-on-write image data"""
+    data = np.arange(100.0).reshape(10, 10)
+    orig = create_image("Original", data)
+    copy = ImageParam()
+    copy.copy_data_from(orig)
+    assert np.shares_memory(orig.data, copy.data)
+    assert not orig.data.flags.writeable and not copy.data.flags.writeable
+    try:
+        copy.data[0, 0] = -1.0
+        raise AssertionError("Shared data was modified in place")
+    except ValueError:
+        pass
+    copy.detach_data()
+    copy.data[0, 0] = -1.0
+    assert not np.shares_memory(orig.data, copy.data)
+    assert orig.data[0, 0] == 0.0 and copy.data[0, 0] == -1.0
+    assert orig.data.flags.writeable
+    # Releasing the copy makes original data writable again
+    copy = ImageParam()
+    copy.copy_data_from(orig)
+    assert not orig.data.flags.writeable
+    del copy
+    gc.collect()
+    assert orig.data.flags.writeable and orig.data is data
+    # Assigning new data releases shared data
+    copy = ImageParam()
+    copy.copy_data_from(orig)
+    copy.data = np.zeros((10, 10))
+    assert orig.data.flags.writeable
+    # Data type conversion
+    copy.copy_data_from(orig, dtype=np.float32)
+    assert copy.data.dtype == np.float32 and orig.data.flags.writeable
+    execenv.print("Image copy-on-write: OK")
+
+
+def signal_cow_test():
+    """Test copy-on-write signal data"""
+    x = np.linspace(0.0, 1.0, 50)
+    orig = create_signal("Original", x, x**2)
+    copy = SignalParam()
+    copy.copy_data_from(orig)
+    assert np.shares_memory(orig.xydata, copy.xydata)
+    copy.y = np.zeros_like(x)
+    assert np.all(orig.y == x**2) and np.all(copy.y == 0.0)
+    assert not np.shares_memory(orig.xydata, copy.xydata)
+    execenv.print("Signal copy-on-write: OK")
+
+
+def metadata_test():
+    """Test shared metadata"""
+    orig = create_image("Original", np.zeros((20, 20)))
+    orig.roi = [[2, 2, 8, 8]]
+    orig.metadata["Nested"] = {"values": [1, 2]}
+    copy = ImageParam()
+    copy.copy_data_from(orig)
+    assert np.shares_memory(orig.metadata[ROI_KEY], copy.metadata[ROI_KEY])
+    copy.roi = [[0, 0, 4, 4]]
+    copy.metadata["Nested"]["values"].append(3)
+    copy.metadata["New"] = 1
+    assert np.all(orig.roi == [[2, 2, 8, 8]])
+    assert orig.metadata["Nested"] == {"values": [1, 2]}
+    assert "New" not in orig.metadata
+    execenv.print("Shared metadata: OK")
+
+
+def operation_memory_test():
+    """Test processing operation peak memory"""
+    orig = create_image("Original", np.ones((1000, 1000)))
+    operation = get_operation(ImageParam, "abs")
+    tracemalloc.start()
+    try:
+        obj = operation(orig)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    execenv.print(f"Operation peak memory: {peak / orig.data.nbytes:.2f} x data size")
+    assert peak < 1.5 * orig.data.nbytes
+    assert obj.data.flags.writeable and orig.data.flags.writeable
+
+
+def cow_test():
+    """Copy-on-write test"""
+    image_cow_test()
+    signal_cow_test()
+    metadata_test()
+    operation_memory_test()
+
+
+if __name__ == "__main__":
+    cow_test()
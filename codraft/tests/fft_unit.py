@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+FFT backend test
+
+Testing the following:
+  - Image/signal FFT and inverse FFT give the same results as `numpy.fft`
+  - Single precision data is transformed in single precision
+  - Real-input FFT returns the half spectrum, and inverse FFT restores data
+  - Zero-padding to the next fast length
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+from codraft.core.computation import fft
+from codraft.core.computation.signal import xy_fft, xy_ifft
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.processing import get_operation
+from codraft.core.processing.base import FFTParam, IFFTParam
+from codraft.env import execenv
+from codraft.tests.data import get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def image_fft_test():
+    """Test image FFT"""
+    data = get_peak2d_data(seed=1)[:, :199]  # Odd number of columns
+    image = create_image("Image", data)
+    fft_op = get_operation(ImageParam, "fft")
+    ifft_op = get_operation(ImageParam, "ifft")
+    spectrum = fft_op(image)
+    assert np.allclose(spectrum.data, np.fft.fft2(data))
+    assert np.allclose(ifft_op(spectrum).data, data)
+    param, iparam = FFTParam(), IFFTParam()
+    param.real, iparam.real, iparam.size = True, True, data.shape[1]
+    spectrum = fft_op(image, param)
+    assert spectrum.data.shape == (data.shape[0], data.shape[1] // 2 + 1)
+    assert np.allclose(spectrum.data, np.fft.rfft2(data))
+    result = ifft_op(spectrum, iparam)
+    assert not np.iscomplexobj(result.data) and np.allclose(result.data, data)
+    image.data = np.array(data, dtype=np.float32)
+    spectrum = fft_op(image, param)
+    assert spectrum.data.dtype == np.complex64
+    assert ifft_op(spectrum, iparam).data.dtype == np.float32
+    param.fast_length = True
+    shape = fft_op(image, param).data.shape
+    assert shape == (fft.get_fast_length(data.shape[0], True), 200 // 2 + 1)
+    execenv.print("Image FFT: OK")
+
+
+def signal_fft_test():
+    """Test signal FFT"""
+    x = np.linspace(0.0, 10.0, 501)
+    y = np.exp(-((x - 3.0) ** 2)) + 0.1 * np.sin(20 * x)
+    x1, y1 = xy_fft(x, y)
+    assert np.allclose(y1, np.fft.fft(y)) and x1.size == y1.size
+    x2, y2 = xy_ifft(x1, y1)
+    assert np.allclose(y2, y) and x2.size == y.size
+    x1, y1 = xy_fft(x, y, real=True)
+    assert y1.size == x1.size == y.size // 2 + 1 and x1[0] == 0.0
+    _x2, y2 = xy_ifft(x1, y1, real=True, size=y.size)
+    assert np.allclose(y2, y)
+    x1, y1 = xy_fft(x, y, fast_length=True)
+    assert x1.size == y1.size == fft.get_fast_length(y.size) > y.size
+    x1, y1 = xy_fft(x, y + 1j * y, real=True)  # Complex data: full spectrum
+    assert y1.size == y.size
+    execenv.print("Signal FFT: OK")
+
+
+def workers_test():
+    """Test FFT workers setting"""
+    data = get_peak2d_data(seed=2)
+    reference = fft.fftn(data, axes=(-2, -1))
+    fft.set_workers(1)
+    try:
+        assert fft.get_workers() == 1
+        assert np.array_equal(fft.fftn(data, axes=(-2, -1)), reference)
+    finally:
+        fft.set_workers(None)
+    execenv.print("FFT workers: OK")
+
+
+def fft_test():
+    """FFT backend test"""
+    image_fft_test()
+    signal_fft_test()
+    workers_test()
+
+
+if __name__ == "__main__":
+    fft_test()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Batch curve fitting engine test
+
+Testing the following:
+  - Analytic Jacobians of fitting models match finite differences
+  - Batch fitting (vectorized Levenberg-Marquardt) of many curves of different
+    sizes reaches the same minima as `scipy.optimize.leastsq` (or lower ones),
+    with per-curve convergence flags
+  - FWHM and FW at 1/e² of many signals (with ROIs) computed at once give the
+    same results as signal by signal, fits which did not converge giving NaN
+    segments
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import functools
+
+import numpy as np
+import scipy.optimize as spo
+
+from codraft.core.computation import fit
+from codraft.core.model.signal import SignalParam, create_signal
+from codraft.core.processing import get_operation
+from codraft.core.processing.signal import FWHMParam
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+MODELS = (fit.GaussianModel, fit.LorentzianModel, fit.VoigtModel)
+
+
+def jacobian_test():
+    """Test fitting models analytic Jacobians"""
+    x = np.linspace(-5.0, 5.0, 101)
+    params, eps = np.array([3.0, 0.7, 0.4, 0.2]), 1e-6
+    for model in MODELS:
+        jac = model.jac(x, *params)
+        assert jac.shape == (4,) + x.shape
+        num = [
+            (model.func(x, *(params + dp)) - model.func(x, *(params - dp))) / (2 * eps)
+            for dp in np.eye(4) * eps
+        ]
+        assert np.allclose(jac, num, atol=1e-7)
+        execenv.print(f"{model.__name__} Jacobian: OK")
+
+
+def create_curves(model: fit.FitModel, number: int, seed: int = 1) -> tuple:
+    """Create `number` noisy curves of different sizes, and initial parameters"""
+    rng = np.random.default_rng(seed)
+    curves, p0 = [], []
+    for size in rng.integers(50, 150, number):
+        x = np.linspace(-5.0, 5.0, size)
+        amp, sigma = rng.uniform(1.0, 5.0), rng.uniform(0.3, 1.5)
+        x0, y0 = rng.uniform(-1.0, 1.0), rng.uniform(-0.5, 0.5)
+        y = model.func(x, amp, sigma, x0, y0) + rng.normal(0.0, 0.02, size)
+        curves.append((x, y))
+        amp0 = fit.GaussianModel.get_amp_from_amplitude(np.ptp(y), 1.0)
+        p0.append([amp0, 1.0, x[y.argmax()], 0.0])
+    return curves, np.array(p0)
+
+
+def fit_batch_test():
+    """Test batch fitting engine"""
+    for model in MODELS:
+        curves, p0 = create_curves(model, 200)
+        x, y, weights = fit.stack_curves(curves)
+        assert x.shape == y.shape == weights.shape == (200, max(map(len, y)))
+        params, converged = fit.fit_batch(model, x, y, p0, weights)
+        assert params.shape == (200, 4) and converged.all()
+        for (xc, yc), pinit, pfit in zip(curves, p0, params):
+            ref, _ier = spo.leastsq(
+                lambda p, m=model, xc=xc, yc=yc: yc - m.func(xc, *p), pinit
+            )
+            cost, ref_cost = [
+                np.sum((yc - model.func(xc, *p)) ** 2) for p in (pfit, ref)
+            ]
+            assert cost <= ref_cost * (1 + 1e-6)
+            if abs(ref[1]) > 0.1:  # Not a degenerate solution (zero width)
+                # (amp, sigma) and (-amp, -sigma) are equivalent for these models
+                sign = np.sign(pfit[1] * ref[1])
+                pfit = pfit * [sign, sign, 1, 1]
+                assert np.allclose(pfit, ref, rtol=1e-4, atol=1e-6)
+        execenv.print(f"{model.__name__} batch fit: OK")
+    curves, p0 = create_curves(fit.GaussianModel, 3)
+    x, y, weights = fit.stack_curves(curves)
+    y[1] = np.nan
+    params, converged = fit.fit_batch(fit.GaussianModel, x, y, p0, weights, maxiter=2)
+    assert not converged.any() and np.array_equal(params[1], p0[1])
+    execenv.print("Convergence flags: OK")
+
+
+def fwhm_batch_test():
+    """Test FWHM and FW at 1/e² of many signals at once"""
+    rng = np.random.default_rng(2)
+    signals = []
+    for index in range(20):
+        x = np.linspace(0.0, 100.0, 1000)
+        y = rng.normal(0.0, 0.5, x.size)
+        for xc in (25.0, 75.0):
+            y += fit.GaussianModel.func(x, 100.0, rng.uniform(2.0, 4.0), xc, 1.0)
+        signal = create_signal(f"Pulse {index}", x, y)
+        if index % 2:
+            signal.roi = np.array([[0, 499], [500, 999]], int)
+        signals.append(signal)
+    for name, param in (
+        ("fwhm", FWHMParam()),
+        ("fw1e2", None),
+    ):
+        operation = get_operation(SignalParam, name)
+        results = operation.apply_batch(signals, param)
+        assert len(results) == len(signals)
+        for signal, result in zip(signals, results):
+            assert len(result.array) == (1 if signal.roi is None else 2)
+            assert np.allclose(result.array, operation(signal, param).array)
+        execenv.print(f"{name} batch: OK")
+    fit_batch = fit.fit_batch
+    try:
+        # Fits which do not converge give NaN segments (ROI index is kept)
+        fit.fit_batch = functools.partial(fit_batch, maxiter=1)
+        array = get_operation(SignalParam, "fwhm")(signals[1], FWHMParam()).array
+        assert np.array_equal(array[:, 0], [0, 1]) and np.isnan(array[:, 1:]).all()
+    finally:
+        fit.fit_batch = fit_batch
+    execenv.print("Non-converged fits: OK")
+
+
+def fitbatch_test():
+    """Batch curve fitting engine test"""
+    jacobian_test()
+    fit_batch_test()
+    fwhm_batch_test()
+
+
+if __name__ == "__main__":
+    fitbatch_test()
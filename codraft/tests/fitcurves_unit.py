@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Non-interactive curve fitting test
+
+Testing the following:
+  - Multi-Gaussian analytic Jacobian matches finite differences
+  - Model, multi-Gaussian and polynomial fits match `scipy.optimize.leastsq`
+    (without Jacobian) and `numpy.polyfit`
+  - Many curves are fitted in parallel, results being returned in curves order,
+    with and without warm start
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import functools
+
+import numpy as np
+import scipy.optimize as spo
+
+from codraft.core.computation import fit
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def get_curve(model, params, noise, seed):
+    """Return noisy curve (x, y) of `model` with parameters `params`"""
+    x = np.linspace(-10.0, 10.0, 400)
+    rng = np.random.default_rng(seed)
+    return x, model.func(x, *params) + rng.normal(scale=noise, size=x.size)
+
+
+def jacobian_test():
+    """Test multi-Gaussian analytic Jacobian"""
+    x = np.linspace(-5.0, 5.0, 101)
+    a_x0 = np.array([-2.0, 1.5])
+    values = np.array([1.0, 0.7, 2.5, 1.2, 0.3])
+    jac = fit.multigaussian_jac(x, *values, a_x0=a_x0)
+    assert jac.shape == (values.size, x.size)
+    eps = 1e-6
+    for index in range(values.size):
+        dv = np.zeros_like(values)
+        dv[index] = eps
+        yp = fit.multigaussian(x, *(values + dv), a_x0=a_x0)
+        ym = fit.multigaussian(x, *(values - dv), a_x0=a_x0)
+        assert np.allclose(jac[index], (yp - ym) / (2 * eps), atol=1e-6)
+    execenv.print("Multi-Gaussian Jacobian: OK")
+
+
+def single_fit_test():
+    """Test single curve fitting"""
+    for model in (fit.GaussianModel, fit.LorentzianModel, fit.VoigtModel):
+        x, y = get_curve(model, (5.0, 1.5, 0.8, 0.2), 0.02, 1)
+        values, converged = fit.fit_model(model, x, y)
+        assert converged
+        p0 = fit.get_initial_params(model, x, y)
+        ref = spo.leastsq(lambda p, m=model, x=x, y=y: y - m.func(x, *p), p0)[0]
+        assert np.allclose(values, ref, rtol=1e-4, atol=1e-6)
+        values2, converged = fit.fit_model(model, x, y, p0=values)
+        assert converged and np.allclose(values2, values, rtol=1e-6)
+        execenv.print(f"{model.__name__}: OK")
+    x = np.linspace(0.0, 10.0, 500)
+    peaks = np.array([100, 250, 400])
+    values = [1.0, 0.4, 2.0, 0.6, 1.5, 0.3, 0.1]
+    y = fit.multigaussian(x, *values, a_x0=x[peaks])
+    y += np.random.default_rng(2).normal(scale=0.01, size=x.size)
+    result, converged = fit.fit_multigaussian(x, y, peaks)
+    assert converged and np.allclose(result, values, atol=0.02)
+    execenv.print("Multi-Gaussian: OK")
+    values, converged = fit.fit_polynomial(x, y, 3)
+    assert converged and np.allclose(values, np.polyfit(x, y, 3))
+    execenv.print("Polynomial: OK")
+
+
+def multiple_fit_test():
+    """Test multiple curves fitting"""
+    model = fit.GaussianModel
+    curves, params = [], []
+    for index in range(20):
+        params.append((5.0 + 0.1 * index, 1.0 + 0.02 * index, 0.5, 0.1))
+        curves.append(get_curve(model, params[-1], 0.01, index))
+    fitter = functools.partial(fit.fit_model, model)
+    for warm_start in (False, True):
+        results = fit.fit_curves(fitter, curves, warm_start=warm_start)
+        assert len(results) == len(curves)
+        for (values, converged), (x, y), ref in zip(results, curves, params):
+            assert converged
+            assert np.allclose(values, fitter(x, y)[0], rtol=1e-4, atol=1e-6)
+            assert np.allclose(values, ref, rtol=0.05, atol=0.02)
+        execenv.print(f"Multiple curves (warm start: {warm_start}): OK")
+    assert not fit.fit_curves(fitter, [])
+
+
+def fitcurves_test():
+    """Non-interactive curve fitting test"""
+    jacobian_test()
+    single_fit_test()
+    multiple_fit_test()
+
+
+if __name__ == "__main__":
+    fitcurves_test()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Flat-field correction engine test
+
+Testing the following:
+  - Correction gives the same results as the straightforward formula, whatever
+    the data type and the tile size
+  - In place correction
+  - Image stack correction (each frame being corrected with the same flat)
+  - Flat-field operation reusing the same engine for several raw images
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+from codraft.core.computation import tiling
+from codraft.core.computation.flatfield import FlatFieldCorrector
+from codraft.core.model.image import create_image
+from codraft.core.processing.image import FlatFieldParam, compute_flat_field
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def reference_flatfield(rawdata, flatdata, threshold):
+    """Reference flat-field correction"""
+    dunif = np.array(flatdata, dtype=np.float64)
+    dunif[dunif == 0] = 1.0
+    dcorr = np.array(rawdata * flatdata.mean() / dunif, dtype=rawdata.dtype)
+    return np.where(rawdata > threshold, dcorr, rawdata)
+
+
+def corrector_test():
+    """Test flat-field correction engine"""
+    default_tile_nbytes = tiling.TILE_NBYTES
+    rng = np.random.default_rng(1)
+    try:
+        for tile_nbytes in (default_tile_nbytes, 4096):
+            tiling.TILE_NBYTES = tile_nbytes
+            for dtype in (np.uint8, np.uint16, np.int32, np.float32, np.float64):
+                raw = np.array(rng.random((151, 97)) * 200, dtype=dtype)
+                flat = np.array(rng.random((151, 97)) * 100 + 1, dtype=dtype)
+                flat[0, :10] = 0
+                corrector = FlatFieldCorrector(flat)
+                expected = reference_flatfield(raw, flat, 50)
+                result = corrector.correct(raw, 50)
+                assert result.dtype == raw.dtype
+                assert np.allclose(result, expected, rtol=1e-12, atol=1)
+                corrector.correct(raw, 50, out=raw)
+                assert np.array_equal(raw, result)
+            execenv.print(f"Flat-field correction (tile: {tile_nbytes} bytes): OK")
+    finally:
+        tiling.TILE_NBYTES = default_tile_nbytes
+    stack = np.array(rng.random((4, 60, 50)) * 1000, dtype=np.uint16)
+    corrector = FlatFieldCorrector(np.array(rng.random((60, 50)) * 10 + 1))
+    result = corrector.correct(stack, 100)
+    for frame, frame_result in zip(stack, result):
+        assert np.array_equal(frame_result, corrector.correct(frame, 100))
+    try:
+        corrector.correct(stack[:, :30], 100)
+    except ValueError as exc:
+        execenv.print(f"Invalid raw data shape (as expected): {exc}")
+    else:
+        raise AssertionError("Invalid raw data shape was accepted")
+    execenv.print("Image stack flat-field correction: OK")
+
+
+def operation_test():
+    """Test flat-field operation"""
+    rng = np.random.default_rng(2)
+    flat = create_image("Flat", np.array(rng.random((60, 50)) * 10 + 1))
+    corrector = FlatFieldCorrector(flat.data)
+    param = FlatFieldParam()
+    param.threshold = 10.0
+    for index in range(3):
+        raw = create_image(f"Raw{index}", np.array(rng.random((60, 50)) * 100))
+        result = compute_flat_field(raw, flat, param, corrector)
+        assert result.title == f"FlatField(Raw{index},Flat,threshold=10.0)"
+        expected = compute_flat_field(raw, flat, param)
+        assert np.array_equal(result.data, expected.data)
+    execenv.print("Flat-field operation: OK")
+
+
+def flatfield_test():
+    """Flat-field correction engine test"""
+    corrector_test()
+    operation_test()
+
+
+if __name__ == "__main__":
+    flatfield_test()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Moving median engine test
+
+Testing the following:
+  - Choose moving median algorithm from data type, kernel size and number of
+    distinct values
+  - Check that results are identical to `scipy.signal.medfilt` for signals,
+    images (split in small tiles) and image stacks, whatever the algorithm
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+import scipy.signal as sps
+
+from codraft.core.computation import median, tiling
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def algorithm_test():
+    """Test moving median algorithm choice"""
+    rng = np.random.default_rng(1)
+    data = rng.integers(0, 4096, (64, 64)).astype(np.uint16)
+    assert median.get_histogram_values(data, 31) is not None
+    assert median.get_histogram_values(data, 3) is None
+    assert median.get_histogram_values(data.astype(np.float32), 31) is None
+    values = median.get_histogram_values(np.array([[3, 7], [7, 9]], np.uint8), 3)
+    assert values.tolist() == [0, 3, 7, 9]
+    execenv.print("Algorithm choice: OK")
+
+
+def image_test():
+    """Test image moving median"""
+    default_tile_nbytes = tiling.TILE_NBYTES
+    rng = np.random.default_rng(2)
+    try:
+        tiling.TILE_NBYTES = 16384
+        for dtype, vmax in (
+            (np.uint8, 255),
+            (np.uint16, 50),
+            (np.uint16, 65535),
+            (np.int16, 1000),
+            (np.float32, 1.0),
+        ):
+            data = np.array(rng.random((151, 97)) * vmax, dtype=dtype)
+            for size in (1, 3, 9, 31):
+                result = median.median_filter(data, size)
+                assert result.dtype == data.dtype
+                assert np.array_equal(result, sps.medfilt(data, size))
+            execenv.print(f"Image {np.dtype(dtype).name} (max={vmax}): OK")
+    finally:
+        tiling.TILE_NBYTES = default_tile_nbytes
+    stack = rng.integers(0, 300, (3, 40, 50)).astype(np.uint16)
+    result = median.median_filter(stack, 9)
+    for frame, frame_result in zip(stack, result):
+        assert np.array_equal(frame_result, sps.medfilt(frame, 9))
+    result = median.median_filter(stack.astype(float), 9)
+    assert np.array_equal(result, sps.medfilt(stack.astype(float), (1, 9, 9)))
+    execenv.print("Image stack: OK")
+
+
+def signal_test():
+    """Test signal moving median"""
+    y = np.random.default_rng(3).normal(size=10000)
+    for size in (3, 31, 301):
+        assert np.array_equal(median.median_filter(y, size), sps.medfilt(y, size))
+    execenv.print("Signal: OK")
+
+
+def median_test():
+    """Moving median engine test"""
+    algorithm_test()
+    image_test()
+    signal_test()
+
+
+if __name__ == "__main__":
+    median_test()
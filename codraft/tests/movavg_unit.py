@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Signal moving average test
+
+Testing the following:
+  - Running sum moving average gives the same results as direct convolution,
+    for small and large windows and for all edge modes
+  - Rounding errors do not accumulate along long signals
+  - Batch of signals (2D array) gives the same results as each signal
+  - Edge mode parameter of signal moving average operation
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+from codraft.core.computation.signal import MOVING_AVERAGE_MODES, moving_average
+from codraft.core.model.signal import SignalParam, create_signal
+from codraft.core.processing import get_operation
+from codraft.core.processing.signal import SignalMovingAverageParam
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def convolve_moving_average(y, n, mode="edge"):
+    """Reference moving average (direct convolution)"""
+    y_padded = np.pad(y, (n // 2, n - 1 - n // 2), mode=mode)
+    return np.convolve(y_padded, np.ones((n,)) / n, mode="valid")
+
+
+def moving_average_test():
+    """Test moving average computation function"""
+    rng = np.random.default_rng(1)
+    for size in (1, 10, 4096, 10001):
+        y = rng.normal(size=size) + 1e3
+        for n in (1, 2, 3, 31, 300, 5000):
+            for mode in MOVING_AVERAGE_MODES:
+                result = moving_average(y, n, mode)
+                assert result.shape == y.shape
+                assert np.allclose(result, convolve_moving_average(y, n, mode))
+    execenv.print("Moving average: OK")
+    y = rng.normal(size=2000000) + 1e8
+    result = moving_average(y, 1001)
+    for index in rng.integers(500, y.size - 500, 20):
+        expected = np.sum(y[index - 500 : index + 501]) / 1001
+        assert abs(result[index] - expected) < 1e-6
+    execenv.print("Moving average on a long signal: OK")
+    ys = rng.integers(0, 1000, (5, 3000)).astype(np.uint16)
+    for n in (3, 101):
+        result = moving_average(ys, n, "wrap")
+        for y, y_result in zip(ys, result):
+            assert np.allclose(y_result, convolve_moving_average(y, n, "wrap"))
+    execenv.print("Batch moving average: OK")
+
+
+def operation_test():
+    """Test signal moving average operation"""
+    x = np.linspace(0.0, 10.0, 1000)
+    signal = create_signal("Signal", x, np.sin(x))
+    operation = get_operation(SignalParam, "moving_average")
+    param = SignalMovingAverageParam()
+    param.n, param.mode = 101, "constant"
+    result = operation(signal, param)
+    assert np.allclose(result.y, convolve_moving_average(signal.y, 101, "constant"))
+    param.n, param.mode = 3, "edge"  # Default parameters
+    assert np.array_equal(operation(signal).y, operation(signal, param).y)
+    execenv.print("Moving average operation: OK")
+
+
+def movavg_test():
+    """Signal moving average test"""
+    moving_average_test()
+    operation_test()
+
+
+if __name__ == "__main__":
+    movavg_test()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Process pool engine test
+
+Testing the following:
+  - Run contour and peak detection functions on multiple frames in a pool of
+    processes (image data being handed to workers through shared memory)
+  - Check that results are identical to those obtained in current process
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import time
+
+import numpy as np
+
+from codraft.core.computation.image import get_2d_peaks_coords, get_contour_shapes
+from codraft.core.computation.parallel import ProcessPoolEngine, SharedArray
+from codraft.env import execenv
+from codraft.tests.data import get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def shared_array_test():
+    """Test shared array (including masked arrays) round trip"""
+    data = get_peak2d_data(seed=1)
+    for array in (data, np.ma.MaskedArray(data, mask=data > data.mean())):
+        sarr = SharedArray.create(array)
+        try:
+            assert np.ma.allequal(sarr.asarray(), array)
+            assert np.array_equal(np.ma.getmask(sarr.asarray()), np.ma.getmask(array))
+        finally:
+            sarr.unlink()
+
+
+def process_pool_test(nbframes: int = 8):
+    """Test process pool engine"""
+    frames = [get_peak2d_data(seed=idx, multi=True) for idx in range(nbframes)]
+    engine = ProcessPoolEngine()
+    assert engine.is_picklable(get_contour_shapes, "circle")
+    assert not engine.is_picklable(lambda x: x)
+    try:
+        for func, args in (
+            (get_contour_shapes, ("ellipse",)),
+            (get_2d_peaks_coords, ()),
+        ):
+            t0 = time.time()
+            results = engine.map(func, [(data,) + args for data in frames])
+            t1 = time.time()
+            references = [func(data, *args) for data in frames]
+            t2 = time.time()
+            execenv.print(
+                f"{func.__name__}: {int((t1 - t0) * 1e3):d} ms "
+                f"(vs. {int((t2 - t1) * 1e3):d} ms in a single process)"
+            )
+            for result, reference in zip(results, references):
+                assert np.array_equal(result, reference)
+    finally:
+        engine.shutdown()
+
+
+if __name__ == "__main__":
+    shared_array_test()
+    process_pool_test()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Dense field image peak detection test
+
+Testing the following:
+  - Duplicate peaks removal (spatial index) gives the same peaks as a
+    brute-force removal based on the full distance matrix
+  - Nearest neighbor distances
+  - Peak detection operation creating regions of interest around peaks
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+import scipy.ndimage as spi
+import scipy.spatial as spt
+
+from codraft.core.computation.image import (
+    get_2d_peaks_coords,
+    get_nearest_neighbor_distances,
+)
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.processing import get_operation
+from codraft.core.processing.image import PeakDetectionParam
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def create_star_field(size: int, number: int, seed: int = 1) -> np.ndarray:
+    """Create star field image: `number` random stars on a noisy background"""
+    rng = np.random.default_rng(seed)
+    data = rng.random((size, size)) * 0.01
+    rows, cols = rng.integers(0, size, (2, number))
+    data[rows, cols] += rng.random(number) + 1.0
+    return data
+
+
+def reference_peaks_coords(data: np.ndarray, size: int) -> np.ndarray:
+    """Reference peak detection (duplicates removed using the full distance
+    matrix)"""
+    data_max = spi.maximum_filter(data, size)
+    data_diff = data_max - spi.minimum_filter(data, size)
+    maxima = (data == data_max) & (data_diff > 0.5 * np.ptp(data_diff))
+    coords = np.array(
+        [
+            (int(0.5 * (dx.start + dx.stop - 1)), int(0.5 * (dy.start + dy.stop - 1)))
+            for dy, dx in spi.find_objects(spi.label(maxima)[0])
+        ]
+    )
+    dist = np.triu(spt.distance.cdist(coords, coords))
+    duplicates = np.unique(np.where((dist < size) & (dist > 0))[1])
+    return np.delete(coords, duplicates, axis=0)
+
+
+def duplicates_test():
+    """Test duplicate peaks removal"""
+    data = create_star_field(1024, 3000)
+    for size in (3, 5, 9, 30):
+        coords = get_2d_peaks_coords(data, size)
+        assert np.array_equal(coords, reference_peaks_coords(data, size))
+        dist = spt.distance.cdist(coords, coords)
+        dist[dist == 0] = np.inf
+        assert np.array_equal(get_nearest_neighbor_distances(coords), dist.min(1))
+    execenv.print("Duplicate peaks removal: OK")
+
+
+def operation_test():
+    """Test peak detection operation with regions of interest"""
+    image = create_image("Stars", create_star_field(512, 100, seed=3))
+    param = PeakDetectionParam()
+    param.size, param.create_rois = 20, True
+    result = get_operation(ImageParam, "peak_detection")(image, param)
+    coords = result.data
+    assert image.roi.shape == (len(coords), 4)
+    dist_min = get_nearest_neighbor_distances(coords).min()
+    radius = int(0.5 * dist_min / np.sqrt(2) - 1)
+    assert radius >= 1 and (image.roi[:, 2:] - image.roi[:, :2] <= 2 * radius).all()
+    execenv.print("Peak detection regions of interest: OK")
+
+
+def peak2d_dense_test():
+    """Dense field image peak detection test"""
+    duplicates_test()
+    operation_test()
+
+
+if __name__ == "__main__":
+    peak2d_dense_test()
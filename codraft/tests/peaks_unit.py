@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Signal peak detection test
+
+Testing the following:
+  - Vectorized plateau handling and minimum distance suppression give the same
+    peaks as a straightforward (one plateau/peak at a time) implementation, on
+    quantized signals (many plateaus and equal peak heights)
+  - Long staircases of close peaks
+  - Batch of signals gives the same peaks as each signal
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+from codraft.core.computation.signal import peak_indexes, peak_indexes_batch
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def reference_peak_indexes(y, thres, min_dist):
+    """Reference peak detection: loops over plateaus and peaks"""
+    thres = thres * (np.max(y) - np.min(y)) + np.min(y)
+    dy = np.diff(y)
+    zeros = np.flatnonzero(dy == 0)
+    if zeros.size == dy.size:
+        return np.array([], dtype=int)
+    for plateau in np.split(zeros, np.flatnonzero(np.diff(zeros) != 1) + 1):
+        if plateau.size == 0:
+            continue
+        if plateau[0] == 0:
+            dy[plateau] = dy[plateau[-1] + 1]
+        elif plateau[-1] == dy.size - 1:
+            dy[plateau] = dy[plateau[0] - 1]
+        else:
+            median = np.median(plateau)
+            dy[plateau[plateau < median]] = dy[plateau[0] - 1]
+            dy[plateau[plateau >= median]] = dy[plateau[-1] + 1]
+    peaks = np.flatnonzero(
+        (np.hstack([dy, 0.0]) < 0.0) & (np.hstack([0.0, dy]) > 0.0) & (y > thres)
+    )
+    if peaks.size > 1 and min_dist > 1:
+        highest = peaks[np.argsort(y[peaks], kind="stable")][::-1]
+        kept = []
+        for peak in highest:
+            if all(abs(peak - other) > min_dist for other in kept):
+                kept.append(peak)
+        peaks = np.sort(np.array(kept, dtype=int))
+    return peaks
+
+
+def peak_indexes_test():
+    """Test peak detection on quantized signals"""
+    rng = np.random.default_rng(1)
+    for index in range(500):
+        size, levels = rng.integers(2, 300), rng.integers(1, 8)
+        if index % 2:
+            y = np.round(np.cumsum(rng.normal(size=size)) * levels / 3)
+        else:
+            y = rng.integers(0, levels + 1, size).astype(float)
+        thres, min_dist = rng.random(), int(rng.integers(1, 40))
+        expected = reference_peak_indexes(y, thres, min_dist)
+        assert np.array_equal(peak_indexes(y, thres, min_dist), expected)
+    assert peak_indexes(np.ones(10)).size == 0
+    execenv.print("Quantized signals: OK")
+    y = np.zeros(4001)
+    y[1::2] = np.arange(2000)
+    expected = reference_peak_indexes(y, 0.0, 5)
+    assert np.array_equal(peak_indexes(y, 0.0, 5), expected)
+    execenv.print("Staircase of close peaks: OK")
+
+
+def batch_test():
+    """Test batch peak detection"""
+    x = np.linspace(0.0, 100.0, 5000)
+    rng = np.random.default_rng(2)
+    ys = np.round(np.sin(x) * 20 + rng.normal(size=(8, x.size)) * 2).astype(np.int16)
+    results = peak_indexes_batch(ys, thres=0.5, min_dist=20)
+    assert len(results) == len(ys)
+    for y, result in zip(ys, results):
+        assert np.array_equal(result, peak_indexes(y, thres=0.5, min_dist=20))
+        assert np.array_equal(result, reference_peak_indexes(y, 0.5, 20))
+    execenv.print("Batch peak detection: OK")
+
+
+def peaks_test():
+    """Signal peak detection test"""
+    peak_indexes_test()
+    batch_test()
+
+
+if __name__ == "__main__":
+    peaks_test()
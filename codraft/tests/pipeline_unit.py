@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Processing pipeline test
+
+Testing the following:
+  - Record a processing chain (flat field correction, then filters)
+  - Change flat field data (new data, or data modified in place) and recompute
+    downstream steps
+  - Check that only the steps depending on the changed data were computed again
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+import scipy.ndimage as spi
+
+from codraft.core.computation.image import flatfield
+from codraft.core.model.image import create_image
+from codraft.core.model.pipeline import ProcessingGraph
+from codraft.tests.data import get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def pipeline_test():
+    """Test processing pipeline"""
+    graph = ProcessingGraph()
+    calls = []
+
+    def add_step(title, sources, func):
+        """Create output object and record processing step"""
+
+        def compute(obj, sources):
+            """Compute step output"""
+            calls.append(obj.title)
+            obj.data = func(*[src.data for src in sources])
+
+        obj = create_image(title, np.zeros((1, 1)))
+        compute(obj, sources)
+        graph.add_step(obj, sources, compute)
+        return obj
+
+    raw = create_image("Raw", get_peak2d_data(seed=1))
+    flat = create_image("Flat", np.ones_like(raw.data))
+    other = create_image("Other", get_peak2d_data(seed=2))
+    corr = add_step("FlatField", [raw, flat], lambda r, f: flatfield(r, f, 0.0))
+    gauss = add_step("Gaussian", [corr], lambda x: spi.gaussian_filter(x, 2.0))
+    clip = add_step("Clip", [gauss], lambda x: x.clip(max=x.mean()))
+    other_med = add_step("OtherMedian", [other], lambda x: spi.median_filter(x, 3))
+    assert len(graph) == 4
+    assert graph.get_step(clip).sources == [gauss]
+    assert graph.get_step(raw) is None
+    assert graph.get_downstream_steps([corr])[-1].output is clip
+
+    # Nothing has changed: nothing to recompute
+    del calls[:]
+    assert not graph.recompute() and not calls
+
+    # Updating flat field data: only the correction chain is recomputed
+    flat.data = np.linspace(0.5, 1.5, raw.data.size).reshape(raw.data.shape)
+    assert [step.output for step in graph.get_dirty_steps()] == [corr]
+    assert graph.recompute([flat]) == [corr, gauss, clip]
+    assert calls == ["FlatField", "Gaussian", "Clip"]
+    expected = spi.gaussian_filter(flatfield(raw.data, flat.data, 0.0), 2.0)
+    assert np.array_equal(gauss.data, expected)
+    assert not graph.get_dirty_steps()
+
+    # Modifying flat field data in place
+    flat.detach_data()
+    flat.data[0, 0] = 2.0
+    assert [step.output for step in graph.get_dirty_steps()] == [corr]
+    assert not graph.recompute([other])
+    assert graph.recompute([flat]) == [corr, gauss, clip]
+
+    # Recomputation may be aborted
+    flat.data = flat.data[::-1]
+    assert graph.recompute(callback=lambda obj: obj is not gauss) == [corr]
+
+    # Removing an object also removes the steps using it
+    graph.remove_object(gauss)
+    assert len(graph) == 2 and graph.get_step(other_med) is not None
+    graph.clear()
+    assert len(graph) == 0
+
+
+if __name__ == "__main__":
+    pipeline_test()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Processing catalogue test
+
+Testing the following:
+  - Get registered operations for signals and images
+  - Apply "1 object in --> 1 object out" operations without any user interface
+    and check that results are identical to those of processing functions
+  - Compute result shapes ("1 object in --> 0 object out" operations), with
+    default and custom data computing kernels
+  - Apply operations in place: object data is overwritten (when data type
+    allows it) or replaced, with the same results
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+import scipy.ndimage as spi
+
+from codraft.core.computation.image import get_centroid_coords
+from codraft.core.model.base import ShapeTypes
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.model.signal import SignalParam
+from codraft.core.processing import get_operation, get_operation_names
+from codraft.core.processing.base import GaussianParam, MovingAverageParam
+from codraft.core.processing.image import PeakDetectionParam
+from codraft.core.processing.signal import FWHMParam
+from codraft.env import execenv
+from codraft.tests.data import (
+    PeakDataParam,
+    create_2d_gaussian,
+    create_test_signal2,
+    get_peak2d_data,
+)
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def registry_test():
+    """Test operation registry"""
+    for objclass in (SignalParam, ImageParam):
+        names = get_operation_names(objclass)
+        execenv.print(f"{objclass.__name__}: {', '.join(names)}")
+        assert "gaussian_filter" in names and "abs" in names
+    assert "fwhm" not in get_operation_names(ImageParam)
+    assert "centroid" in get_operation_names()
+    try:
+        get_operation(SignalParam, "centroid")
+    except ValueError as exc:
+        execenv.print(f"Unknown operation (as expected): {exc}")
+    else:
+        raise AssertionError("Unknown operation was returned")
+
+
+def operation11_test():
+    """Test 1 object in --> 1 object out operations"""
+    image = create_image("Image", get_peak2d_data(seed=1))
+    orig = image.data.copy()
+    param = GaussianParam()
+    param.sigma = 3.0
+    result = get_operation(ImageParam, "gaussian_filter")(image, param)
+    assert isinstance(result, ImageParam)
+    assert result.title == "GaussianFilter(Image)|σ=3.000 pixels"
+    assert np.array_equal(result.data, spi.gaussian_filter(orig, 3.0))
+    assert np.array_equal(image.data, orig)
+    result = get_operation(ImageParam, "rotate90")(image)
+    assert result.data.shape == orig.shape[::-1]
+    try:
+        get_operation(ImageParam, "abs")(image, param)
+    except ValueError as exc:
+        execenv.print(f"Invalid parameters (as expected): {exc}")
+    else:
+        raise AssertionError("Invalid parameters were accepted")
+
+    signal = create_test_signal2()
+    param = MovingAverageParam()
+    param.n = 5
+    operation = get_operation(SignalParam, "moving_average")
+    result = operation(signal, param)
+    assert isinstance(result, SignalParam)
+    assert result.title == f"MovAvg({signal.title})|n=5"
+    assert np.array_equal(result.x, signal.x)
+    try:
+        operation(signal, PeakDetectionParam())
+    except TypeError as exc:
+        execenv.print(f"Invalid parameters (as expected): {exc}")
+    else:
+        raise AssertionError("Invalid parameters were accepted")
+    result = get_operation(SignalParam, "peak_detection")(signal)
+    assert result.metadata["curvestyle"] == "Sticks"
+
+
+def operation10_test():
+    """Test 1 object in --> 0 object out operations"""
+    image = create_image("Gaussian", create_2d_gaussian(200, np.uint16, x0=2.0))
+    operation = get_operation(ImageParam, "centroid")
+    result = operation(image)
+    assert result.shapetype is ShapeTypes.MARKER
+    x, y = result.array[0, 1:]
+    assert abs(x - 119.5) < 1 and abs(y - 99.5) < 1
+    calls = []
+
+    def kernel(data):
+        """Custom data computing kernel"""
+        calls.append(data.shape)
+        return get_centroid_coords(data)
+
+    assert np.array_equal(operation(image, kernel=kernel).array, result.array)
+    assert calls == [image.data.shape]
+
+    data = get_peak2d_data(PeakDataParam(size=400), seed=1, multi=True)
+    image = create_image("Peaks", data)
+    param = PeakDetectionParam()
+    param.size = 50
+    param.create_rois = True
+    result = get_operation(ImageParam, "peak_detection")(image, param)
+    assert result.shapetype is ShapeTypes.POINT
+    assert image.roi is not None and len(image.roi) == len(result.array)
+    image = create_image("Peak", create_2d_gaussian(200, np.uint16))
+    result = get_operation(ImageParam, "peak_detection")(image, param)
+    assert len(result.array) == 1 and len(image.roi) == 1
+
+    signal = create_test_signal2()
+    result = get_operation(SignalParam, "fwhm")(signal, FWHMParam())
+    assert result.shapetype is ShapeTypes.SEGMENT
+    x0, _y0, x1, _y1 = result.array[0, 1:]
+    assert abs((x1 - x0) - 2 * np.sqrt(2 * np.log(2)) * 2.0) < 1e-2
+
+
+def inplace_test():
+    """Test operations applied in place"""
+    for dtype in (np.float64, np.float32, np.uint16):
+        image = create_image("Image", np.array(get_peak2d_data(seed=1), dtype=dtype))
+        data = image.data
+        param = GaussianParam()
+        operation = get_operation(ImageParam, "gaussian_filter")
+        reference = operation(image, param)
+        for name in ("abs", "log10"):
+            operation = get_operation(ImageParam, name)
+            ref = operation(reference)
+            operation.apply_in_place(reference)
+            assert np.array_equal(reference.data, ref.data)
+        get_operation(ImageParam, "gaussian_filter").apply_in_place(image, param)
+        assert image.title == "GaussianFilter(Image)|σ=1.000 pixels"
+        assert image.data is data  # Data has been overwritten
+        for name in ("abs", "log10"):
+            get_operation(ImageParam, name).apply_in_place(image)
+        assert image.title == reference.title
+        assert np.array_equal(image.data, reference.data)
+        if dtype is np.uint16:
+            assert image.data.dtype.kind == "f"  # Log10 result was not in place
+        else:
+            assert image.data is data
+        execenv.print(f"In-place operations ({np.dtype(dtype).name}): OK")
+    # Shared data (copy-on-write) is not overwritten
+    image = create_image("Image", get_peak2d_data(seed=1))
+    copy = ImageParam()
+    copy.copy_data_from(image)
+    orig = image.data.copy()
+    get_operation(ImageParam, "gaussian_filter").apply_in_place(copy)
+    assert np.array_equal(image.data, orig)
+    assert not np.array_equal(copy.data, orig)
+    # Signals
+    signal = create_test_signal2()
+    param = MovingAverageParam()
+    param.n = 5
+    operation = get_operation(SignalParam, "moving_average")
+    result = operation(signal, param)
+    operation.apply_in_place(signal, param)
+    assert signal.title == result.title
+    assert np.array_equal(signal.xydata, result.xydata)
+
+
+if __name__ == "__main__":
+    registry_test()
+    operation11_test()
+    operation10_test()
+    inplace_test()
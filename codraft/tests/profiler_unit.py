@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Operation profiler test
+
+Testing the following:
+  - Nothing is recorded when profiler is disabled
+  - Wall time, CPU time, peak memory allocation and input/output data size are
+    recorded when profiler is enabled (including calls from worker threads),
+    peak memory being traced for only one call at a time
+  - Records are exported to JSON and CSV files
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import csv
+import json
+import os.path as osp
+
+import numpy as np
+
+from codraft.core.computation import parallel
+from codraft.core.model.image import create_image
+from codraft.env import execenv
+from codraft.utils.profiler import (
+    Profiler,
+    ProfileRecord,
+    get_nbytes,
+    get_profiler,
+    profiled,
+)
+from codraft.utils.tests import temporary_directory
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def compute(profiler: Profiler, image):
+    """Profiled computation"""
+    with profiler.measure("compute_11", image.title, [image]) as record:
+        data = np.sqrt(image.data.astype(np.float64))
+        record.set_outputs(data)
+    return data
+
+
+def record_test():
+    """Test profiler records"""
+    image = create_image("Image", np.ones((512, 256), dtype=np.uint16))
+    assert get_nbytes(image, [image.data, None]) == 2 * image.data.nbytes
+    profiler = Profiler(max_records=3)
+    compute(profiler, image)
+    assert profiler.count == 0 and not profiler.get_records()
+    profiler.enable()
+    try:
+        compute(profiler, image)
+        record = profiler.get_records()[0]
+        execenv.print(record)
+        assert record.input_nbytes == image.data.nbytes
+        assert record.output_nbytes == 4 * image.data.nbytes
+        assert record.wall_time > 0 and record.cpu_time >= 0
+        assert record.peak_memory >= 4 * image.data.nbytes
+        with profiler.measure("compute_11", "Outer"):
+            compute(profiler, image)  # Nested call: peak memory is not traced
+        inner, outer = profiler.get_records()[-2:]
+        assert inner.peak_memory is None and outer.peak_memory is not None
+        jobs = parallel.submit_jobs(compute, [(profiler, image)] * 5)
+        for job in jobs:
+            job.result()
+        assert profiler.count == 8 and len(profiler.get_records()) == 3
+        threads = set(record.thread for record in profiler.get_records())
+        execenv.print(f"Threads: {', '.join(sorted(threads))}")
+    finally:
+        profiler.enable(False)
+    profiler.clear()
+    assert not profiler.get_records()
+
+
+def export_test():
+    """Test profiler records export"""
+    profiler = Profiler()
+    profiler.enable()
+    try:
+        for index in range(4):
+            image = create_image(f"Image{index}", np.zeros((100, 100)))
+            compute(profiler, image)
+    finally:
+        profiler.enable(False)
+    with temporary_directory() as tmpdir:
+        fname = osp.join(tmpdir, "profile.json")
+        profiler.export_json(fname)
+        with open(fname, "r", encoding="utf-8") as fdesc:
+            records = json.load(fdesc)
+        assert len(records) == 4 and tuple(records[0]) == ProfileRecord.FIELDS
+        assert records[3]["name"] == "Image3"
+        fname = osp.join(tmpdir, "profile.csv")
+        profiler.export_csv(fname)
+        with open(fname, "r", encoding="utf-8", newline="") as fdesc:
+            rows = list(csv.DictReader(fdesc))
+        assert [row["name"] for row in rows] == [rec["name"] for rec in records]
+        assert float(rows[0]["wall_time"]) == records[0]["wall_time"]
+
+
+class Refresher:
+    """Class with a profiled method"""
+
+    @profiled("refresh_plot")
+    def refresh_plot(self, value):
+        """Profiled method"""
+        return value
+
+
+def decorator_test():
+    """Test profiled method decorator"""
+    profiler = get_profiler()
+    profiler.enable()
+    try:
+        assert Refresher().refresh_plot(2) == 2
+    finally:
+        profiler.enable(False)
+    record = profiler.get_records()[-1]
+    assert record.category == "refresh_plot"
+    assert record.name == "Refresher.refresh_plot"
+    profiler.clear()
+
+
+if __name__ == "__main__":
+    record_test()
+    export_test()
+    decorator_test()
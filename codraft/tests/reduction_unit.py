@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Streaming reduction test
+
+Testing the following:
+  - Streaming reductions (sum, mean, product, minimum, maximum, standard
+    deviation, median) give the same results as NumPy, with small chunks
+  - Compensated summation does not drift with the number of arrays
+  - Data which is not loaded in memory (HDF5 datasets, memory-mapped arrays)
+    and arrays generated one at a time are reduced chunk by chunk
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import os.path as osp
+
+import h5py
+import numpy as np
+
+from codraft.core.computation import reduction
+from codraft.env import execenv
+from codraft.utils.tests import temporary_directory
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+NUMPY_FUNCS = {
+    "sum": np.sum,
+    "mean": np.mean,
+    "prod": np.prod,
+    "min": np.min,
+    "max": np.max,
+    "std": np.std,
+    "median": np.median,
+}
+
+
+def get_test_arrays(number=7, shape=(53, 31), dtype=np.float64):
+    """Return test arrays"""
+    rng = np.random.default_rng(1)
+    return [(rng.random(shape) * 100).astype(dtype) for _index in range(number)]
+
+
+def methods_test():
+    """Test all reduction methods against NumPy"""
+    for dtype in (np.float64, np.float32, np.uint16, np.complex128):
+        arrays = get_test_arrays(dtype=dtype)
+        stack = np.array(arrays)
+        for method in reduction.METHODS:
+            if method == "median" and dtype is np.complex128:
+                continue
+            for chunk_nbytes in (1, 1024, reduction.CHUNK_NBYTES):
+                result = reduction.reduce_arrays(
+                    arrays, method, chunk_nbytes=chunk_nbytes
+                )
+                dtype_ref = np.result_type(result.dtype, stack.dtype)
+                expected = NUMPY_FUNCS[method](stack.astype(dtype_ref), axis=0)
+                assert result.shape == arrays[0].shape
+                assert np.allclose(result, expected, rtol=1e-12), (method, dtype)
+            execenv.print(f"{method}({np.dtype(dtype).name}): OK")
+    assert (
+        reduction.reduce_arrays(get_test_arrays(dtype=np.uint16), "max").dtype
+        == np.uint16
+    )
+    try:
+        reduction.reduce_arrays([np.zeros((3, 4)), np.zeros((4, 3))], "sum")
+    except ValueError as exc:
+        execenv.print(f"Shape mismatch (as expected): {exc}")
+    else:
+        raise AssertionError("Shape mismatch was not detected")
+
+
+def precision_test():
+    """Test compensated summation"""
+    number, value = 20000, np.float32(0.1)
+    arrays = (np.full((4, 4), value, dtype=np.float32) for _index in range(number))
+    result = reduction.reduce_arrays(arrays, "mean")
+    assert np.all(result == np.float64(value))
+    naive = np.zeros((4, 4), dtype=np.float32)
+    for _index in range(number):
+        naive += value
+    execenv.print(f"Naive mean error: {abs(naive[0, 0] / number - value):.3e}")
+    assert reduction.cast_result(np.array([-5.0, 7e4]), np.uint16).tolist() == [
+        0,
+        65535,
+    ]
+
+
+def lazy_data_test():
+    """Test reductions of data which is not loaded in memory"""
+    arrays = get_test_arrays(number=5, dtype=np.float32)
+    stack = np.array(arrays)
+    with temporary_directory() as tmpdir:
+        fname = osp.join(tmpdir, "stack.h5")
+        with h5py.File(fname, "w") as h5file:
+            for index, array in enumerate(arrays):
+                h5file.create_dataset(f"frame{index}", data=array)
+        with h5py.File(fname, "r") as h5file:
+            datasets = [h5file[f"frame{index}"] for index in range(len(arrays))]
+            for method in ("mean", "std", "median"):
+                result = reduction.reduce_arrays(datasets, method, chunk_nbytes=1024)
+                expected = NUMPY_FUNCS[method](stack.astype(np.float64), axis=0)
+                assert np.allclose(result, expected)
+                execenv.print(f"{method}(HDF5 datasets): OK")
+        fname = osp.join(tmpdir, "stack.raw")
+        stack.tofile(fname)
+        mmap = np.memmap(fname, dtype=np.float32, mode="r", shape=stack.shape)
+        result = reduction.reduce_arrays(iter(mmap), "max", chunk_nbytes=1024)
+        assert np.array_equal(result, stack.max(axis=0))
+        execenv.print("max(memory-mapped array): OK")
+        del mmap
+
+
+if __name__ == "__main__":
+    methods_test()
+    precision_test()
+    lazy_data_test()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Image ROI masks test
+
+Testing the following:
+  - ROI masks restricted to ROI bounding boxes (clipped to image) match
+    full-frame ROI masks, for rectangular and circular ROIs
+  - Image mask (union of all ROIs) and ROI masked views
+  - ROI masks cache is invalidated when ROI coordinates or pixel size change
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+
+from codraft.core.model.image import RoiDataItem, create_image
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def create_roi(shape: tuple, number: int, seed: int = 1) -> np.ndarray:
+    """Create `number` circular and rectangular ROIs, some of them overlapping
+    image borders"""
+    rng = np.random.default_rng(seed)
+    rows, cols = shape
+    xc = rng.integers(-10, cols + 10, number)
+    yc = rng.integers(-10, rows + 10, number)
+    radius = rng.integers(1, 30, number)
+    circles = np.vstack([xc - radius, yc, xc + radius, yc]).T
+    rects = np.vstack([xc - radius, yc - 2 * radius, xc + radius, yc + radius]).T
+    return np.where(np.arange(number)[:, np.newaxis] % 4 == 0, rects, circles)
+
+
+def local_mask_test():
+    """Test ROI masks restricted to ROI bounding boxes"""
+    data = np.zeros((200, 300))
+    for yxratio in (1.0, 0.5):
+        for roirow in create_roi(data.shape, 200):
+            roidataitem = RoiDataItem(roirow)
+            x0, y0, x1, y1 = roidataitem.get_bounding_box(data.shape)
+            assert 0 <= x0 <= x1 <= data.shape[1] and 0 <= y0 <= y1 <= data.shape[0]
+            local_mask = roidataitem.get_local_mask(data.shape, yxratio)
+            mask = roidataitem.apply_mask(data, yxratio)
+            assert mask[y0:y1, x0:x1].shape == local_mask.shape
+            assert np.array_equal(mask[y0:y1, x0:x1], local_mask)
+            mask[y0:y1, x0:x1] = True
+            assert mask.all()  # No ROI pixel outside bounding box
+    execenv.print("Local masks: OK")
+
+
+def image_masks_test():
+    """Test image mask and ROI masked views"""
+    data = np.random.default_rng(2).random((250, 200))
+    image = create_image("Image", data)
+    image.roi = create_roi(data.shape, 500)
+    expected = np.ones(data.shape, dtype=bool)
+    for index, roirow in enumerate(image.roi):
+        roidataitem = RoiDataItem(roirow)
+        mask = roidataitem.apply_mask(data, yxratio=1.0)
+        expected &= mask
+        roidata = image.get_data(index)
+        assert np.array_equal(roidata.compressed(), data[~mask])
+    assert np.array_equal(image.maskdata, expected)
+    execenv.print("Image mask and ROI views: OK")
+    masks = image.get_roi_masks()
+    assert image.get_roi_masks() is masks
+    image.roi = image.roi.copy()
+    assert image.get_roi_masks() is masks  # Same ROI coordinates
+    image.roi[0] += 5  # In-place change
+    assert image.get_roi_masks() is not masks
+    mask = image.maskdata
+    image.roi = image.roi[:10]
+    assert len(image.get_roi_masks()) == 10
+    assert not np.array_equal(image.maskdata, mask)
+    masks = image.get_roi_masks()
+    image.dy = 2.0
+    assert image.get_roi_masks() is not masks
+    image.roi = None
+    assert image.maskdata is None
+    execenv.print("Cache invalidation: OK")
+
+
+def roimask_test():
+    """Image ROI masks test"""
+    local_mask_test()
+    image_masks_test()
+
+
+if __name__ == "__main__":
+    roimask_test()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Parallel image ROI computations test
+
+Testing the following:
+  - Centroid, enclosing circle, peak detection and contour fit on hundreds of
+    ROIs (evaluated in parallel) give the same results as a serial evaluation,
+    in ROI order (ROI index column included)
+  - ROIs dispatched to worker processes (process pool kernel) give the same
+    results
+  - An error raised on one ROI is propagated
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import functools
+
+import numpy as np
+
+from codraft.core.computation.parallel import ProcessPoolEngine
+from codraft.core.model.image import ImageParam, RoiDataItem, create_image
+from codraft.core.processing import get_operation
+from codraft.core.processing.image import ContourShapeParam, PeakDetectionParam
+from codraft.env import execenv
+from codraft.tests.data import create_2d_gaussian
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def create_bead_array(nrows: int, ncols: int, pitch: int = 40) -> ImageParam:
+    """Create image of a `nrows` x `ncols` bead array, with one ROI per bead"""
+    rng = np.random.default_rng(1)
+    spot = create_2d_gaussian(pitch, np.float64, sigma=0.5, amp=1000.0)
+    data = rng.normal(10.0, 2.0, (nrows * pitch, ncols * pitch))
+    roi = []
+    for row in range(nrows):
+        for col in range(ncols):
+            y0, x0 = row * pitch, col * pitch
+            shift = rng.integers(-5, 6, 2)
+            data[y0 : y0 + pitch, x0 : x0 + pitch] += np.roll(spot, shift, (0, 1))
+            roi.append([x0, y0, x0 + pitch, y0 + pitch])
+    image = create_image("Bead array", data)
+    image.x0, image.y0 = 5.0, -3.0
+    image.roi = np.array(roi, int)
+    return image
+
+
+def reference_result(image: ImageParam, kernel, *args) -> np.ndarray:
+    """Return reference result array (ROIs evaluated serially)"""
+    res = []
+    for i_roi, roirow in enumerate(image.roi):
+        coords = np.array(kernel(image.get_data(i_roi), *args), float)
+        if coords.size:
+            x0, y0, _x1, _y1 = RoiDataItem(roirow).get_rect()
+            coords[:, ::2] = image.dx * (coords[:, ::2] + x0) + image.x0
+            coords[:, 1::2] = image.dy * (coords[:, 1::2] + y0) + image.y0
+            res.append(np.hstack([np.full((len(coords), 1), i_roi), coords]))
+    return np.vstack(res)
+
+
+def roi_operations_test():
+    """Test parallel ROI operations"""
+    image = create_bead_array(20, 20)
+    for name, param, args in (
+        ("centroid", None, ()),
+        ("enclosing_circle", None, ()),
+        ("peak_detection", PeakDetectionParam(), (20, 0.5)),
+        ("contour_shape", ContourShapeParam(), ("ellipse",)),
+    ):
+        operation = get_operation(ImageParam, name)
+        if param is not None:
+            param.size, param.threshold = 20, 0.5
+        result = operation(image, param)
+        reference = reference_result(image, operation.kernel, *args)
+        assert np.array_equal(result.array[:, 0], reference[:, 0])
+        assert np.allclose(result.array, reference)
+        execenv.print(f"{name} ({len(image.roi)} ROIs): OK")
+
+
+def process_pool_test():
+    """Test ROIs dispatched to worker processes"""
+    image = create_bead_array(4, 5)
+    operation = get_operation(ImageParam, "contour_shape")
+    engine = ProcessPoolEngine(max_workers=2)
+    try:
+        kernel = functools.partial(engine.run, operation.kernel)
+        result = operation(image, ContourShapeParam(), kernel=kernel)
+    finally:
+        engine.shutdown()
+    reference = reference_result(image, operation.kernel, "ellipse")
+    assert np.allclose(result.array, reference)
+    execenv.print("Process pool: OK")
+
+
+def error_test():
+    """Test error propagation"""
+
+    def kernel(data):
+        """Failing kernel"""
+        if data.shape == (40, 35):
+            raise ValueError("Invalid ROI")
+        return np.zeros((0, 2))
+
+    image = create_bead_array(3, 3)
+    image.roi[5, 2] -= 5
+    try:
+        get_operation(ImageParam, "centroid")(image, kernel=kernel)
+    except ValueError as exc:
+        assert str(exc) == "Invalid ROI"
+    else:
+        raise AssertionError("ROI error was not propagated")
+    execenv.print("Error propagation: OK")
+
+
+def roiparallel_test():
+    """Parallel image ROI computations test"""
+    roi_operations_test()
+    process_pool_test()
+    error_test()
+
+
+if __name__ == "__main__":
+    roiparallel_test()
@@ -19,7 +19,9 @@ from codraft.config import _
 from codraft.core.gui.main import CodraFTMainWindow
 from codraft.core.gui.processor.base import (
     ClipParam,
+    FFTParam,
     GaussianParam,
+    IFFTParam,
     MovingAverageParam,
     MovingMedianParam,
     ThresholdParam,
@@ -57,8 +59,8 @@ def test_compute_11_operations(panel, index):
     panel.processor.compute_moving_average(MovingAverageParam())
     panel.processor.compute_moving_median(MovingMedianParam())
     panel.processor.compute_wiener()
-    panel.processor.compute_fft()
-    panel.processor.compute_ifft()
+    panel.processor.compute_fft(FFTParam())
+    panel.processor.compute_ifft(IFFTParam())
     panel.processor.compute_abs()
     panel.processor.swap_axes()
     panel.processor.swap_axes()
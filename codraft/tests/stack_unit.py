@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Image stack test
+
+Testing the following:
+  - Image stack object (3-D data): frame access, current frame (shown frame, on
+    which ROI and computations are based)
+  - Memory-mapped image stack: frames are read only when accessed, and data is
+    copied only when modified
+  - Processing operations on image stacks: all frames are processed in a single
+    call, with the same results as processing each frame separately
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import gc
+import os.path as osp
+import tempfile
+
+import numpy as np
+
+from codraft.core.model.image import ImageParam, create_image
+from codraft.core.processing import get_operation
+from codraft.core.processing.base import (
+    GaussianParam,
+    MovingAverageParam,
+    MovingMedianParam,
+)
+from codraft.core.processing.image import ResizeParam, RotateParam
+from codraft.env import execenv
+from codraft.tests.data import get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def create_stack(nframes: int = 4) -> np.ndarray:
+    """Create image stack data"""
+    return np.array([get_peak2d_data(seed=seed)[:120, :100] for seed in range(nframes)])
+
+
+def frame_test():
+    """Test frame access"""
+    data = create_stack()
+    stack = create_image("Stack", data)
+    assert stack.is_stack and stack.frame_count == len(data)
+    assert stack.size == (100, 120)
+    assert stack.current_frame == 0
+    stack.current_frame = 2
+    assert np.array_equal(stack.get_frame(), data[2])
+    assert np.array_equal(stack.get_data(), data[2])
+    try:
+        stack.current_frame = len(data)
+    except IndexError as exc:
+        execenv.print(f"Invalid frame index (as expected): {exc}")
+    else:
+        raise AssertionError("Invalid frame index was accepted")
+    stack.roi = np.array([[10, 20, 50, 60]], int)
+    assert stack.maskdata.shape == data.shape[1:]
+    assert np.array_equal(stack.get_data(0), data[2, 20:60, 10:50])
+    image = create_image("Image", data[0])
+    assert not image.is_stack and image.frame_count == 1
+    assert image.get_frame() is image.data
+    execenv.print("Frame access: OK")
+
+
+def memmap_test():
+    """Test memory-mapped image stack"""
+    data = create_stack()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fname = osp.join(tmpdir, "stack.raw")
+        data.tofile(fname)
+        mmap = np.memmap(fname, dtype=data.dtype, mode="r", shape=data.shape)
+        stack = create_image("Stack", mmap)
+        frame = stack.get_frame(1)
+        assert np.shares_memory(frame, mmap) and np.array_equal(frame, data[1])
+        copy = ImageParam()
+        copy.copy_data_from(stack)
+        assert np.shares_memory(copy.data, mmap)
+        copy.detach_data()
+        copy.data[0] = 0
+        assert not np.shares_memory(copy.data, mmap)
+        assert np.array_equal(stack.get_frame(0), data[0])
+        result = get_operation(ImageParam, "abs")(stack)
+        assert np.array_equal(result.data, np.abs(data))
+        del mmap, stack, copy, frame
+        gc.collect()  # Release memory-mapped file before removing it
+    execenv.print("Memory-mapped stack: OK")
+
+
+def operations_test():
+    """Test processing operations on image stacks"""
+    data = create_stack()
+    stack = create_image("Stack", data)
+    gparam, aparam, mparam = GaussianParam(), MovingAverageParam(), MovingMedianParam()
+    gparam.sigma, aparam.n, mparam.n = 2.0, 5, 3
+    rparam, zparam = RotateParam(), ResizeParam()
+    rparam.angle, zparam.zoom = 30.0, 0.5
+    for name, param in (
+        ("gaussian_filter", gparam),
+        ("moving_average", aparam),
+        ("moving_median", mparam),
+        ("wiener", None),
+        ("fft", None),
+        ("rotate", rparam),
+        ("rotate90", None),
+        ("rotate270", None),
+        ("fliplr", None),
+        ("flipud", None),
+        ("swap_axes", None),
+        ("resize", zparam),
+    ):
+        operation = get_operation(ImageParam, name)
+        result = operation(stack, param)
+        assert result.is_stack and result.frame_count == len(data)
+        for index, frame in enumerate(data):
+            expected = operation(create_image("Frame", frame), param).data
+            assert np.array_equal(result.get_frame(index), expected), name
+        execenv.print(f"Stack operation '{name}': OK")
+    operation = get_operation(ImageParam, "gaussian_filter")
+    result = create_image("Stack", np.array(data, dtype=float))
+    operation.apply_in_place(result, gparam)
+    assert np.array_equal(result.data, operation(stack, gparam).data)
+    execenv.print("Stack operation in place: OK")
+
+
+def stack_test():
+    """Image stack test"""
+    frame_test()
+    memmap_test()
+    operations_test()
+
+
+if __name__ == "__main__":
+    stack_test()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Statistics kernel test
+
+Testing the following:
+  - Fused statistics give the same results as NumPy functions
+  - Image ROI statistics (masked views restricted to ROI bounding box) give the
+    same results as NumPy masked array functions applied on whole image, each
+    ROI being masked by its own mask (overlapping ROI are independent)
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+from numpy import ma
+
+from codraft.core.computation.stats import STAT_NAMES, get_stats
+from codraft.core.model.image import RoiDataItem, create_image
+from codraft.env import execenv
+from codraft.tests.data import PeakDataParam, get_peak2d_data
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+MA_FUNCS = {
+    "min": ma.min,
+    "max": ma.max,
+    "sum": ma.sum,
+    "mean": ma.mean,
+    "std": ma.std,
+    "median": ma.median,
+}
+
+
+def check_stats(stats: dict, data: np.ndarray):
+    """Check statistics against NumPy masked array functions"""
+    assert tuple(stats) == STAT_NAMES
+    data = data.astype(np.float64)  # Statistics are accumulated in float64
+    for name, func in MA_FUNCS.items():
+        assert np.isclose(stats[name], func(data), rtol=1e-10), name
+
+
+def array_stats_test():
+    """Test statistics of arrays"""
+    rng = np.random.default_rng(2)
+    for dtype in (np.float64, np.float32, np.uint16, np.int8):
+        data = (rng.random((30, 40)) * 100).astype(dtype)
+        orig = data.copy()
+        check_stats(get_stats(data), data)
+        assert np.array_equal(data, orig)  # Data is not modified
+        check_stats(get_stats(data[::2, ::3]), data[::2, ::3])
+        execenv.print(f"{np.dtype(dtype).name}: OK")
+    masked = ma.masked_array(np.arange(10.0), mask=np.arange(10) % 3 == 0)
+    check_stats(get_stats(masked), masked)
+    empty = ma.masked_array(np.arange(10.0), mask=True)
+    assert all(np.isnan(value) for value in get_stats(empty).values())
+
+
+def roi_stats_test():
+    """Test statistics of image ROIs"""
+    data = get_peak2d_data(PeakDataParam(size=300), seed=1, multi=True)
+    image = create_image("Peaks", data)
+    image.roi = np.array([[20, 30, 120, 90], [100, 60, 180, 200], [150, 50, 200, 50]])
+    for index, roirow in enumerate(image.roi):
+        roidataitem = RoiDataItem(roirow)
+        x0, y0, x1, y1 = roidataitem.get_rect()
+        masked = data.view(ma.MaskedArray)
+        masked.mask = roidataitem.apply_mask(data, yxratio=1.0)
+        expected = masked[y0:y1, x0:x1]
+        roidata = image.get_data(roi_index=index)
+        assert roidata.mask.shape == expected.shape
+        assert np.array_equal(roidata.compressed(), expected.compressed())
+        check_stats(get_stats(roidata), expected)
+        execenv.print(f"ROI{index:02d}: OK")
+
+
+if __name__ == "__main__":
+    array_stats_test()
+    roi_stats_test()
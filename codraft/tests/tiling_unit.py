@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Tiled filters test
+
+Testing the following:
+  - Apply neighbourhood filters on images split in small tiles
+  - Check that results are identical (bit for bit) to untiled computations
+  - Check that tiled Wiener filter matches `scipy.signal.wiener`
+  - Apply separable filters in place (output array being input data)
+"""
+
+# pylint: disable=invalid-name  # Allows short reference names like x, y, ...
+
+import numpy as np
+import scipy.ndimage as spi
+import scipy.signal as sps
+
+from codraft.core.computation import tiling
+from codraft.env import execenv
+
+SHOW = False  # Do not show test in GUI-based test launcher
+
+
+def tiling_test():
+    """Tiled filters test"""
+    default_tile_nbytes = tiling.TILE_NBYTES
+    rng = np.random.default_rng(1)
+    try:
+        for dtype in (np.float64, np.float32, np.uint16):
+            data = np.array(rng.random((301, 257)) * 1000.0, dtype=dtype)
+            references = (
+                spi.gaussian_filter(data, 2.5),
+                spi.uniform_filter(data, 5, mode="constant"),
+                sps.medfilt(data, 5),
+                tiling.wiener(data),
+            )
+            if dtype is not np.uint16:
+                # (scipy.signal.wiener overflows with integer data)
+                assert np.allclose(references[-1], sps.wiener(data), rtol=1e-5)
+            for tile_nbytes in (4096, 32768):
+                tiling.TILE_NBYTES = tile_nbytes
+                results = (
+                    tiling.gaussian_filter(data, 2.5),
+                    tiling.uniform_filter(data, 5, mode="constant"),
+                    tiling.medfilt(data, 5),
+                    tiling.wiener(data),
+                )
+                for result, reference in zip(results, references):
+                    assert result.dtype == reference.dtype
+                    assert np.array_equal(result, reference)
+                inplace = data.copy(), data.copy()
+                tiling.gaussian_filter(inplace[0], 2.5, output=inplace[0])
+                tiling.uniform_filter(inplace[1], 5, mode="constant", output=inplace[1])
+                for result, reference in zip(inplace, references):
+                    assert np.array_equal(result, reference)
+            execenv.print(f"{np.dtype(dtype).name}: OK")
+    finally:
+        tiling.TILE_NBYTES = default_tile_nbytes
+
+
+if __name__ == "__main__":
+    tiling_test()
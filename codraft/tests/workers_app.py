@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+Worker threads and process pool test
+
+Testing the following:
+  - Create signals and images
+  - Enable "Run processing in background" option
+  - Run processing functions on multiple objects (computed on worker threads)
+  - Check that all output objects were added (in selection order)
+  - Enable "Run computations in separate processes" option
+  - Run contour and peak detection on multiple images (computed in a process pool)
+"""
+
+from codraft.config import Conf
+from codraft.core.gui.processor.base import (
+    GaussianParam,
+    MovingAverageParam,
+    MovingMedianParam,
+)
+from codraft.core.gui.processor.image import ContourShapeParam, PeakDetectionParam
+from codraft.core.model.image import create_image
+from codraft.tests import codraft_app_context
+from codraft.tests.data import (
+    PeakDataParam,
+    create_test_image1,
+    create_test_signal1,
+    get_peak2d_data,
+)
+
+SHOW = True  # Show test in GUI-based test launcher
+
+
+def run_processing(panel, nbobj: int) -> None:
+    """Run processing functions on `nbobj` selected objects"""
+    panel.objlist.select_rows(list(range(nbobj)))
+    panel.processor.compute_gaussian(GaussianParam())
+    panel.objlist.select_rows(list(range(nbobj)))
+    panel.processor.compute_moving_average(MovingAverageParam())
+    panel.objlist.select_rows(list(range(nbobj)))
+    panel.processor.compute_moving_median(MovingMedianParam())
+    panel.objlist.select_rows(list(range(nbobj)))
+    panel.processor.compute_wiener()
+    assert len(panel.objlist) == nbobj * 5
+    for index in range(nbobj):
+        obj = panel.objlist[nbobj + index]
+        assert obj.title.endswith(f"({panel.PREFIX}{index:03d})|σ=1.000 pixels")
+
+
+def run_computing(panel, nbobj: int) -> None:
+    """Run computing functions on `nbobj` images, in a process pool"""
+    param = PeakDataParam()
+    param.size = 500
+    for index in range(nbobj):
+        data = get_peak2d_data(param, seed=index)
+        panel.add_object(create_image(f"Peaks {index}", data))
+    rows = list(range(len(panel.objlist) - nbobj, len(panel.objlist)))
+    panel.objlist.select_rows(rows)
+    panel.processor.compute_contour_shape(ContourShapeParam())
+    panel.objlist.select_rows(rows)
+    param = PeakDetectionParam()
+    param.size = 20
+    panel.processor.compute_peak_detection(param)
+
+
+def test():
+    """Run worker threads test scenario"""
+    nbobj = 6
+    use_worker_threads = Conf.proc.use_worker_threads.get(False)
+    use_process_pool = Conf.proc.use_process_pool.get(False)
+    Conf.proc.use_worker_threads.set(True)
+    try:
+        with codraft_app_context() as win:
+            panel = win.signalpanel
+            for index in range(nbobj):
+                panel.add_object(create_test_signal1(title=f"Signal {index}"))
+            run_processing(panel, nbobj)
+            win.switch_to_image_panel()
+            panel = win.imagepanel
+            for index in range(nbobj):
+                panel.add_object(create_test_image1(title=f"Image {index}"))
+            run_processing(panel, nbobj)
+            Conf.proc.use_process_pool.set(True)
+            run_computing(panel, nbobj)
+    finally:
+        Conf.proc.use_worker_threads.set(use_worker_threads)
+        Conf.proc.use_process_pool.set(use_process_pool)
+
+
+if __name__ == "__main__":
+    test()
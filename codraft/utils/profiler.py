@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT operation profiler
+
+Opt-in instrumentation of processing, object creation, plot refresh and I/O
+steps: for each call, the profiler records wall time, CPU time (of the calling
+thread), peak memory allocation (traced with `tracemalloc`) and the size of
+input and output data. Records may be exported to JSON or CSV files.
+
+When the profiler is disabled (default), instrumented calls only cost a few
+function calls (no record is created). When enabled, `tracemalloc` slows down
+memory allocations: timings are meant to be compared with each other, not with
+a non-profiled run. Peak memory being process-wide, it is traced for only one
+call at a time: calls starting while another one is traced (e.g. on worker
+threads, or nested calls) have no peak memory record, and their allocations
+are included in the peak memory of the traced call.
+
+This module has no dependency on Qt.
+"""
+
+import collections
+import csv
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Iterator, List
+
+import numpy as np
+
+
+def get_nbytes(*objs) -> int:
+    """Return data size (bytes) of objects: arrays, signal/image objects or
+    sequences of them"""
+    nbytes = 0
+    for obj in objs:
+        if obj is None:
+            continue
+        if isinstance(obj, np.ndarray):
+            nbytes += obj.nbytes
+        elif isinstance(obj, (list, tuple)):
+            nbytes += get_nbytes(*obj)
+        else:
+            data = getattr(obj, "xydata", getattr(obj, "data", None))
+            if isinstance(data, np.ndarray):
+                nbytes += data.nbytes
+    return nbytes
+
+
+class ProfileRecord:
+    """Profiled call record
+
+    :param str category: step category (e.g. "compute_11", "add_object")
+    :param str name: step name (e.g. output object title, file name)
+    :param int input_nbytes: input data size (bytes)
+    """
+
+    #: Record fields (see `todict`)
+    FIELDS = (
+        "category",
+        "name",
+        "thread",
+        "start",
+        "wall_time",
+        "cpu_time",
+        "peak_memory",
+        "input_nbytes",
+        "output_nbytes",
+    )
+
+    def __init__(self, category: str, name: str, input_nbytes: int = 0):
+        self.category = category
+        self.name = name
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_memory = None
+        self.input_nbytes = input_nbytes
+        self.output_nbytes = 0
+
+    def __repr__(self):
+        return (
+            f"ProfileRecord({self.category!r}, {self.name!r}, "
+            f"wall_time={self.wall_time}, cpu_time={self.cpu_time})"
+        )
+
+    def set_outputs(self, *objs) -> None:
+        """Set output data (arrays, signal/image objects or sequences of them)"""
+        self.output_nbytes = get_nbytes(*objs)
+
+    def todict(self) -> dict:
+        """Return record as a dictionary"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class NullProfileRecord(ProfileRecord):
+    """Profiled call record yielded when profiler is disabled (outputs are
+    ignored)"""
+
+    def set_outputs(self, *objs) -> None:
+        """Set output data (ignored)"""
+
+
+_NULL_RECORD = NullProfileRecord("", "")
+
+
+class Profiler:
+    """Operation profiler (see module docstring)
+
+    :param int max_records: maximum number of records (oldest records are
+     discarded first)
+    """
+
+    def __init__(self, max_records: int = 10000):
+        self.__records = collections.deque(maxlen=max_records)
+        self.__lock = threading.Lock()
+        self.__trace_lock = threading.Lock()  # Held while tracing peak memory
+        self.__started_tracemalloc = False
+        self.enabled = False
+        #: Number of records since the profiler was created (including discarded
+        #: and cleared ones): may be polled to detect new records
+        self.count = 0
+
+    def enable(self, state: bool = True) -> None:
+        """Enable or disable profiler"""
+        if state and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracemalloc = True
+        elif not state and self.__started_tracemalloc:
+            tracemalloc.stop()
+            self.__started_tracemalloc = False
+        self.enabled = state
+
+    def clear(self) -> None:
+        """Remove all records"""
+        with self.__lock:
+            self.__records.clear()
+
+    def get_records(self) -> List[ProfileRecord]:
+        """Return records (in chronological order of call completion)"""
+        with self.__lock:
+            return list(self.__records)
+
+    def add_record(self, record: ProfileRecord) -> None:
+        """Add record"""
+        with self.__lock:
+            self.__records.append(record)
+            self.count += 1
+
+    @contextmanager
+    def measure(self, category: str, name: str, inputs=()) -> Iterator:
+        """Context manager profiling the enclosed code, if profiler is enabled,
+        and yielding the `ProfileRecord` instance (output data may be set with
+        its `set_outputs` method)
+
+        :param str category: step category (e.g. "compute_11", "add_object")
+        :param str name: step name (e.g. output object title, file name)
+        :param inputs: input data (see `get_nbytes`)
+        """
+        if not self.enabled:
+            yield _NULL_RECORD
+            return
+        record = ProfileRecord(category, name, get_nbytes(*inputs))
+        # Peak memory is process-wide: only one call is traced at a time
+        tracing = tracemalloc.is_tracing() and self.__trace_lock.acquire(False)
+        mem0 = 0
+        if tracing:
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                tracemalloc.reset_peak()
+            mem0 = tracemalloc.get_traced_memory()[0]
+        cpu0, wall0 = time.thread_time(), time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - wall0
+            record.cpu_time = time.thread_time() - cpu0
+            if tracing:
+                if tracemalloc.is_tracing():
+                    peak = tracemalloc.get_traced_memory()[1]
+                    record.peak_memory = max(0, peak - mem0)
+                self.__trace_lock.release()
+            self.add_record(record)
+
+    def export_json(self, filename: str) -> None:
+        """Export records to JSON file"""
+        records = [record.todict() for record in self.get_records()]
+        with open(filename, "w", encoding="utf-8") as fdesc:
+            json.dump(records, fdesc, indent=2)
+
+    def export_csv(self, filename: str) -> None:
+        """Export records to CSV file"""
+        with open(filename, "w", encoding="utf-8", newline="") as fdesc:
+            writer = csv.DictWriter(fdesc, fieldnames=ProfileRecord.FIELDS)
+            writer.writeheader()
+            for record in self.get_records():
+                writer.writerow(record.todict())
+
+
+_PROFILER = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """Return the application-wide profiler"""
+    return _PROFILER
+
+
+def profiled(category: str) -> Callable:
+    """Method decorator profiling calls with the application-wide profiler
+    (step name being the instance class name and the method name)"""
+
+    def profiled_decorator(func: Callable) -> Callable:
+        """Profiled decorator"""
+
+        @functools.wraps(func)
+        def method_wrapper(self, *args, **kwargs):
+            """Decorator wrapper function"""
+            if not _PROFILER.enabled:
+                return func(self, *args, **kwargs)
+            name = f"{type(self).__name__}.{func.__name__}"
+            with _PROFILER.measure(category, name):
+                return func(self, *args, **kwargs)
+
+        return method_wrapper
+
+    return profiled_decorator
@@ -3,7 +3,12 @@
 # Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
 # (see codraft/__init__.py for details)
 
-"""Curve fitting dialog widgets"""
+"""Curve fitting dialog widgets
+
+Curve fitting functions (e.g. `gaussianfit`) first fit the curve without user
+interaction (see `codraft.core.computation.fit`), then show the fitted
+parameters in a curve fitting dialog for review (optional).
+"""
 
 # pylint: disable=invalid-name  # Allows short reference names like x, y, ...
 
@@ -14,7 +19,6 @@ from guiqwt.widgets.fit import FitDialog, FitParam
 
 from codraft.config import _
 from codraft.core.computation import fit
-from codraft.core.computation.signal import xpeak
 from codraft.utils.qthelpers import exec_dialog
 from codraft.utils.tests import get_default_test_name
 
@@ -36,8 +40,10 @@ def guifit(
     winpos=None,
     parent=None,
     name=None,
+    initial_fit=True,
 ):
-    """GUI-based curve fitting tool"""
+    """GUI-based curve fitting tool (`initial_fit`: if True, parameters are
+    fitted when opening the dialog)"""
     win = FitDialog(
         edit=True,
         wintitle=wintitle,
@@ -52,7 +58,8 @@ def guifit(
         name = get_default_test_name()
     win.setObjectName(name)
     win.set_data(x, y, fitfunc, fitparams, fitargs, fitkwargs)
-    win.autofit()  # TODO: [P3] make this optional
+    if initial_fit:
+        win.autofit()
     if parent is None:
         win.setWindowIcon(get_icon("codraft.svg"))
     if winsize is not None:
@@ -65,13 +72,34 @@ def guifit(
     return None
 
 
+def reviewfit(x, y, fitfunc, params, values, review=True, **kwargs):
+    """Return fit results (yfit, params) from fitted `values`: fitting parameters
+    `params` are set to `values`, then shown in curve fitting dialog for review
+    if `review` is True (`kwargs`: see `guifit`), returning None if the dialog
+    is cancelled"""
+    for param, value in zip(params, values):
+        param.value = value
+        param.min, param.max = min(param.min, value), max(param.max, value)
+    if review:
+        values = guifit(x, y, fitfunc, params, initial_fit=False, **kwargs)
+        if not values:
+            return None
+    return fitfunc(x, values), params
+
+
 # --- Polynomial fitting curve -------------------------------------------------
-def polynomialfit(x, y, degree, parent=None, name=None):
+def polynomialfit(
+    x, y, degree, parent=None, name=None, p0=None, values=None, review=True
+):
     """Compute polynomial fit
 
     Returns (yfit, params), where yfit is the fitted curve and params are
-    the fitting parameters"""
-    ivals = np.polyfit(x, y, degree)
+    the fitting parameters (`p0`: unused, polynomial fit being exact;
+    `values`: fitted parameters, if already computed, e.g. by
+    `codraft.core.computation.fit.fit_curves`; `review`: see `reviewfit`)"""
+    ivals = values
+    if ivals is None:
+        ivals, _converged = fit.fit_polynomial(x, y, degree, p0)
 
     params = []
     for index in range(degree + 1):
@@ -83,115 +111,123 @@ def polynomialfit(x, y, degree, parent=None, name=None):
     def fitfunc(x, params):
         return np.polyval(params, x)
 
-    values = guifit(
-        x, y, fitfunc, params, parent=parent, wintitle=_("Polymomial fit"), name=name
+    return reviewfit(
+        x,
+        y,
+        fitfunc,
+        params,
+        ivals,
+        review,
+        parent=parent,
+        wintitle=_("Polymomial fit"),
+        name=name,
     )
-    if values:
-        return fitfunc(x, values), params
 
 
-# --- Gaussian fitting curve ---------------------------------------------------
-def gaussianfit(x, y, parent=None, name=None):
-    """Compute Gaussian fit
+def modelfit(model, wintitle, x, y, parent=None, name=None, **fitkwargs):
+    """Compute `model` fit (see `codraft.core.computation.fit.FitModel`)
 
     Returns (yfit, params), where yfit is the fitted curve and params are
-    the fitting parameters"""
-    dx = np.max(x) - np.min(x)
+    the fitting parameters (`fitkwargs`: fitting inputs, i.e. `p0`: initial
+    parameters, e.g. from a previous fit; `values`: fitted parameters, if
+    already computed, e.g. by `codraft.core.computation.fit.fit_curves`;
+    `review`: see `reviewfit`)"""
+    amp, sigma, mu, base = fit.get_initial_params(model, x, y)
     dy = np.max(y) - np.min(y)
-    sigma = dx * 0.1
-    amp = fit.GaussianModel.get_amp_from_amplitude(dy, sigma)
+    p0, values = fitkwargs.get("p0"), fitkwargs.get("values")
+    if values is None:
+        values, converged = fit.fit_model(model, x, y, p0)
+        if not converged and p0 is not None:
+            values, converged = fit.fit_model(model, x, y)
 
     a = FitParam(_("Amplitude"), amp, 0.0, amp * 1.2)
-    b = FitParam(_("Base line"), np.min(y), np.min(y) - 0.1 * dy, np.max(y))
+    b = FitParam(_("Base line"), base, base - 0.1 * dy, np.max(y))
     sigma = FitParam(_("Std-dev") + " (σ)", sigma, sigma * 0.2, sigma * 10)
-    mu = FitParam(_("Mean") + " (μ)", xpeak(x, y), np.min(x), np.max(x))
+    mu = FitParam(_("Mean") + " (μ)", mu, np.min(x), np.max(x))
 
     params = [a, sigma, mu, b]
 
     def fitfunc(x, params):
-        return fit.GaussianModel.func(x, *params)
+        return model.func(x, *params)
 
-    values = guifit(
-        x, y, fitfunc, params, parent=parent, wintitle=_("Gaussian fit"), name=name
+    return reviewfit(
+        x,
+        y,
+        fitfunc,
+        params,
+        values,
+        fitkwargs.get("review", True),
+        parent=parent,
+        wintitle=wintitle,
+        name=name,
     )
-    if values:
-        return fitfunc(x, values), params
-
 
-# --- Lorentzian fitting curve -------------------------------------------------
-def lorentzianfit(x, y, parent=None, name=None):
-    """Compute Lorentzian fit
-
-    Returns (yfit, params), where yfit is the fitted curve and params are
-    the fitting parameters"""
-    dx = np.max(x) - np.min(x)
-    dy = np.max(y) - np.min(y)
-    sigma = dx * 0.1
-    amp = fit.LorentzianModel.get_amp_from_amplitude(dy, sigma)
-
-    a = FitParam(_("Amplitude"), amp, 0.0, amp * 1.2)
-    b = FitParam(_("Base line"), np.min(y), np.min(y) - 0.1 * dy, np.max(y))
-    sigma = FitParam(_("Std-dev") + " (σ)", sigma, sigma * 0.2, sigma * 10)
-    mu = FitParam(_("Mean") + " (μ)", xpeak(x, y), np.min(x), np.max(x))
 
-    params = [a, sigma, mu, b]
+# --- Gaussian fitting curve ---------------------------------------------------
+def gaussianfit(x, y, parent=None, name=None, p0=None, values=None, review=True):
+    """Compute Gaussian fit (see `modelfit`)"""
+    return modelfit(
+        fit.GaussianModel,
+        _("Gaussian fit"),
+        x,
+        y,
+        parent,
+        name,
+        p0=p0,
+        values=values,
+        review=review,
+    )
 
-    def fitfunc(x, params):
-        return fit.LorentzianModel.func(x, *params)
 
-    values = guifit(
-        x, y, fitfunc, params, parent=parent, wintitle=_("Lorentzian fit"), name=name
+# --- Lorentzian fitting curve -------------------------------------------------
+def lorentzianfit(x, y, parent=None, name=None, p0=None, values=None, review=True):
+    """Compute Lorentzian fit (see `modelfit`)"""
+    return modelfit(
+        fit.LorentzianModel,
+        _("Lorentzian fit"),
+        x,
+        y,
+        parent,
+        name,
+        p0=p0,
+        values=values,
+        review=review,
     )
-    if values:
-        return fitfunc(x, values), params
 
 
 # --- Voigt fitting curve ------------------------------------------------------
-def voigtfit(x, y, parent=None, name=None):
-    """Compute Voigt fit
-
-    Returns (yfit, params), where yfit is the fitted curve and params are
-    the fitting parameters"""
-    dx = np.max(x) - np.min(x)
-    dy = np.max(y) - np.min(y)
-    sigma = dx * 0.1
-    amp = fit.VoigtModel.get_amp_from_amplitude(dy, sigma)
-
-    a = FitParam(_("Amplitude"), amp, 0.0, amp * 1.2)
-    b = FitParam(_("Base line"), np.min(y), np.min(y) - 0.1 * dy, np.max(y))
-    sigma = FitParam(_("Std-dev") + " (σ)", sigma, sigma * 0.2, sigma * 10)
-    mu = FitParam(_("Mean") + " (μ)", xpeak(x, y), np.min(x), np.max(x))
-
-    params = [a, sigma, mu, b]
-
-    def fitfunc(x, params):
-        return fit.VoigtModel.func(x, *params)
-
-    values = guifit(
-        x, y, fitfunc, params, parent=parent, wintitle=_("Voigt fit"), name=name
+def voigtfit(x, y, parent=None, name=None, p0=None, values=None, review=True):
+    """Compute Voigt fit (see `modelfit`)"""
+    return modelfit(
+        fit.VoigtModel,
+        _("Voigt fit"),
+        x,
+        y,
+        parent,
+        name,
+        p0=p0,
+        values=values,
+        review=review,
     )
-    if values:
-        return fitfunc(x, values), params
 
 
 # --- Multi-Gaussian fitting curve ---------------------------------------------
-def multigaussian(x, *values, **kwargs):
-    """Return a 1-dimensional multi-Gaussian function."""
-    a_amp = values[0::2]
-    a_sigma = values[1::2]
-    y0 = values[-1]
-    a_x0 = kwargs["a_x0"]
-    y = np.zeros_like(x) + y0
-    for amp, sigma, x0 in zip(a_amp, a_sigma, a_x0):
-        y += amp * np.exp(-0.5 * ((x - x0) / sigma) ** 2)
-    return y
-
-
-def multigaussianfit(x, y, peak_indexes, parent=None, name=None):
+multigaussian = fit.multigaussian
+
+
+def multigaussianfit(
+    x, y, peak_indexes, parent=None, name=None, p0=None, values=None, review=True
+):
     """Compute Multi-Gaussian fit
 
     Returns (yfit, params), where yfit is the fitted curve and params are
-    the fitting parameters"""
+    the fitting parameters (`p0`: initial parameters, e.g. from a previous fit;
+    `values`: fitted parameters, if already computed; `review`: see
+    `reviewfit`)"""
+    if values is None:
+        values, converged = fit.fit_multigaussian(x, y, peak_indexes, p0)
+        if not converged and p0 is not None:
+            values, converged = fit.fit_multigaussian(x, y, peak_indexes)
     params = []
     for index, i0 in enumerate(peak_indexes):
         iprev = 0
@@ -222,16 +258,16 @@ def multigaussianfit(x, y, peak_indexes, parent=None, name=None):
     param_cols = 1
     if len(params) > 8:
         param_cols = 4
-    values = guifit(
+    return reviewfit(
         x,
         y,
         fitfunc,
         params,
+        values,
+        review,
         param_cols=param_cols,
         winsize=(900, 600),
         parent=parent,
         name=name,
         wintitle=_("Multi-Gaussian fit"),
     )
-    if values:
-        return fitfunc(x, values), params
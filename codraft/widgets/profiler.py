@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+# (see codraft/__init__.py for details)
+
+"""
+CodraFT profiler widget (see `codraft.utils.profiler`)
+"""
+
+import os.path as osp
+import time
+
+from guidata.configtools import get_icon
+from guidata.qthelpers import create_toolbutton
+from guidata.qtwidgets import DockableWidget
+from qtpy import QtCore as QC
+from qtpy import QtWidgets as QW
+from qtpy.compat import getsavefilename
+
+from codraft.config import Conf, _
+from codraft.utils.profiler import get_profiler
+from codraft.utils.qthelpers import qt_try_loadsave_file, save_restore_stds
+
+
+def format_time(value: float) -> str:
+    """Format duration (s) in milliseconds"""
+    return "" if value is None else f"{value * 1e3:.1f}"
+
+
+def format_size(value: int) -> str:
+    """Format size (bytes) in megabytes"""
+    return "" if value is None else f"{value / 1024**2:.2f}"
+
+
+class ProfilerWidget(DockableWidget):
+    """Profiler widget: shows profiled calls (wall time, CPU time, peak memory
+    allocation, input/output data size)
+
+    :param QWidget parent: parent widget
+    :param int delay: update interval (ms)
+    """
+
+    LOCATION = QC.Qt.BottomDockWidgetArea
+    COLUMNS = (
+        (_("Category"), lambda rec: rec.category),
+        (_("Name"), lambda rec: rec.name),
+        (_("Thread"), lambda rec: rec.thread),
+        (_("Start"), lambda rec: time.strftime("%H:%M:%S", time.localtime(rec.start))),
+        (_("Wall time (ms)"), lambda rec: format_time(rec.wall_time)),
+        (_("CPU time (ms)"), lambda rec: format_time(rec.cpu_time)),
+        (_("Peak memory (MB)"), lambda rec: format_size(rec.peak_memory)),
+        (_("Input (MB)"), lambda rec: format_size(rec.input_nbytes)),
+        (_("Output (MB)"), lambda rec: format_size(rec.output_nbytes)),
+    )
+
+    def __init__(self, parent: QW.QWidget = None, delay: int = 1000):
+        super().__init__(parent)
+        self.profiler = get_profiler()
+        self.__count = None
+        self.record_btn = create_toolbutton(
+            self,
+            get_icon("libre-gui-binoculars.svg"),
+            _("Record"),
+            toggled=self.profiler.enable,
+            tip=_(
+                "Profile processing, object creation, plot refresh and I/O steps "
+                "(slows down memory allocations)"
+            ),
+        )
+        self.record_btn.setCheckable(True)
+        self.record_btn.setToolButtonStyle(QC.Qt.ToolButtonTextBesideIcon)
+        clear_btn = create_toolbutton(
+            self,
+            get_icon("delete_all.svg"),
+            _("Clear"),
+            triggered=self.clear,
+            autoraise=True,
+        )
+        clear_btn.setToolButtonStyle(QC.Qt.ToolButtonTextBesideIcon)
+        export_btn = create_toolbutton(
+            self,
+            get_icon("libre-gui-export.svg"),
+            _("Export..."),
+            triggered=lambda _checked=False: self.export_records(),
+            tip=_("Export records to JSON or CSV file"),
+            autoraise=True,
+        )
+        export_btn.setToolButtonStyle(QC.Qt.ToolButtonTextBesideIcon)
+        self.label = QW.QLabel()
+        btn_layout = QW.QHBoxLayout()
+        for widget in (self.record_btn, clear_btn, export_btn):
+            btn_layout.addWidget(widget)
+        btn_layout.addStretch()
+        btn_layout.addWidget(self.label)
+        self.table = QW.QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _func in self.COLUMNS])
+        self.table.setEditTriggers(QW.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().hide()
+        layout = QW.QVBoxLayout()
+        layout.addLayout(btn_layout)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.timer = QC.QTimer()
+        self.timer.timeout.connect(self.update_records)
+        self.timer.start(delay)
+
+    def update_records(self) -> None:
+        """Update records table (if new calls were profiled)"""
+        if self.__count == self.profiler.count:
+            return
+        self.__count = self.profiler.count
+        records = self.profiler.get_records()
+        self.table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            for column, (_title, func) in enumerate(self.COLUMNS):
+                self.table.setItem(row, column, QW.QTableWidgetItem(func(record)))
+        if records:
+            self.table.scrollToBottom()
+        self.table.resizeColumnsToContents()
+        total = sum(record.wall_time for record in records)
+        self.label.setText(
+            _("%d calls, %s ms") % (len(records), format_time(total)) if records else ""
+        )
+
+    def clear(self) -> None:
+        """Clear records"""
+        self.profiler.clear()
+        self.__count = None
+        self.update_records()
+
+    def export_records(self, filename: str = None) -> None:
+        """Export records to JSON or CSV file (file format depending on
+        file extension)"""
+        if filename is None:
+            basedir = Conf.main.base_dir.get()
+            filters = f'{_("JSON files")} (*.json);;{_("CSV files")} (*.csv)'
+            with save_restore_stds():
+                filename, _filter = getsavefilename(
+                    self, _("Export profiler records"), basedir, filters
+                )
+        if filename:
+            with qt_try_loadsave_file(self.parent(), filename, "save"):
+                Conf.main.base_dir.set(filename)
+                if osp.splitext(filename)[1].lower() == ".csv":
+                    self.profiler.export_csv(filename)
+                else:
+                    self.profiler.export_json(filename)
@@ -15,6 +15,7 @@ from qtpy import QtGui as QG
 from qtpy import QtWidgets as QW
 
 from codraft.config import DEBUG, _
+from codraft.core.computation.cache import get_result_cache
 from codraft.env import execenv
 
 
@@ -64,3 +65,38 @@ class MemoryStatus(QW.QWidget):
         self.icon.setPixmap(QG.QPixmap() if memok else self.ko_icon.pixmap(size, size))
         mem_percent = 65 if self.demo_mode else int(mem.percent)
         self.label.setText(_("Memory:") + f" {mem_percent}%")
+
+
+class CacheStatus(QW.QWidget):
+    """
+    Result cache status widget
+
+    :param int delay: update interval (s)
+    :param QWidget parent: parent widget
+    """
+
+    def __init__(self, delay: int = 2, parent: QW.QWidget = None):
+        super().__init__(parent)
+        layout = QW.QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self.label = QW.QLabel()
+        layout.addWidget(self.label)
+        self.timer = QC.QTimer()
+        self.timer.timeout.connect(self.update_status)
+        self.timer.start(delay * 1000)
+        self.update_status()
+
+    def update_status(self):
+        """Update status widget"""
+        cache = get_result_cache()
+        self.setVisible(cache.max_nbytes > 0 or len(cache) > 0)
+        self.label.setText(
+            _("Cache:")
+            + f" {cache.hits}/{cache.hits + cache.misses} "
+            + f"({cache.nbytes // (1024**2)} MB)"
+        )
+        self.setToolTip(
+            _("Result cache: %d hits, %d misses, %d results stored")
+            % (cache.hits, cache.misses, len(cache))
+        )
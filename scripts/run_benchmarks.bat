@@ -0,0 +1,15 @@
+@echo off
+REM ======================================================
+REM Benchmark script (airspeed velocity)
+REM ======================================================
+REM Licensed under the terms of the BSD 3-Clause or the CeCILL-B License
+REM (see codraft/__init__.py for details)
+REM ======================================================
+setlocal
+call %~dp0utils GetScriptPath SCRIPTPATH
+call %FUNC% SetPythonPath
+call %FUNC% UseWinPython
+cd %SCRIPTPATH%\..
+python -m asv run --python=same --show-stderr %*
+python -m asv publish
+call %FUNC% EndOfScript
@@ -119,6 +119,7 @@ setup(
     entry_points={
         "gui_scripts": [f"{MODNAME} = {MODNAME}.app:run"],
         "console_scripts": [
+            f"{MODNAME}-batch = {MODNAME}.batch:run",
             f"{MODNAME}-tests = {MODNAME}.tests:run",
             f"{MODNAME}-demo = {MODNAME}.tests.demo:run",
             f"{MODNAME}-alltests = {MODNAME}.tests.all_tests:run",